@@ -1,9 +1,11 @@
+import asyncio
 import subprocess
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from app import models
 from app.logic.config import get_config
+from app.services.app_supervisor import app_supervisor
 from framework.api.deps import get_current_active_user
 
 
@@ -23,8 +25,11 @@ async def start_app(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="App not found")
 
     try:
-        # Using Popen to run in the background
-        app.start()
+        if app.is_supervised:
+            await app_supervisor.send_command("start", app)
+        else:
+            await asyncio.to_thread(app.start)
+            app_supervisor.invalidate(app_id)
         return {"status": "starting", "app_id": app_id}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
@@ -43,8 +48,12 @@ async def restart_app(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="App not found")
 
     try:
-        # Using Popen to run in the background
-        app.restart()
+        if app.is_supervised:
+            # Stopping can take up to `stop_timeout_seconds`, so don't wait for it
+            await app_supervisor.send_command("restart", app)
+        else:
+            await asyncio.to_thread(app.restart)
+            app_supervisor.invalidate(app_id)
         return {"status": "restarting", "app_id": app_id}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) from e
@@ -63,7 +72,11 @@ async def stop_app(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="App not found")
 
     try:
-        app.stop()
+        if app.is_supervised:
+            await app_supervisor.send_command("stop", app)
+            return {"status": "stopping", "app_id": app_id}
+        await asyncio.to_thread(app.stop)
+        app_supervisor.invalidate(app_id)
         return {"status": "stopped", "app_id": app_id}
     except subprocess.CalledProcessError as e:
         # If the process isn't running, the stop command might fail. This is not necessarily an error we want to bubble up.
@@ -6,19 +6,13 @@ from sqlmodel import Session
 
 from app.logic.config import get_config
 from app.services.app_manager_ws_manager import app_manager_ws_manager
+from app.services.app_supervisor import app_supervisor
 from framework.core.db import get_db
 
 
 router = APIRouter()
 
 
-def get_app_status():
-    return {
-        "app1": True,
-        "app2": False,
-    }
-
-
 def get_log():
     return "Hello World"
 
@@ -28,11 +22,12 @@ async def websocket_app_manager(websocket: WebSocket, db: Session = Depends(get_
     await app_manager_ws_manager.connect(websocket)
 
     # Send initial state
-    app_status = get_app_status()
-    await websocket.send_json(
+    app_status = await app_supervisor.get_status_map(get_config().app_manager.apps)
+    await app_manager_ws_manager.send(
+        websocket,
         {
             "app_status": app_status,
-        }
+        },
     )
     log_task = None
     try:
@@ -45,7 +40,9 @@ async def websocket_app_manager(websocket: WebSocket, db: Session = Depends(get_
                 msg = json.loads(data)
             except Exception:
                 msg = None
-            if msg and msg.get("type") == "subscribe_app_log":
+            if msg and msg.get("type") == "pong":
+                app_manager_ws_manager.receive_pong(websocket)
+            elif msg and msg.get("type") == "subscribe_app_log":
                 if log_task:
                     log_task.cancel()
                 topic = msg.get("topic")
@@ -137,5 +134,5 @@ async def stream_app_log(websocket: WebSocket, topic: str) -> None:
     if not app:
         raise ValueError(f"App with id `{topic}` not found")
 
-    file_path = app.log_file
+    file_path = app_supervisor.get_log_path(app)
     return await stream_log(websocket, file_path=file_path, topic=topic)
@@ -1,11 +1,15 @@
+from collections.abc import Iterator
+from datetime import datetime
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, Security
+from fastapi import APIRouter, Depends, Query, Security
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
 from app import crud, models
+from app.logic.export import EXPORT_BATCH_SIZE, iter_export_ndjson
 from framework.core.api_key import get_api_key
-from framework.core.db import get_db
+from framework.core.db import get_db, get_db_context
 
 
 # Create a router that bypasses global auth
@@ -32,11 +36,11 @@ async def export_data(
     sd_extra_networks = await crud.sd_extra_network.get_all(db=db)
     characters = await crud.character.get_all(db=db)
 
-    character_ids_for_sd_base_models = {}
-    for sd_base_model in sd_base_models:
-        character_ids_for_sd_base_models[
-            sd_base_model.id
-        ] = await crud.sd_base_model.get_character_ids_for_base_model(db=db, id=sd_base_model.id)
+    character_ids = await crud.sd_base_model.get_character_ids_by_base_model(db=db)
+    character_ids_for_sd_base_models = {
+        sd_base_model.id: character_ids.get(sd_base_model.id, [])
+        for sd_base_model in sd_base_models
+    }
 
     # Convert to dictionary format
     return {
@@ -55,3 +59,28 @@ async def export_data(
         ],
         "character_ids_for_sd_base_models": [character_ids_for_sd_base_models],
     }
+
+
+@router.get("/export/stream", include_in_schema=True)
+def export_data_stream(
+    api_key: Annotated[str, Security(get_api_key)],
+    updated_since: datetime | None = None,
+    batch_size: Annotated[int, Query(ge=1, le=5000)] = EXPORT_BATCH_SIZE,
+) -> StreamingResponse:
+    """Stream the database as NDJSON, see `app.logic.export`.
+
+    Args:
+        api_key: Validated API key
+        updated_since: Only export records created or updated since this time
+        batch_size: Number of rows read per query
+
+    Returns:
+        NDJSON stream of the exported records
+    """
+
+    def stream() -> Iterator[str]:
+        # The session has to outlive the request handler, so it is opened by the stream
+        with get_db_context() as db:
+            yield from iter_export_ndjson(db, updated_since=updated_since, batch_size=batch_size)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
@@ -0,0 +1,30 @@
+import asyncio
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Security
+from sqlmodel import Session
+
+from app.logic.hub_sync import HubManifest, build_hub_manifest
+from framework.core.api_key import get_api_key
+from framework.core.db import get_db
+
+
+# Create a router that bypasses global auth
+router = APIRouter(prefix="", include_in_schema=True)
+
+
+@router.get("/hub/manifest", response_model=HubManifest)
+async def get_hub_manifest(
+    db: Annotated[Session, Depends(get_db)],
+    api_key: Annotated[str, Security(get_api_key)],
+) -> HubManifest:
+    """Get the sha256 manifest of this environment's hub safetensors.
+
+    Args:
+        db: Database session
+        api_key: Validated API key
+
+    Returns:
+        Manifest used by other environments to plan deduplicated hub transfers
+    """
+    return await asyncio.to_thread(build_hub_manifest, db)
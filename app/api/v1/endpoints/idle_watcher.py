@@ -2,31 +2,60 @@
 API endpoints for managing the idle watcher.
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+
+from app import models
+from app.services.idle_watcher import IdleWatcherStatus, idle_watcher
+from framework.api.deps import get_current_active_user
 
 
 router = APIRouter()
 
 
-@router.post("/idle-watcher/wake", status_code=501)
-def wake_watcher() -> None:
+class IdleWatcherConfigUpdate(BaseModel):
+    idle_timeout_minutes: int = Field(ge=0)
+
+
+@router.post("/idle-watcher/wake", response_model=IdleWatcherStatus)
+def wake_watcher(
+    current_user: models.User = Depends(get_current_active_user),
+) -> IdleWatcherStatus:
+    """
+    Interrupt idle-driven execution until the watcher is resumed.
+    """
+    idle_watcher.wake()
+    return idle_watcher.get_status()
+
+
+@router.post("/idle-watcher/resume", response_model=IdleWatcherStatus)
+def resume_watcher(
+    current_user: models.User = Depends(get_current_active_user),
+) -> IdleWatcherStatus:
     """
-    Interrupt idle-driven execution. (Not Implemented)
+    Resume idle-driven execution.
     """
-    raise HTTPException(status_code=501, detail="Not Implemented")
+    idle_watcher.resume()
+    return idle_watcher.get_status()
 
 
-@router.post("/idle-watcher/config", status_code=501)
-def configure_watcher() -> None:
+@router.post("/idle-watcher/config", response_model=IdleWatcherStatus)
+def configure_watcher(
+    config_in: IdleWatcherConfigUpdate,
+    current_user: models.User = Depends(get_current_active_user),
+) -> IdleWatcherStatus:
     """
-    Change idle timeout duration. (Not Implemented)
+    Change idle timeout duration.
     """
-    raise HTTPException(status_code=501, detail="Not Implemented")
+    idle_watcher.configure(idle_timeout_minutes=config_in.idle_timeout_minutes)
+    return idle_watcher.get_status()
 
 
-@router.get("/idle-watcher/status", status_code=501)
-def get_watcher_status() -> None:
+@router.get("/idle-watcher/status", response_model=IdleWatcherStatus)
+def get_watcher_status(
+    current_user: models.User = Depends(get_current_active_user),
+) -> IdleWatcherStatus:
     """
-    Returns the current idle state of the GPU. (Not Implemented)
+    Returns the idle watcher state machine for each watched queue.
     """
-    raise HTTPException(status_code=501, detail="Not Implemented")
+    return idle_watcher.get_status()
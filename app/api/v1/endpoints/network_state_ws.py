@@ -0,0 +1,32 @@
+import json
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from app.services.network_state import network_state_watcher, network_state_ws_manager
+
+
+router = APIRouter()
+
+
+@router.websocket("/ws/network-state")
+async def websocket_network_state(websocket: WebSocket) -> None:
+    await network_state_ws_manager.connect(websocket)
+
+    # Send initial state, then only changes are broadcast
+    if network_state_watcher.get_network_state() is None:
+        await network_state_watcher.refresh_and_broadcast()
+    await network_state_ws_manager.send(websocket, network_state_watcher.get_snapshot())
+    try:
+        while True:
+            # Just keep alive
+            data = await websocket.receive_text()
+            try:
+                msg = json.loads(data)
+            except ValueError:
+                continue
+            if isinstance(msg, dict) and msg.get("type") == "pong":
+                network_state_ws_manager.receive_pong(websocket)
+    except WebSocketDisconnect:
+        network_state_ws_manager.disconnect(websocket)
+    except Exception:
+        network_state_ws_manager.disconnect(websocket)
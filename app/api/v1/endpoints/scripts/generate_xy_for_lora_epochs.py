@@ -33,6 +33,11 @@ async def generate_xy_for_lora_epochs(
     env_name = body.get("env_name", settings.ENV_NAME if settings.ENV_NAME else "dev")
     queue_name = body.get("queue_name", "default")
 
+    # Queue behind the jobs it depends on (e.g. the training job), or wait to be queued
+    depends_on = body.pop("depends_on", None) or []
+    if isinstance(depends_on, str):
+        depends_on = json.loads(depends_on)
+
     # Add to queue.
     db_job = await crud.job.create(
         db,
@@ -43,7 +48,8 @@ async def generate_xy_for_lora_epochs(
             type=models.JobType.script,
             command="ScriptGenerateXYForLoraEpochs",
             meta=body,
-            status=models.JobStatus.pending,
+            depends_on=depends_on,
+            status=models.JobStatus.queued if depends_on else models.JobStatus.pending,
         ),
     )
 
@@ -1,11 +1,14 @@
+from datetime import datetime, timedelta, timezone
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, Security
+from fastapi import APIRouter, Depends, HTTPException, Query, Security, status
 from fastapi.responses import JSONResponse
 from sqlmodel import Session
 
-from app import crud, models
-from app.logic import state
+from app import models, settings
+from app.logic import state as state_logic
+from app.logic.metrics import get_metrics_chart_data
+from framework.api.deps import get_current_active_user
 from framework.core.api_key import get_api_key
 from framework.core.db import get_db
 from framework.routes.restrict_to_env import restrict_to
@@ -29,7 +32,7 @@ async def get_instance_state(
     Returns:
         Dictionary containing the instance state
     """
-    instance_state = await state.get_instance_state()
+    instance_state = await state_logic.get_instance_state()
 
     return instance_state.model_dump(mode="json")
 
@@ -49,7 +52,7 @@ async def get_network_state(
     Returns:
         Dictionary containing the network state
     """
-    network_state = state.get_network_state(db=db)
+    network_state = state_logic.get_network_state(db=db)
 
     return network_state.model_dump(mode="json")
 
@@ -71,17 +74,74 @@ async def recieve_state(
     Returns:
         Dictionary containing the instance state
     """
-    instance_state = models.InstanceState.model_validate(state)
-    db_instance_state = await crud.instance_state.get(db, id=instance_state.id)
-    if db_instance_state:
-        await crud.instance_state.update(
-            db,
-            db_obj=db_instance_state,
-            obj_in=models.InstanceStateUpdate.model_validate(instance_state),
-        )
-    else:
-        await crud.instance_state.create(
-            db, obj_in=models.InstanceStateCreate.model_validate(instance_state)
-        )
+    await state_logic.save_instance_state_to_db(db, models.InstanceState.model_validate(state))
 
     return {"message": "Instance state saved"}
+
+
+@router.post(
+    "/state/recieve-delta",
+    include_in_schema=True,
+    response_model=models.InstanceStateDelta,
+)
+@restrict_to("host")
+async def recieve_state_delta(
+    delta: models.InstanceStateDelta,
+    db: Annotated[Session, Depends(get_db)],
+    api_key: Annotated[str, Security(get_api_key)],
+) -> models.InstanceStateDelta:
+    """Recieve the changed fields of an instance state. Save them to the database.
+
+    Args:
+        delta: Changed fields and the version they apply to
+        db: Database session
+        api_key: Validated API key
+
+    Returns:
+        The applied delta with the new version
+
+    Raises:
+        HTTPException: 409 if the stored state is at another version. The full state has to
+            be sent to `/state/recieve-state` instead.
+    """
+    applied = await state_logic.apply_instance_state_delta(db, delta)
+    if applied is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"InstanceState({delta.id}) is not at version {delta.base_version}",
+        )
+    return applied
+
+
+@router.get("/state/metrics", include_in_schema=True, response_model=models.MetricsChartData)
+async def get_metrics(
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[models.User, Depends(get_current_active_user)],
+    env_name: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    resolution: models.MetricResolution | None = Query(default=None),
+) -> models.MetricsChartData:
+    """Get utilization history as chart data.
+
+    Args:
+        db: Database session
+        current_user: The current active user
+        env_name: Environment to get the metrics for. Defaults to this instance.
+        start: Start of the range. Defaults to 24 hours before `end`.
+        end: End of the range. Defaults to now.
+        resolution: `1m` or `1h` buckets. Chosen from the range length if not given.
+
+    Returns:
+        Timestamps and one series per metric average/maximum
+    """
+    end = end or datetime.now(tz=timezone.utc)
+    start = start or end - timedelta(hours=24)
+
+    return await get_metrics_chart_data(
+        db,
+        env_name=env_name or settings.ENV_NAME,
+        start=start,
+        end=end,
+        resolution=resolution,
+    )
@@ -1,4 +1,5 @@
 import asyncio
+import signal
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager, suppress
 
@@ -7,16 +8,34 @@ from fastapi.staticfiles import StaticFiles
 from sqlmodel import Session
 
 from app import logger, settings
+from app.logic.config import config_service
+from app.logic.metrics import metrics_rollup
 from app.logic.state import update_instance_state
-from app.paths import STATIC_PATH
+from app.paths import METRICS_SNAPSHOTS_PATH, STATIC_PATH
 from app.routes.api import api_router
 from app.routes.views import views_router
+from app.services.app_supervisor import app_supervisor
 from app.services.idle_watcher import start_idle_watcher, stop_idle_watcher
-from framework.core.db import get_db_context, initialize_tables_and_initial_data
+from app.services.network_state import network_state_watcher
+from framework.api.v1.endpoints import metrics
+from framework.core.backplane import backplane
+from framework.core.db import engine, get_db_context, initialize_tables_and_initial_data
+from framework.core.leader import leader_lock
+from framework.core.prometheus import registry
+from framework.middleware.profiling import ProfilingMiddleware
+from framework.middleware.queries import QueryCounterMiddleware
+from framework.middleware.timing import RequestMetricsMiddleware, instrument_engine
 from framework.services import notify
+from framework.services.gpu_telemetry import gpu_telemetry
 from framework.services.job_queue import (
     start_huey_consumers_on_start,
 )
+from framework.services.job_reaper import job_reaper
+from framework.services.system_metrics import (
+    start_system_metrics_sampler,
+    stop_system_metrics_sampler,
+    system_metrics_sampler,
+)
 from framework.tasks.execute_scheduler import run_on_start_schedulers
 
 
@@ -71,29 +90,88 @@ async def startup_event(db: Session | None = None) -> None:
     await start_huey_consumers_on_start()
 
 
+async def run_leader_services() -> None:
+    """
+    Run the services that only run once per instance, until cancelled. Only the worker
+    holding the leader lock runs them (see `framework.core.leader`).
+    """
+    # Start the system metrics sampler and roll its samples up into the metrics store
+    system_metrics_sampler.subscribe(metrics_rollup.add_sample)
+    start_system_metrics_sampler()
+
+    tasks = [
+        # Update the instance state
+        asyncio.create_task(recurring_task_to_update_instatnce_state()),
+        # Push network state changes to websocket subscribers
+        asyncio.create_task(network_state_watcher.run()),
+        # Requeue or fail the running jobs whose worker stopped beating
+        asyncio.create_task(job_reaper.run()),
+    ]
+
+    # Start the idle watcher and the app status loop
+    if settings.ENV_NAME == "playground":
+        start_idle_watcher()
+        tasks.append(asyncio.create_task(app_supervisor.run()))
+
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+        if settings.ENV_NAME == "playground":
+            stop_idle_watcher()
+            await app_supervisor.stop_all()
+
+        # Stop the system metrics sampler and persist the partial minute
+        stop_system_metrics_sampler()
+        metrics_rollup.flush()
+        gpu_telemetry.close()
+        leader_lock.release()
+
+
+async def take_over_leader_services() -> None:
+    """Wait for the leader worker to exit, then start up and run its services."""
+    await leader_lock.wait()
+    await startup_event()
+    await run_leader_services()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    # Startup
-    await startup_event()
+    # Startup. With several workers, only the leader starts up and runs the services
+    if leader_lock.try_acquire():
+        await startup_event()
+        leader_task = asyncio.create_task(run_leader_services())
+    else:
+        logger.info("Another worker is the leader, this worker only serves requests.")
+        leader_task = asyncio.create_task(take_over_leader_services())
 
-    # Start the idle watcher
-    if settings.ENV_NAME == "playground":
-        start_idle_watcher()
+    # Receive the websocket broadcasts of the other workers
+    await backplane.start()
+
+    # Add up the metrics of all workers on /metrics
+    if settings.METRICS_ENABLED and settings.UVICORN_WORKERS > 1:
+        registry.enable_multiprocess(METRICS_SNAPSHOTS_PATH)
 
-    # Start the recurring task to update the instance state
-    update_task = asyncio.create_task(recurring_task_to_update_instatnce_state())
+    # Reload the config on SIGHUP
+    with suppress(NotImplementedError, RuntimeError):
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP, config_service.reload_on_signal
+        )
 
     yield
 
     # Shutdown
-    if settings.ENV_NAME == "playground":
-        stop_idle_watcher()
-
-    # Cancel the recurring task to update the instance state
-    update_task.cancel()
-
+    leader_task.cancel()
     with suppress(asyncio.CancelledError):
-        await update_task
+        await leader_task
+
+    await backplane.stop()
+    registry.stop()
 
 
 # Initialize FastAPI App
@@ -108,6 +186,19 @@ app = FastAPI(
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 app.include_router(views_router)
 
+# Time requests and queries, and expose the metrics on /metrics
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    app.add_middleware(RequestMetricsMiddleware)
+    app.include_router(metrics.router)
+
+# Log the requests that repeat queries (N+1), in development
+if settings.QUERY_COUNTER_ENABLED:
+    app.add_middleware(QueryCounterMiddleware)
+
+# Profile the requests of superusers that add ?profile=1
+app.add_middleware(ProfilingMiddleware)
+
 # Mount static and uploads directories
 STATIC_PATH.mkdir(parents=True, exist_ok=True)
 
@@ -1,6 +1,7 @@
 from framework.crud import *
 
 from .character import *
+from .instance_metric import *
 from .instance_state import *
 from .sd_base_model import *
 from .sd_checkpoint import *
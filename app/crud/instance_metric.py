@@ -0,0 +1,76 @@
+from sqlalchemy import delete
+from sqlmodel import Session, col, select
+
+from app import models
+from framework.crud.base import BaseCRUD, BaseCRUDSync
+
+
+class InstanceMetricCRUDSync(
+    BaseCRUDSync[
+        models.InstanceMetric,
+        models.InstanceMetricCreate,
+        models.InstanceMetricUpdate,
+    ]
+):
+    def get_range(
+        self,
+        db: Session,
+        env_name: str,
+        resolution: models.MetricResolution,
+        start: int,
+        end: int,
+    ) -> list[models.InstanceMetric]:
+        statement = (
+            select(self.model)
+            .where(
+                self.model.env_name == env_name,
+                self.model.resolution == resolution,
+                col(self.model.bucket_start) >= start,
+                col(self.model.bucket_start) <= end,
+            )
+            .order_by(col(self.model.bucket_start))
+        )
+        return list(db.exec(statement).all())
+
+    def remove_older_than(
+        self, db: Session, resolution: models.MetricResolution, before: int
+    ) -> None:
+        statement = delete(self.model).where(
+            col(self.model.resolution) == resolution,
+            col(self.model.bucket_start) < before,
+        )
+        db.exec(statement)  # type: ignore
+        db.commit()
+
+
+class InstanceMetricCRUD(
+    BaseCRUD[
+        models.InstanceMetric,
+        models.InstanceMetricCreate,
+        models.InstanceMetricUpdate,
+    ]
+):
+    """CRUD operations for InstanceMetric."""
+
+    def __init__(self, model: type[models.InstanceMetric]) -> None:
+        super().__init__(model=model, model_crud_sync=InstanceMetricCRUDSync(model=model))
+
+    @property
+    def sync(self) -> InstanceMetricCRUDSync:
+        """Access synchronous operations."""
+        return self._sync  # type: ignore
+
+    async def get_range(
+        self,
+        db: Session,
+        env_name: str,
+        resolution: models.MetricResolution,
+        start: int,
+        end: int,
+    ) -> list[models.InstanceMetric]:
+        return self.sync.get_range(
+            db, env_name=env_name, resolution=resolution, start=start, end=end
+        )
+
+
+instance_metric = InstanceMetricCRUD(model=models.InstanceMetric)
@@ -1,5 +1,61 @@
+from typing import Any
+
+from sqlalchemy import update
+from sqlmodel import Session, col, select
+
 from app import models
-from framework.crud.base import BaseCRUD
+from framework.crud.base import BaseCRUD, BaseCRUDSync
+
+
+class InstanceStateCRUDSync(
+    BaseCRUDSync[
+        models.InstanceState,
+        models.InstanceStateCreate,
+        models.InstanceStateUpdate,
+    ]
+):
+    def get_by_ids(self, db: Session, ids: list[str]) -> dict[str, models.InstanceState]:
+        """Get the instance states of several environments in a single query."""
+        statement = select(self.model).where(col(self.model.id).in_(ids))
+        return {instance_state.id: instance_state for instance_state in db.exec(statement)}
+
+    def get_versions(self, db: Session) -> dict[str, int]:
+        """Get the current version of every instance state."""
+        statement = select(self.model.id, self.model.version)
+        return dict(db.exec(statement).all())
+
+    def apply_changes(
+        self,
+        db: Session,
+        id: str,
+        changes: dict[str, Any],
+        base_version: int | None = None,
+    ) -> int | None:
+        """
+        Update only the changed columns of an instance state and increment its version.
+
+        Args:
+            db: Database session
+            id: Environment name
+            changes: Changed columns and their new values
+            base_version: Only apply if the row is still at this version
+
+        Returns:
+            The new version, or None if the row doesn't exist or is at another version.
+        """
+        statement = (
+            update(self.model)
+            .where(col(self.model.id) == id)
+            .values(**changes, version=col(self.model.version) + 1)
+        )
+        if base_version is not None:
+            statement = statement.where(col(self.model.version) == base_version)
+
+        result = db.exec(statement)  # type: ignore
+        db.commit()
+        if result.rowcount == 0:
+            return None
+        return db.exec(select(self.model.version).where(col(self.model.id) == id)).one()
 
 
 class InstanceStateCRUD(
@@ -11,7 +67,25 @@ class InstanceStateCRUD(
 ):
     """CRUD operations for InstanceState."""
 
-    pass
+    def __init__(self, model: type[models.InstanceState]) -> None:
+        super().__init__(model=model, model_crud_sync=InstanceStateCRUDSync(model=model))
+
+    @property
+    def sync(self) -> InstanceStateCRUDSync:
+        """Access synchronous operations."""
+        return self._sync  # type: ignore
+
+    async def get_by_ids(self, db: Session, ids: list[str]) -> dict[str, models.InstanceState]:
+        return self.sync.get_by_ids(db, ids=ids)
+
+    async def apply_changes(
+        self,
+        db: Session,
+        id: str,
+        changes: dict[str, Any],
+        base_version: int | None = None,
+    ) -> int | None:
+        return self.sync.apply_changes(db, id=id, changes=changes, base_version=base_version)
 
 
 instance_state = InstanceStateCRUD(model=models.InstanceState)
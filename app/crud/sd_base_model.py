@@ -1,9 +1,47 @@
 from pathlib import Path
 
-from sqlmodel import Session
+from sqlmodel import Session, col, select
 
 from app import models
-from framework.crud.base import BaseCRUD
+from framework.crud.base import BaseCRUD, BaseCRUDSync
+
+
+class SDBaseModelCRUDSync(
+    BaseCRUDSync[
+        models.SDBaseModel,
+        models.SDBaseModelCreate,
+        models.SDBaseModelUpdate,
+    ]
+):
+    def get_character_ids_by_base_model(
+        self, db: Session, sd_base_model_ids: list[str] | None = None
+    ) -> dict[str, list[str]]:
+        """Get the character ids of each base model's extra networks in a single query.
+
+        Args:
+            db: Database session
+            sd_base_model_ids: Only include these base models. All if None.
+
+        Returns:
+            Character ids by base model id. Base models without extra networks are omitted.
+        """
+        statement = (
+            select(models.SDExtraNetwork.sd_base_model_id, models.SDExtraNetwork.character_id)
+            .distinct()
+            .order_by(
+                col(models.SDExtraNetwork.sd_base_model_id),
+                col(models.SDExtraNetwork.character_id),
+            )
+        )
+        if sd_base_model_ids is not None:
+            statement = statement.where(
+                col(models.SDExtraNetwork.sd_base_model_id).in_(sd_base_model_ids)
+            )
+
+        character_ids: dict[str, list[str]] = {}
+        for sd_base_model_id, character_id in db.exec(statement):
+            character_ids.setdefault(sd_base_model_id, []).append(character_id)
+        return character_ids
 
 
 class SDBaseModelCRUD(
@@ -15,6 +53,14 @@ class SDBaseModelCRUD(
 ):
     """CRUD operations for SDBaseModel."""
 
+    def __init__(self, model: type[models.SDBaseModel]) -> None:
+        super().__init__(model=model, model_crud_sync=SDBaseModelCRUDSync(model=model))
+
+    @property
+    def sync(self) -> SDBaseModelCRUDSync:
+        """Access synchronous operations."""
+        return self._sync  # type: ignore
+
     async def add_checkpoint(
         self,
         db: Session,
@@ -127,5 +173,10 @@ class SDBaseModelCRUD(
 
         return character_ids
 
+    async def get_character_ids_by_base_model(
+        self, db: Session, sd_base_model_ids: list[str] | None = None
+    ) -> dict[str, list[str]]:
+        return self.sync.get_character_ids_by_base_model(db, sd_base_model_ids=sd_base_model_ids)
+
 
 sd_base_model = SDBaseModelCRUD(model=models.SDBaseModel)
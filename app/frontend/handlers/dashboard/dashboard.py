@@ -8,6 +8,8 @@ from app import crud, logger, models
 from app.logic import state
 from app.logic.config import get_config
 from app.logic.file_management import get_trained_lora_safetensors
+from app.services.app_supervisor import app_supervisor
+from app.services.network_state import network_state_watcher
 from framework.core.db import get_db
 from framework.frontend.deps import get_current_active_user
 from framework.frontend.templates import templates
@@ -42,9 +44,11 @@ async def dashboard_page(
 
     # Fetch instance and network state for dashboard
     instance_state = await state.get_instance_state()
-    network_state = state.get_network_state(db=db)
+    # Cached and kept up to date by the network state watcher
+    network_state = network_state_watcher.get_network_state() or state.get_network_state(db=db)
 
     context["apps"] = apps
+    context["app_status"] = await app_supervisor.get_status_map(apps)
     context["instance_state"] = instance_state
     context["network_state"] = network_state
     context["characters"] = characters or []
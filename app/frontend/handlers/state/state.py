@@ -5,6 +5,7 @@ from fastapi.responses import HTMLResponse
 from sqlmodel import Session
 
 from app.logic import state
+from app.services.network_state import network_state_watcher
 from framework.core.db import get_db
 from framework.frontend.templates import templates
 from framework.frontend.templates.context import get_template_context
@@ -39,7 +40,8 @@ async def network_state_page(
 ) -> HTMLResponse:
     """Serves the network state page."""
 
-    network_state = state.get_network_state(db=db)
+    # Cached and kept up to date by the network state watcher
+    network_state = network_state_watcher.get_network_state() or state.get_network_state(db=db)
     context["network_state"] = network_state
 
     return templates.TemplateResponse(
@@ -9,7 +9,6 @@ from typing import Annotated, Any
 import yaml
 from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request
 from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, Response
-from PIL import Image
 from pydantic import BaseModel, Field
 from sqlmodel import Session
 from starlette.templating import _TemplateResponse
@@ -219,6 +218,9 @@ def _generate_thumbnail(
             )
             return None
 
+        # Deferred: Pillow is only needed once a thumbnail is generated
+        from PIL import Image
+
         img: Image.Image = Image.open(original_image_path)
 
         # Calculate new height to maintain aspect ratio
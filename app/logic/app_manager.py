@@ -18,6 +18,19 @@ class AppManagerApp(BaseModel):
     icon_path: str | None = Field(default=None)
     log_file: str | None = Field(default=None)
 
+    # Supervised apps: `command_run` is started directly as a child process (no shell)
+    # and must stay in the foreground. Takes precedence over `command_start/restart/stop`.
+    command_run: str | None = Field(default=None)
+    cwd: str | None = Field(default=None)
+    env: dict[str, str] = Field(default_factory=dict)
+    auto_restart: bool = Field(default=False)
+    stop_timeout_seconds: float = Field(default=10)
+
+    @property
+    def is_supervised(self) -> bool:
+        """Whether the app is run as a supervised child process."""
+        return bool(self.command_run)
+
     @property
     def is_running(self) -> bool:
         """Check if the application is running on the port."""
@@ -1,12 +1,22 @@
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
 import yaml
 from pydantic import BaseModel
 
-from app import paths
+from app import logger, paths
 from app.logic.app_manager import AppManagerApp
 
 
+class IdleWatcherQueueConfig(BaseModel):
+    name: str
+    gpu_indices: list[int] | None = None  # None watches all GPUs
+
+
 class IdleWatcherConfig(BaseModel):
     idle_timeout_minutes: int = 99
+    queues: list[IdleWatcherQueueConfig] = [IdleWatcherQueueConfig(name="default")]
 
 
 class JobsConfig(BaseModel):
@@ -27,16 +37,91 @@ class Config(BaseModel):
     app_manager: AppManagerConfig
 
 
-def get_config() -> Config:
-    """Get the config."""
-    config_path = paths.RISA_CONFIG_FILE
+class ConfigService:
+    """
+    Caches the parsed config and reloads it only when the file changes (mtime or size)
+    or when a reload is requested, e.g. on SIGHUP. Subscribers are called after every
+    reload with the new config.
+    """
+
+    def __init__(self, config_path: Path) -> None:
+        self.config_path = config_path
+        self._config: Config | None = None
+        self._file_stamp: tuple[int, int] | None = None
+        self._lock = threading.RLock()
+        self._subscribers: list[Callable[[Config], None]] = []
+
+    def subscribe(self, callback: Callable[[Config], None]) -> None:
+        """Registers a callback that is called with the new config after every reload."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Config], None]) -> None:
+        """Removes a previously registered callback."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _get_file_stamp(self) -> tuple[int, int]:
+        try:
+            stat = self.config_path.stat()
+        except FileNotFoundError as e:
+            raise ValueError(f"Risa config file `{self.config_path}` not found") from e
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self) -> Config:
+        """Get the cached config, reloading it first if the file has changed.
+
+        If the changed file cannot be parsed, the error is logged and the previously
+        loaded config is returned.
+        """
+        file_stamp = self._get_file_stamp()
+        with self._lock:
+            if self._config is not None and file_stamp == self._file_stamp:
+                return self._config
+            try:
+                return self.reload()
+            except Exception as e:
+                if self._config is None:
+                    raise
+                logger.error(f"Failed to reload config `{self.config_path}`: {e}")
+                # Don't retry until the file changes again
+                self._file_stamp = file_stamp
+                return self._config
+
+    def reload(self) -> Config:
+        """Read, validate and cache the config file, then notify subscribers."""
+        with self._lock:
+            file_stamp = self._get_file_stamp()
+            with open(self.config_path) as f:
+                config_yaml = yaml.safe_load(f)
+
+            config = Config.model_validate(config_yaml)
+            config.app_manager.post_init()
+
+            self._config = config
+            self._file_stamp = file_stamp
+            logger.debug(f"Loaded config `{self.config_path}`")
+
+            for callback in list(self._subscribers):
+                try:
+                    callback(config)
+                except Exception as e:
+                    logger.error(f"Config subscriber {callback} failed: {e}")
+
+            return config
+
+    def reload_on_signal(self) -> None:
+        """Signal handler (SIGHUP) that reloads the config and logs instead of raising."""
+        logger.info(f"Reloading config `{self.config_path}`")
+        try:
+            self.reload()
+        except Exception as e:
+            logger.error(f"Failed to reload config `{self.config_path}`: {e}")
+
+
+config_service = ConfigService(config_path=paths.RISA_CONFIG_FILE)
 
-    if not config_path.exists():
-        raise ValueError(f"Risa config file `{config_path}` not found")
 
-    with open(config_path) as f:
-        config_yaml = yaml.safe_load(f)
-
-    config = Config.model_validate(config_yaml)
-
-    return config
+def get_config() -> Config:
+    """Get the config."""
+    return config_service.get()
@@ -0,0 +1,150 @@
+"""
+Streaming database export.
+
+The export is written as NDJSON, one record per line, so neither side has to hold the
+whole database in memory. Tables are read in keyset-paginated batches (`id > last_id`),
+relationships are not loaded per row, and `updated_since` limits the export to records
+created or changed since a previous sync.
+
+Every line is an object with a `type`:
+
+    {"type": "meta", "exported_at": ..., "updated_since": ...}
+    {"type": "sd_base_models", "updated_at": ..., "data": {...}}
+    ...
+    {"type": "character_ids_for_sd_base_models", "data": {"<base model id>": [...]}}
+    {"type": "end", "counts": {"sd_base_models": 3, ...}}
+
+A stream without the `end` line was interrupted and should be discarded. Deletions are
+not part of incremental exports; run a full export to pick them up.
+"""
+
+import json
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from typing import Any, Protocol, TypeVar
+
+from sqlalchemy.orm import lazyload
+from sqlmodel import Session, SQLModel, col, select
+
+from app import crud, models
+
+
+EXPORT_BATCH_SIZE = 500
+
+
+class ExportRow(Protocol):
+    """The exported table models: keyset-paginated by `id`, filtered by `updated_at`."""
+
+    id: Any
+    updated_at: datetime
+
+
+ExportModelType = TypeVar("ExportModelType", bound=ExportRow)
+
+
+# Export type -> (table model, read model)
+EXPORT_TABLES: dict[str, tuple[type[ExportRow], type[SQLModel]]] = {
+    "sd_base_models": (models.SDBaseModel, models.SDBaseModelRead),
+    "sd_checkpoints": (models.SDCheckpoint, models.SDCheckpointRead),
+    "sd_extra_networks": (models.SDExtraNetwork, models.SDExtraNetworkRead),
+    "characters": (models.Character, models.CharacterRead),
+}
+
+
+def _to_db_datetime(value: datetime) -> datetime:
+    """
+    Timestamps are stored as naive UTC. A naive value is taken as UTC, like the stored
+    ones, and an aware one is converted to UTC.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def iter_table_batches(
+    db: Session,
+    model: type[ExportModelType],
+    updated_since: datetime | None = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[list[ExportModelType]]:
+    """Yield all rows of a table in batches ordered by id, without loading relationships."""
+    id_column = col(model.id)
+    last_id = None
+    while True:
+        statement = select(model).options(lazyload("*")).order_by(id_column).limit(batch_size)
+        if updated_since is not None:
+            statement = statement.where(col(model.updated_at) >= _to_db_datetime(updated_since))
+        if last_id is not None:
+            statement = statement.where(id_column > last_id)
+
+        rows = list(db.exec(statement).all())
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+        # Only the current batch needs to stay in memory
+        db.expunge_all()
+
+
+def _line(type_: str, **data: Any) -> str:
+    return json.dumps({"type": type_, **data}, default=str) + "\n"
+
+
+def iter_export_ndjson(
+    db: Session,
+    updated_since: datetime | None = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[str]:
+    """
+    Export the database as NDJSON chunks, one chunk per batch.
+
+    Args:
+        db: Database session
+        updated_since: Only export records created or updated at or after this time.
+        batch_size: Number of rows read per query.
+    """
+    yield _line(
+        "meta",
+        exported_at=datetime.now(timezone.utc).isoformat(),
+        updated_since=updated_since.isoformat() if updated_since else None,
+    )
+
+    counts: dict[str, int] = {}
+    # Base models whose character ids changed: updated base models and the base models
+    # of updated extra networks
+    sd_base_model_ids: set[str] = set()
+
+    for type_, (model, read_model) in EXPORT_TABLES.items():
+        counts[type_] = 0
+        for rows in iter_table_batches(
+            db, model, updated_since=updated_since, batch_size=batch_size
+        ):
+            for row in rows:
+                if isinstance(row, models.SDBaseModel):
+                    sd_base_model_ids.add(row.id)
+                elif isinstance(row, models.SDExtraNetwork):
+                    sd_base_model_ids.add(row.sd_base_model_id)
+
+            counts[type_] += len(rows)
+            yield "".join(
+                _line(
+                    type_,
+                    updated_at=row.updated_at,
+                    data=read_model.model_validate(row).model_dump(mode="json"),
+                )
+                for row in rows
+            )
+
+    ids = sorted(sd_base_model_ids)
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start : start + batch_size]
+        character_ids = crud.sd_base_model.sync.get_character_ids_by_base_model(
+            db, sd_base_model_ids=batch_ids
+        )
+        yield _line(
+            "character_ids_for_sd_base_models",
+            data={id: character_ids.get(id, []) for id in batch_ids},
+        )
+
+    yield _line("end", counts=counts)
@@ -3,7 +3,6 @@ from pathlib import Path
 from typing import Any
 
 from pydantic import BaseModel
-from safetensors import safe_open
 
 from app.paths import HUB_MODELS_PATH
 
@@ -87,6 +86,9 @@ class Safetensor(BaseModel):
     @property
     def metadata(self) -> dict[str, Any] | None:
         if self.path and self.path.exists():
+            # Deferred: safetensors pulls in torch for `framework="pt"`
+            from safetensors import safe_open
+
             with safe_open(self.path, framework="pt") as f:
                 metadata = f.metadata()
                 if metadata:
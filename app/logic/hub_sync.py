@@ -0,0 +1,354 @@
+"""
+Content-addressed hub sync.
+
+Each environment can serve a manifest of its hub safetensors and their sha256 (from the
+`.json` sidecars, falling back to `SDExtraNetwork.sha256`). Before pulling files, the
+destination compares the source manifest with its own and only transfers content it
+does not have. Files it already has under another name are hardlinked (or copied).
+
+A file is only moved if it was renamed on the source: the manifest of the source's
+previous sync listed the same content under the old name, and the source no longer has
+that name. Files that only exist on the destination are never moved.
+"""
+
+import json
+import os
+import shutil
+from enum import Enum
+from pathlib import Path
+
+import requests
+from pydantic import BaseModel
+from sqlalchemy import update
+from sqlmodel import Session, col
+
+from app import crud, logger, models, paths, settings
+from app.logic.transfer import ParallelRsync, TransferFile, split_source_spec
+from framework.core.db import get_db_context
+
+
+class HubManifestEntry(BaseModel):
+    path: str  # Relative to the hub path
+    size: int
+    sha256: str
+
+
+class HubManifest(BaseModel):
+    env_name: str
+    hub_path: str
+    entries: list[HubManifestEntry]
+
+
+class HubSyncAction(str, Enum):
+    skip = "skip"  # Destination already has the content at the target path
+    move = "move"  # Destination has the content under a name the source renamed
+    link = "link"  # Destination has the content under another name that is still in use
+    transfer = "transfer"  # Destination lacks the content
+
+
+class HubSyncStep(BaseModel):
+    action: HubSyncAction
+    path: str  # Relative to the transfer base
+    size: int
+    sha256: str | None = None
+    local_source: str | None = None  # Existing destination file for `move`/`link`
+
+
+class HubSyncPlan(BaseModel):
+    steps: list[HubSyncStep]
+
+    @property
+    def transfer_files(self) -> list[TransferFile]:
+        return [
+            TransferFile(path=step.path, size=step.size)
+            for step in self.steps
+            if step.action == HubSyncAction.transfer
+        ]
+
+    @property
+    def bytes_saved(self) -> int:
+        return sum(step.size for step in self.steps if step.action != HubSyncAction.transfer)
+
+
+def _read_sidecar_sha256(safetensor_path: Path) -> str | None:
+    json_path = safetensor_path.with_suffix(".json")
+    if not json_path.exists():
+        return None
+    try:
+        with open(json_path) as f:
+            sha256 = json.load(f).get("sha256")
+    except (OSError, ValueError):
+        return None
+    return sha256.upper() if sha256 else None
+
+
+def build_hub_manifest(db: Session) -> HubManifest:
+    """Build the manifest of all hub safetensors with a known sha256.
+
+    Hashes are read from the `.json` sidecars or the extra networks table; missing
+    hashes are not computed here because hashing multi-GB files is too slow for a request.
+    """
+    hub_path = paths.HUB_PATH
+    db_sha256_by_path = {
+        extra_network.hub_file_path: extra_network.sha256.upper()
+        for extra_network in crud.sd_extra_network.sync.get_multi(db)
+        if extra_network.hub_file_path and extra_network.sha256
+    }
+
+    entries = []
+    for safetensor_path in hub_path.rglob("*.safetensors"):
+        sha256 = _read_sidecar_sha256(safetensor_path) or db_sha256_by_path.get(
+            str(safetensor_path)
+        )
+        if not sha256:
+            continue
+        entries.append(
+            HubManifestEntry(
+                path=str(safetensor_path.relative_to(hub_path)),
+                size=safetensor_path.stat().st_size,
+                sha256=sha256,
+            )
+        )
+
+    return HubManifest(env_name=settings.ENV_NAME, hub_path=str(hub_path), entries=entries)
+
+
+def fetch_hub_manifest(env_name: str) -> HubManifest:
+    """Fetch the hub manifest of another environment through its API."""
+    with get_db_context() as db:
+        env_state = crud.instance_state.sync.get(db, id=env_name)
+    if not env_state:
+        raise ValueError(f"Environment {env_name} not found")
+
+    response = requests.get(
+        f"{env_state.base_url}{settings.API_V1_PREFIX}/hub/manifest",
+        headers={"X-API-Key": settings.EXPORT_API_KEY},
+        timeout=30,
+    )
+    response.raise_for_status()
+    return HubManifest.model_validate(response.json())
+
+
+def _get_source_manifest_path(env_name: str) -> Path:
+    return paths.CACHE_PATH / "hub_sync" / f"{env_name}.json"
+
+
+def load_previous_source_manifest(env_name: str) -> HubManifest | None:
+    """Load the manifest of the source at its previous sync, if any."""
+    manifest_path = _get_source_manifest_path(env_name)
+    if not manifest_path.exists():
+        return None
+    try:
+        return HubManifest.model_validate_json(manifest_path.read_text())
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read the previous hub manifest of `{env_name}`: {e}")
+        return None
+
+
+def save_source_manifest(manifest: HubManifest) -> None:
+    """Keep the manifest of the source, it's the rename evidence of its next sync."""
+    manifest_path = _get_source_manifest_path(manifest.env_name)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(manifest.model_dump_json())
+
+
+def _relative_to(path: Path, base: Path) -> str | None:
+    try:
+        return str(path.relative_to(base))
+    except ValueError:
+        return None
+
+
+def plan_hub_sync(
+    files: list[TransferFile],
+    source_base: str,
+    source_manifest: HubManifest,
+    destination_base: Path,
+    destination_manifest: HubManifest,
+    overwrite: bool = True,
+    previous_source_manifest: HubManifest | None = None,
+) -> HubSyncPlan:
+    """Plan how to bring `files` from the source to the destination.
+
+    Args:
+        files: Files to sync, relative to `source_base` and `destination_base`.
+        source_base: Absolute path on the source that `files` are relative to.
+        source_manifest: Hub manifest of the source.
+        destination_base: Absolute local path the files are synced to.
+        destination_manifest: Hub manifest of the destination (this environment).
+        overwrite: Replace existing destination files with different content. If False,
+            such files are left to rsync (e.g. with `--ignore-existing`).
+        previous_source_manifest: Hub manifest of the source at the previous sync. Without
+            it, nothing is moved.
+
+    Returns:
+        One step per file.
+    """
+    source_hub = Path(source_manifest.hub_path)
+    destination_hub = Path(destination_manifest.hub_path)
+    source_paths = {entry.path for entry in source_manifest.entries}
+    previous_source_entries = {
+        (entry.path, entry.sha256)
+        for entry in (previous_source_manifest.entries if previous_source_manifest else [])
+    }
+    source_sha256_by_path = {
+        str(source_hub / entry.path): entry.sha256 for entry in source_manifest.entries
+    }
+    destination_sha256_by_path = {e.path: e.sha256 for e in destination_manifest.entries}
+    destination_paths_by_sha256: dict[str, list[str]] = {}
+    for entry in destination_manifest.entries:
+        destination_paths_by_sha256.setdefault(entry.sha256, []).append(entry.path)
+
+    steps = []
+    for file in files:
+        sha256 = source_sha256_by_path.get(os.path.normpath(Path(source_base) / file.path))
+        target = destination_base / file.path
+        target_hub_path = _relative_to(target, destination_hub)
+
+        if sha256 is None:
+            steps.append(HubSyncStep(action=HubSyncAction.transfer, path=file.path, size=file.size))
+            continue
+
+        if target_hub_path and destination_sha256_by_path.get(target_hub_path) == sha256:
+            steps.append(
+                HubSyncStep(
+                    action=HubSyncAction.skip, path=file.path, size=file.size, sha256=sha256
+                )
+            )
+            continue
+
+        candidates = [
+            path
+            for path in destination_paths_by_sha256.get(sha256, [])
+            if path != target_hub_path and (destination_hub / path).exists()
+        ]
+        if not candidates or (target.exists() and not overwrite):
+            steps.append(
+                HubSyncStep(
+                    action=HubSyncAction.transfer, path=file.path, size=file.size, sha256=sha256
+                )
+            )
+            continue
+
+        # The source had this content under the copy's name and no longer has that name:
+        # it was renamed there, move the copy. Otherwise keep the copy where it is
+        renamed = next(
+            (
+                path
+                for path in candidates
+                if (path, sha256) in previous_source_entries and path not in source_paths
+            ),
+            None,
+        )
+        action = HubSyncAction.move if renamed else HubSyncAction.link
+        local_source = renamed or candidates[0]
+        steps.append(
+            HubSyncStep(
+                action=action,
+                path=file.path,
+                size=file.size,
+                sha256=sha256,
+                local_source=str(destination_hub / local_source),
+            )
+        )
+
+        # Later files with the same content can link to the new location
+        if renamed:
+            destination_paths_by_sha256[sha256].remove(renamed)
+        if target_hub_path:
+            destination_paths_by_sha256[sha256].append(target_hub_path)
+
+    return HubSyncPlan(steps=steps)
+
+
+def apply_hub_sync_plan(plan: HubSyncPlan, destination_base: Path) -> None:
+    """Perform the local `move` and `link` steps of a plan.
+
+    Hardlinks fall back to a copy if the files are on different filesystems.
+    """
+    for step in plan.steps:
+        if step.action not in (HubSyncAction.move, HubSyncAction.link) or not step.local_source:
+            continue
+
+        source = Path(step.local_source)
+        target = destination_base / step.path
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        if step.action == HubSyncAction.move:
+            logger.info(f"Hub sync: moving `{source}` to `{target}`")
+            os.replace(source, target)
+            continue
+
+        logger.info(f"Hub sync: linking `{source}` to `{target}`")
+        tmp_target = target.with_name(f".{target.name}.risa_link")
+        try:
+            os.link(source, tmp_target)
+        except OSError:
+            shutil.copy2(source, tmp_target)
+        os.replace(tmp_target, target)
+
+
+def update_moved_hub_file_paths(db: Session, plan: HubSyncPlan, destination_base: Path) -> None:
+    """Point the extra networks of the moved files to their new paths."""
+    for step in plan.steps:
+        if step.action != HubSyncAction.move or not step.local_source:
+            continue
+        statement = (
+            update(models.SDExtraNetwork)
+            .where(col(models.SDExtraNetwork.hub_file_path) == step.local_source)
+            .values(hub_file_path=str(destination_base / step.path))
+        )
+        db.exec(statement)  # type: ignore
+    db.commit()
+
+
+def dedup_transfer(
+    transfer: ParallelRsync,
+    source_env: str,
+    destination_location: str,
+    overwrite: bool = True,
+) -> HubSyncPlan | None:
+    """
+    Reduce a pull to the content this environment lacks.
+
+    Lists the transfer's files, plans against both hub manifests, applies the local
+    moves/links and restricts the transfer to the remaining files. The source manifest is
+    kept as the rename evidence of the next sync.
+
+    Returns:
+        The plan, or None if the manifests are not available (the transfer is unchanged).
+    """
+    try:
+        source_manifest = fetch_hub_manifest(source_env)
+    except Exception as e:
+        logger.warning(f"Could not fetch hub manifest of `{source_env}`: {e}. Not deduplicating.")
+        return None
+
+    with get_db_context() as db:
+        destination_manifest = build_hub_manifest(db)
+
+    source_base, _ = split_source_spec(transfer.source_spec)
+    source_base = source_base.split(":", 1)[-1]  # Strip `user@host:`
+    destination_base = Path(destination_location)
+    files = transfer.list_files()
+
+    plan = plan_hub_sync(
+        files=files,
+        source_base=source_base,
+        source_manifest=source_manifest,
+        destination_base=destination_base,
+        destination_manifest=destination_manifest,
+        overwrite=overwrite,
+        previous_source_manifest=load_previous_source_manifest(source_env),
+    )
+    apply_hub_sync_plan(plan, destination_base=destination_base)
+    with get_db_context() as db:
+        update_moved_hub_file_paths(db, plan, destination_base=destination_base)
+    save_source_manifest(source_manifest)
+    transfer.files = plan.transfer_files
+
+    logger.info(
+        f"Hub sync: {len(transfer.files)}/{len(files)} files need to be transferred, "
+        f"{plan.bytes_saved} bytes are already available locally."
+    )
+    return plan
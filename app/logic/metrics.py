@@ -0,0 +1,216 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import Session
+
+from app import crud, logger, models, settings
+from app.models.core.metrics import MetricResolution
+from framework.core.db import get_db_context
+from framework.services.system_metrics import SystemMetricsSample
+
+
+METRIC_NAMES = ["gpu_usage", "gpu_memory_used", "cpu_usage", "disk_usage"]
+
+RESOLUTION_SECONDS = {
+    MetricResolution.minute: 60,
+    MetricResolution.hour: 60 * 60,
+}
+
+# Ranges up to this length are served from 1-min buckets, longer ranges from 1-h buckets
+MINUTE_RESOLUTION_MAX_RANGE = timedelta(hours=6)
+
+PRUNE_INTERVAL_SECONDS = 60 * 60
+
+
+def _bucket_start(timestamp: float, resolution: MetricResolution) -> int:
+    seconds = RESOLUTION_SECONDS[resolution]
+    return int(timestamp // seconds * seconds)
+
+
+class MetricBucket:
+    """Running count/sum/max for each metric within one bucket."""
+
+    def __init__(self, bucket_start: int) -> None:
+        self.bucket_start = bucket_start
+        self.sample_count = 0
+        self.counts: dict[str, int] = dict.fromkeys(METRIC_NAMES, 0)
+        self.sums: dict[str, float] = dict.fromkeys(METRIC_NAMES, 0.0)
+        self.maxes: dict[str, float | None] = dict.fromkeys(METRIC_NAMES)
+
+    def add(self, sample: SystemMetricsSample) -> None:
+        self.sample_count += 1
+        for name in METRIC_NAMES:
+            value = getattr(sample, name)
+            if value is None:
+                continue
+            self.counts[name] += 1
+            self.sums[name] += value
+            current_max = self.maxes[name]
+            self.maxes[name] = value if current_max is None else max(current_max, value)
+
+    def average(self, name: str) -> float | None:
+        if not self.counts[name]:
+            return None
+        return self.sums[name] / self.counts[name]
+
+
+def _merge_bucket_into_db(
+    db: Session,
+    env_name: str,
+    resolution: MetricResolution,
+    bucket: MetricBucket,
+) -> None:
+    """Upsert a bucket, weighting averages by sample count if the row already exists."""
+    bucket_start = _bucket_start(bucket.bucket_start, resolution)
+    db_metric = crud.instance_metric.sync.get_or_none(
+        db, env_name=env_name, resolution=resolution, bucket_start=bucket_start
+    )
+
+    if not db_metric:
+        values: dict[str, float | None] = {"sample_count": bucket.sample_count}
+        for name in METRIC_NAMES:
+            values[f"{name}_avg"] = bucket.average(name)
+            values[f"{name}_max"] = bucket.maxes[name]
+        crud.instance_metric.sync.create(
+            db,
+            obj_in=models.InstanceMetricCreate(
+                env_name=env_name, resolution=resolution, bucket_start=bucket_start, **values
+            ),
+        )
+        return
+
+    existing_count = db_metric.sample_count
+    values = {"sample_count": existing_count + bucket.sample_count}
+    for name in METRIC_NAMES:
+        existing_avg = getattr(db_metric, f"{name}_avg")
+        existing_max = getattr(db_metric, f"{name}_max")
+        new_avg = bucket.average(name)
+        new_max = bucket.maxes[name]
+
+        if existing_avg is None or new_avg is None:
+            values[f"{name}_avg"] = new_avg if existing_avg is None else existing_avg
+        else:
+            values[f"{name}_avg"] = (
+                existing_avg * existing_count + new_avg * bucket.sample_count
+            ) / (existing_count + bucket.sample_count)
+
+        if existing_max is None or new_max is None:
+            values[f"{name}_max"] = new_max if existing_max is None else existing_max
+        else:
+            values[f"{name}_max"] = max(existing_max, new_max)
+
+    crud.instance_metric.sync.update(
+        db, db_obj=db_metric, obj_in=models.InstanceMetricUpdate(**values)
+    )
+
+
+def prune_metrics(db: Session) -> None:
+    """Delete buckets that are older than their resolution's retention."""
+    now = datetime.now(tz=timezone.utc)
+    retention = {
+        MetricResolution.minute: timedelta(hours=settings.METRICS_MINUTE_RETENTION_HOURS),
+        MetricResolution.hour: timedelta(days=settings.METRICS_HOUR_RETENTION_DAYS),
+    }
+    for resolution, keep_for in retention.items():
+        crud.instance_metric.sync.remove_older_than(
+            db, resolution=resolution, before=int((now - keep_for).timestamp())
+        )
+
+
+class MetricsRollup:
+    """
+    Downsamples raw system metrics samples into 1-min and 1-h buckets.
+
+    Raw samples only live in the sampler's ring buffer. Once a minute is complete its
+    bucket is written to the 1-min table and merged into the matching 1-h bucket.
+    """
+
+    def __init__(self, env_name: str) -> None:
+        self.env_name = env_name
+        self._bucket: MetricBucket | None = None
+        self._lock = threading.Lock()
+        self._last_pruned: float = 0
+
+    def add_sample(self, sample: SystemMetricsSample) -> None:
+        """Add a raw sample, flushing the previous minute if the sample starts a new one."""
+        bucket_start = _bucket_start(sample.sampled_at.timestamp(), MetricResolution.minute)
+        with self._lock:
+            if self._bucket and self._bucket.bucket_start != bucket_start:
+                self._flush_locked()
+            if self._bucket is None:
+                self._bucket = MetricBucket(bucket_start=bucket_start)
+            self._bucket.add(sample)
+
+    def flush(self) -> None:
+        """Write the current (possibly partial) minute to the store."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        bucket = self._bucket
+        self._bucket = None
+        if not bucket or not bucket.sample_count:
+            return
+
+        try:
+            with get_db_context() as db:
+                for resolution in RESOLUTION_SECONDS:
+                    _merge_bucket_into_db(db, self.env_name, resolution, bucket)
+
+                if time.time() - self._last_pruned >= PRUNE_INTERVAL_SECONDS:
+                    prune_metrics(db)
+                    self._last_pruned = time.time()
+        except Exception as e:
+            logger.error(f"Failed to flush metrics bucket {bucket.bucket_start}: {e}")
+
+
+async def get_metrics_chart_data(
+    db: Session,
+    env_name: str,
+    start: datetime,
+    end: datetime,
+    resolution: MetricResolution | None = None,
+) -> models.MetricsChartData:
+    """Get chart data for a time range, reading only pre-aggregated buckets.
+
+    Args:
+        db: Database session
+        env_name: Environment to get the metrics for
+        start: Start of the range
+        end: End of the range
+        resolution: Bucket resolution. Chosen from the range length if not given.
+
+    Returns:
+        Timestamps and one series per metric average/maximum.
+    """
+    if resolution is None:
+        resolution = (
+            MetricResolution.minute
+            if end - start <= MINUTE_RESOLUTION_MAX_RANGE
+            else MetricResolution.hour
+        )
+
+    db_metrics = await crud.instance_metric.get_range(
+        db,
+        env_name=env_name,
+        resolution=resolution,
+        start=_bucket_start(start.timestamp(), resolution),
+        end=int(end.timestamp()),
+    )
+
+    series: dict[str, list[float | None]] = {}
+    for name in METRIC_NAMES:
+        series[f"{name}_avg"] = [getattr(m, f"{name}_avg") for m in db_metrics]
+        series[f"{name}_max"] = [getattr(m, f"{name}_max") for m in db_metrics]
+
+    return models.MetricsChartData(
+        env_name=env_name,
+        resolution=resolution,
+        timestamps=[m.bucket_start for m in db_metrics],
+        series=series,
+    )
+
+
+# Singleton rollup for this instance
+metrics_rollup = MetricsRollup(env_name=settings.ENV_NAME)
@@ -34,26 +34,56 @@ def convert_risa_rsync_options_to_text(
     return f"Job on r|{env_name.upper()} to {action.upper()} [{source_env}]`{source_location}` to [{destination_env}]`{destination_location}`"  # noqa: E501
 
 
-def generate_rsync_command_job(
+# Extensions of already-compressed data (or data that barely compresses, like fp16
+# weights). Compressing them only costs CPU on both ends.
+INCOMPRESSIBLE_EXTENSIONS = [
+    "safetensors",
+    "ckpt",
+    "pt",
+    "pth",
+    "bin",
+    "gguf",
+    "onnx",
+    "png",
+    "jpg",
+    "jpeg",
+    "webp",
+    "gif",
+    "mp4",
+    "webm",
+    "mkv",
+    "zip",
+    "gz",
+    "tgz",
+    "bz2",
+    "xz",
+    "zst",
+    "7z",
+    "rar",
+]
+SKIP_COMPRESS = "/".join(INCOMPRESSIBLE_EXTENSIONS)
+
+
+def get_rsync_transport(
     job_env: str,
     source_env: str,
     source_location: str,
     destination_env: str,
     destination_location: str,
-    option_u: bool = False,
-    option_ignore_existing: bool = False,
-    option_recursive: bool = False,
-) -> str:
+) -> tuple[str, str, str]:
     """
-    Generate a rsync command job.
-
-    rsync -e "ssh -i ~/.ssh/id_risa_dev -p 40196  -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null" -tvzP -r -u root@213.192.2.73:/workspace/__OUTPUTS__/risa/ /media/martokk/FILES/AI/__INBOX__/risa/
-
-    ---
-    Generate keys: `ssh-keygen -t ed25519 -f ~/.ssh/id_risa_dev -C "risa@dev"`
+    Get the ssh command and the rsync source/destination specs for a transfer.
 
-    """  # noqa: E501
+    Args:
+        job_env: The environment the job runs on.
+        source_env: The source environment.
+        source_location: The source location.
+        destination_env: The destination environment.
+        destination_location: The destination location.
 
+    Returns:
+        The ssh command for `rsync -e`, the source spec and the destination spec.
+    """
     action = "push" if source_env == job_env else "pull"
 
     # Lookup the environment state from the database.
@@ -84,9 +114,50 @@ def generate_rsync_command_job(
     # Determine the ssh key path to use for the rsync command.
     ssh_key_path = f"{ssh_dir_path}/id_risa_{job_env.lower()}"
 
-    # Start building the command.
     ssh_command = f"ssh -i {ssh_key_path} {'-p ' + str(port) if port else ''} -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null"  # noqa: E501
-    command = f'rsync -e "{ssh_command}" -tvzP'
+
+    if action == "push":
+        if destination_env == "local":
+            raise ValueError(
+                "Destination environment cannot be 'local' when pushing. A remote server can not connect to 'http://localhost' to push to."  # noqa: E501
+            )
+        return ssh_command, source_location, f"{_user_at_remote}:{destination_location}"
+
+    if source_env == "local":
+        raise ValueError(
+            "Source environment cannot be 'local' when pulling. A remote server can not connect to 'http://localhost' to pull from."  # noqa: E501
+        )
+    return ssh_command, f"{_user_at_remote}:{source_location}", destination_location
+
+
+def generate_rsync_command_job(
+    job_env: str,
+    source_env: str,
+    source_location: str,
+    destination_env: str,
+    destination_location: str,
+    option_u: bool = False,
+    option_ignore_existing: bool = False,
+    option_recursive: bool = False,
+) -> str:
+    """
+    Generate a rsync command job.
+
+    rsync -e "ssh -i ~/.ssh/id_risa_dev -p 40196  -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null" -tvzP -r -u root@213.192.2.73:/workspace/__OUTPUTS__/risa/ /media/martokk/FILES/AI/__INBOX__/risa/
+
+    ---
+    Generate keys: `ssh-keygen -t ed25519 -f ~/.ssh/id_risa_dev -C "risa@dev"`
+
+    """  # noqa: E501
+
+    ssh_command, source_spec, destination_spec = get_rsync_transport(
+        job_env=job_env,
+        source_env=source_env,
+        source_location=source_location,
+        destination_env=destination_env,
+        destination_location=destination_location,
+    )
+    command = f'rsync -e "{ssh_command}" -tvzP --skip-compress={SKIP_COMPRESS}'
 
     # Add the options to the command.
     if option_recursive:
@@ -97,18 +168,7 @@ def generate_rsync_command_job(
         command += " --ignore-existing"
 
     # Add the source and destination to the command.
-    if action == "push":
-        if destination_env == "local":
-            raise ValueError(
-                "Destination environment cannot be 'local' when pushing. A remote server can not connect to 'http://localhost' to push to."  # noqa: E501
-            )
-        command += f" {source_location} {_user_at_remote}:{destination_location}"
-    else:
-        if source_env == "local":
-            raise ValueError(
-                "Source environment cannot be 'local' when pulling. A remote server can not connect to 'http://localhost' to pull from."  # noqa: E501
-            )
-        command += f" {_user_at_remote}:{source_location} {destination_location}"
+    command += f" {source_spec} {destination_spec}"
 
     logger.debug(f"command: {command}")
     return command
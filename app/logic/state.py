@@ -1,5 +1,8 @@
+import asyncio
 from datetime import datetime, timezone
+from typing import Any
 
+from pydantic import TypeAdapter
 from sqlmodel import Session
 
 from app import crud, models, settings
@@ -9,9 +12,16 @@ from app.logic.runpod import (
     get_runpod_public_ip,
     get_runpod_tcp_port_22,
 )
-from app.models.core.state import InstanceState, NetworkState
+from app.models.core.state import InstanceState, InstanceStateDelta, NetworkState
 from framework.core.db import get_db_context
-from framework.utils.system_status import get_cpu_stats, get_disk_stats, get_gpu_stats
+from framework.crud.exceptions import RecordNotFoundError
+from framework.services.system_metrics import system_metrics_sampler
+
+
+NETWORK_ENV_NAMES = ["dev", "local", "playground", "host"]
+
+# Not replicated as changes: `id` identifies the row and `version` is set by the database
+UNVERSIONED_FIELDS = {"id", "version"}
 
 
 async def _get_instance_state() -> InstanceState:
@@ -24,19 +34,18 @@ async def _get_instance_state() -> InstanceState:
     # Theme
     accent = settings.ACCENT
 
-    # System Status
-    gpu_stats = get_gpu_stats()
-    gpu_usage = gpu_stats["gpu_usage"]
-    gpu_memory_used = gpu_stats["gpu_memory_used"]
+    # System Status (cached by the background sampler)
+    metrics = system_metrics_sampler.get_latest()
+    if metrics is None:
+        metrics = await asyncio.to_thread(system_metrics_sampler.sample)
 
-    cpu_stats = get_cpu_stats()
-    cpu_usage = cpu_stats["cpu_usage"]
-
-    disk_stats = get_disk_stats()
-    total_disk_space = disk_stats["total_disk_space"]
-    used_disk_space = disk_stats["used_disk_space"]
-    free_disk_space = disk_stats["free_disk_space"]
-    disk_usage = disk_stats["disk_usage"]
+    gpu_usage = metrics.gpu_usage
+    gpu_memory_used = metrics.gpu_memory_used
+    cpu_usage = metrics.cpu_usage
+    total_disk_space = metrics.total_disk_space
+    used_disk_space = metrics.used_disk_space
+    free_disk_space = metrics.free_disk_space
+    disk_usage = metrics.disk_usage
 
     # Runpod
     runpod_gpu_name = get_runpod_gpu_name()
@@ -89,23 +98,91 @@ async def _get_instance_state() -> InstanceState:
 #         logger.error(f"Failed to post the instance state to the host api: {e}")
 
 
-async def save_instance_state_to_db(db: Session, instance_state: InstanceState) -> None:
+def _normalize(value: Any) -> Any:
+    # Timestamps are stored as naive UTC
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def diff_instance_state(old: InstanceState, new: InstanceState) -> dict[str, Any]:
+    """Get the fields of `new` that differ from `old`."""
+    old_values = old.model_dump(exclude=UNVERSIONED_FIELDS)
+    new_values = new.model_dump(exclude=UNVERSIONED_FIELDS)
+    return {
+        field: value
+        for field, value in new_values.items()
+        if _normalize(value) != _normalize(old_values.get(field))
+    }
+
+
+async def save_instance_state_to_db(
+    db: Session, instance_state: InstanceState
+) -> InstanceStateDelta | None:
+    """Save an instance state, writing only the fields that changed.
+
+    Returns:
+        The applied changes, or None if nothing changed.
+    """
     instance_state = models.InstanceState.model_validate(instance_state)
-    db_instance_state = await crud.instance_state.get(db, id=instance_state.id)
-    if db_instance_state:
-        await crud.instance_state.update(
-            db,
-            db_obj=db_instance_state,
-            obj_in=models.InstanceStateUpdate.model_validate(instance_state),
-        )
-    else:
+    db_instance_state = await crud.instance_state.get_or_none(db, id=instance_state.id)
+    if not db_instance_state:
+        instance_state.version = 1
         await crud.instance_state.create(
             db, obj_in=models.InstanceStateCreate.model_validate(instance_state)
         )
+        return InstanceStateDelta(
+            id=instance_state.id,
+            base_version=0,
+            version=1,
+            changes=instance_state.model_dump(exclude=UNVERSIONED_FIELDS),
+        )
+
+    changes = diff_instance_state(db_instance_state, instance_state)
+    if not changes:
+        return None
+    return await apply_instance_state_delta(
+        db,
+        InstanceStateDelta(
+            id=instance_state.id, base_version=db_instance_state.version, changes=changes
+        ),
+    )
+
+
+def _parse_field_value(field: str, value: Any) -> Any:
+    # Values received as JSON (e.g. timestamps) are parsed into their column types
+    annotation = models.InstanceStateBase.model_fields[field].annotation
+    if annotation is None:
+        return value
+    return TypeAdapter(annotation).validate_python(value)
+
+
+async def apply_instance_state_delta(
+    db: Session, delta: InstanceStateDelta
+) -> InstanceStateDelta | None:
+    """Apply changes received from another environment.
+
+    Returns:
+        The delta with its new version, or None if the stored state is not at
+        `delta.base_version` and the sender has to send its full state.
+    """
+    fields = models.InstanceStateBase.model_fields
+    changes = {
+        field: _parse_field_value(field, value)
+        for field, value in delta.changes.items()
+        if field in fields and field not in UNVERSIONED_FIELDS
+    }
+    version = await crud.instance_state.apply_changes(
+        db, id=delta.id, changes=changes, base_version=delta.base_version
+    )
+    if version is None:
+        return None
+    return delta.model_copy(update={"version": version, "changes": changes})
 
 
 async def get_instance_state() -> InstanceState:
-    return await update_instance_state()
+    """Get this instance's state from the cached metrics, without writing to the DB."""
+    return await _get_instance_state()
 
 
 async def update_instance_state() -> InstanceState:
@@ -116,20 +193,23 @@ async def update_instance_state() -> InstanceState:
     return instance_state
 
 
-def get_network_state(db: Session) -> NetworkState:
-    dev = crud.instance_state.sync.get(db, id="dev")
-    local = crud.instance_state.sync.get(db, id="local")
-    playground = crud.instance_state.sync.get(db, id="playground")
-    host = crud.instance_state.sync.get(db, id="host")
+def network_state_from_instance_states(
+    instance_states: dict[str, InstanceState],
+) -> NetworkState:
+    missing = [env_name for env_name in NETWORK_ENV_NAMES if env_name not in instance_states]
+    if missing:
+        raise RecordNotFoundError(f"InstanceState({missing=}) not found in database")
     return NetworkState(
         last_updated=datetime.now(tz=timezone.utc),
-        dev=dev,
-        local=local,
-        playground=playground,
-        host=host,
+        **{env_name: instance_states[env_name] for env_name in NETWORK_ENV_NAMES},
     )
 
 
+def get_network_state(db: Session) -> NetworkState:
+    instance_states = crud.instance_state.sync.get_by_ids(db, ids=NETWORK_ENV_NAMES)
+    return network_state_from_instance_states(instance_states)
+
+
 # async def get_network_state_from_host() -> NetworkState | None:
 #     try:
 #         async with httpx.AsyncClient() as client:
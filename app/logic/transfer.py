@@ -0,0 +1,317 @@
+"""
+Parallel, resumable rsync transfers.
+
+The source file list is split across N rsync streams balanced by size. Each stream runs
+with `--partial` so interrupted files resume, compression is skipped for incompressible
+extensions, and `--info=progress2` output is parsed into structured progress events.
+"""
+
+import json
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from app import logger
+from app.logic.rsync import SKIP_COMPRESS
+
+
+# `-rw-r--r--      1,234,567 2024/05/06 10:11:12 path/to/file`
+LIST_ONLY_PATTERN = re.compile(r"^(\S+)\s+([\d,]+)\s+\S+\s+\S+\s+(.+)$")
+
+# `    1,234,567  12%   10.50MB/s    0:01:23 (xfr#1, to-chk=3/5)`
+PROGRESS2_PATTERN = re.compile(r"^\s*([\d,]+)\s+(\d+)%")
+
+
+class TransferFile(BaseModel):
+    path: str  # Relative to the source base
+    size: int
+
+
+class TransferStreamResult(BaseModel):
+    stream: int
+    files: int
+    total_bytes: int
+    return_code: int
+    stderr: str = ""
+
+
+class TransferResult(BaseModel):
+    success: bool
+    files: int
+    total_bytes: int
+    bytes_transferred: int
+    elapsed_seconds: float
+    streams: list[TransferStreamResult]
+
+    @property
+    def throughput_bytes_per_second(self) -> float:
+        return self.bytes_transferred / self.elapsed_seconds if self.elapsed_seconds else 0
+
+
+def split_source_spec(source_spec: str) -> tuple[str, str]:
+    """
+    Split a source spec into the base directory that `--files-from` paths are relative
+    to, and the name prefix rsync uses for entries when listing the spec.
+
+    `dir/` lists entries relative to `dir/`; `dir` and `file` list entries relative to
+    their parent, the same as a normal rsync transfer.
+    """
+    if source_spec.endswith("/"):
+        return source_spec, ""
+    host, sep, path = source_spec.rpartition(":") if ":" in source_spec else ("", "", source_spec)
+    parent = str(Path(path).parent)
+    return f"{host}{sep}{parent}/", Path(path).name
+
+
+def parse_list_only_output(output: str) -> list[TransferFile]:
+    """Parse `rsync --list-only` output into the regular files it lists."""
+    files = []
+    for line in output.splitlines():
+        match = LIST_ONLY_PATTERN.match(line)
+        if not match:
+            continue
+        permissions, size, path = match.groups()
+        if not permissions.startswith("-"):
+            continue  # Directories, symlinks and devices
+        files.append(TransferFile(path=path, size=int(size.replace(",", ""))))
+    return files
+
+
+def parse_progress2_line(line: str) -> int | None:
+    """Parse the bytes transferred so far from an `--info=progress2` line."""
+    match = PROGRESS2_PATTERN.match(line)
+    if not match:
+        return None
+    return int(match.group(1).replace(",", ""))
+
+
+def split_files(files: list[TransferFile], streams: int) -> list[list[TransferFile]]:
+    """Split files into at most `streams` buckets of similar total size (largest first)."""
+    streams = max(1, min(streams, len(files)))
+    buckets: list[list[TransferFile]] = [[] for _ in range(streams)]
+    bucket_sizes = [0] * streams
+    for file in sorted(files, key=lambda f: f.size, reverse=True):
+        index = bucket_sizes.index(min(bucket_sizes))
+        buckets[index].append(file)
+        bucket_sizes[index] += file.size
+    return [bucket for bucket in buckets if bucket]
+
+
+class ParallelRsync:
+    """
+    Transfers files with several rsync processes at once.
+
+    Args:
+        ssh_command: Remote shell command passed to `rsync -e`.
+        source_spec: Source, e.g. `/path/dir/` or `user@host:/path/file`.
+        destination_spec: Destination directory.
+        streams: Maximum number of parallel rsync processes.
+        recursive: Include files in subdirectories of the source.
+        option_u: Skip files that are newer on the destination.
+        option_ignore_existing: Skip files that already exist on the destination.
+        compress: Compress files whose extension is not known to be incompressible.
+        on_event: Called with every progress event (a JSON-serializable dict).
+        progress_interval: Seconds between progress events.
+        files: Files to transfer, relative to the source base. Listed from the source
+            if not given.
+    """
+
+    def __init__(
+        self,
+        ssh_command: str,
+        source_spec: str,
+        destination_spec: str,
+        streams: int = 4,
+        recursive: bool = False,
+        option_u: bool = False,
+        option_ignore_existing: bool = False,
+        compress: bool = True,
+        on_event: Callable[[dict[str, Any]], None] | None = None,
+        progress_interval: float = 1,
+        files: list[TransferFile] | None = None,
+    ) -> None:
+        self.ssh_command = ssh_command
+        self.source_spec = source_spec
+        self.destination_spec = destination_spec
+        self.streams = streams
+        self.recursive = recursive
+        self.option_u = option_u
+        self.option_ignore_existing = option_ignore_existing
+        self.compress = compress
+        self.on_event = on_event
+        self.progress_interval = progress_interval
+        self.files = files
+
+    def _emit(self, event: str, **data: Any) -> None:
+        payload = {"event": event, "timestamp": time.time(), **data}
+        logger.debug(f"Transfer event: {json.dumps(payload)}")
+        if self.on_event:
+            try:
+                self.on_event(payload)
+            except Exception as e:
+                logger.error(f"Transfer event handler failed: {e}")
+
+    def _base_args(self) -> list[str]:
+        args = ["rsync", "-e", self.ssh_command, "-t", "--partial"]
+        if self.compress:
+            args += ["-z", f"--skip-compress={SKIP_COMPRESS}"]
+        if self.option_u:
+            args.append("-u")
+        elif self.option_ignore_existing:
+            args.append("--ignore-existing")
+        return args
+
+    def list_files(self) -> list[TransferFile]:
+        """List the regular files of the source, relative to the source base."""
+        args = ["rsync", "-e", self.ssh_command, "--list-only", "--no-human-readable"]
+        if self.recursive:
+            args.append("-r")
+        args.append(self.source_spec)
+
+        result = subprocess.run(args, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise ValueError(f"Failed to list source files: {result.stderr.strip()}")
+
+        _, prefix = split_source_spec(self.source_spec)
+        files = parse_list_only_output(result.stdout)
+        if prefix:
+            # Without a trailing slash only the named file/directory itself is included
+            files = [f for f in files if f.path == prefix or f.path.startswith(f"{prefix}/")]
+        return files
+
+    def run(self) -> TransferResult:
+        """Run the transfer and block until every stream has finished."""
+        started_at = time.time()
+        files = self.files if self.files is not None else self.list_files()
+        buckets = split_files(files, self.streams)
+        total_bytes = sum(f.size for f in files)
+        source_base, _ = split_source_spec(self.source_spec)
+
+        self._emit(
+            "transfer_started",
+            files=len(files),
+            total_bytes=total_bytes,
+            streams=len(buckets),
+        )
+
+        stream_bytes = [0] * len(buckets)
+        results: list[TransferStreamResult | None] = [None] * len(buckets)
+
+        with tempfile.TemporaryDirectory(prefix="risa_transfer_") as tmp_dir:
+            threads = []
+            for index, bucket in enumerate(buckets):
+                files_from = Path(tmp_dir) / f"stream_{index}.txt"
+                files_from.write_text("".join(f"{f.path}\n" for f in bucket))
+                args = [
+                    *self._base_args(),
+                    "--info=progress2",
+                    "--no-inc-recursive",
+                    f"--files-from={files_from}",
+                    source_base,
+                    self.destination_spec,
+                ]
+                thread = threading.Thread(
+                    target=self._run_stream,
+                    args=(index, bucket, args, stream_bytes, results),
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=self.progress_interval / len(threads))
+                self._emit_progress(started_at, total_bytes, stream_bytes, results)
+
+        stream_results = [r for r in results if r is not None]
+        bytes_transferred = sum(stream_bytes)
+        result = TransferResult(
+            success=all(r.return_code == 0 for r in stream_results),
+            files=len(files),
+            total_bytes=total_bytes,
+            bytes_transferred=bytes_transferred,
+            elapsed_seconds=time.time() - started_at,
+            streams=stream_results,
+        )
+        self._emit(
+            "transfer_finished",
+            success=result.success,
+            files=result.files,
+            total_bytes=result.total_bytes,
+            bytes_transferred=result.bytes_transferred,
+            elapsed_seconds=result.elapsed_seconds,
+            throughput_bytes_per_second=result.throughput_bytes_per_second,
+        )
+        return result
+
+    def _emit_progress(
+        self,
+        started_at: float,
+        total_bytes: int,
+        stream_bytes: list[int],
+        results: list[TransferStreamResult | None],
+    ) -> None:
+        elapsed = time.time() - started_at
+        bytes_transferred = sum(stream_bytes)
+        self._emit(
+            "progress",
+            bytes_transferred=bytes_transferred,
+            total_bytes=total_bytes,
+            percent=round(bytes_transferred / total_bytes * 100, 1) if total_bytes else 100,
+            throughput_bytes_per_second=bytes_transferred / elapsed if elapsed else 0,
+            streams_finished=sum(1 for r in results if r is not None),
+            streams=len(results),
+        )
+
+    def _run_stream(
+        self,
+        index: int,
+        bucket: list[TransferFile],
+        args: list[str],
+        stream_bytes: list[int],
+        results: list[TransferStreamResult | None],
+    ) -> None:
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stderr_chunks: list[bytes] = []
+        stderr_thread = threading.Thread(
+            target=lambda: stderr_chunks.append(process.stderr.read()),  # type: ignore
+            daemon=True,
+        )
+        stderr_thread.start()
+
+        # progress2 rewrites its line with `\r`, so split on both `\r` and `\n`
+        buffer = b""
+        while chunk := process.stdout.read1(4096):  # type: ignore
+            buffer += chunk
+            *lines, buffer = re.split(rb"[\r\n]", buffer)
+            for line in lines:
+                transferred = parse_progress2_line(line.decode(errors="replace"))
+                if transferred is not None:
+                    stream_bytes[index] = transferred
+
+        return_code = process.wait()
+        stderr_thread.join()
+        stderr = b"".join(stderr_chunks).decode(errors="replace").strip()
+        if return_code != 0:
+            logger.error(f"Transfer stream {index} failed ({return_code}): {stderr}")
+
+        results[index] = TransferStreamResult(
+            stream=index,
+            files=len(bucket),
+            total_bytes=sum(f.size for f in bucket),
+            return_code=return_code,
+            stderr=stderr,
+        )
+        self._emit(
+            "stream_finished",
+            stream=index,
+            files=len(bucket),
+            return_code=return_code,
+        )
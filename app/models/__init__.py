@@ -1,6 +1,7 @@
 from framework.models import *
 
 from .character import *
+from .core.metrics import *
 from .core.state import *
 from .sd_base_model import *
 from .sd_checkpoint import *
@@ -3,6 +3,8 @@ from typing import TYPE_CHECKING
 from pydantic import validator
 from sqlmodel import Field, Relationship, SQLModel
 
+from framework.models.common import TimestampModel
+
 
 if TYPE_CHECKING:
     from .sd_extra_networks import SDExtraNetwork
@@ -108,7 +110,7 @@ class CharacterBase(SQLModel):
         return name
 
 
-class Character(CharacterBase, table=True):
+class Character(CharacterBase, TimestampModel, table=True):
     sd_extra_networks: list["SDExtraNetwork"] = Relationship(
         back_populates="character", sa_relationship_kwargs={"lazy": "selectin"}
     )
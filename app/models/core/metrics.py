@@ -0,0 +1,57 @@
+from enum import Enum
+
+from sqlmodel import Field, SQLModel
+
+
+class MetricResolution(str, Enum):
+    """Enum for the rollup resolutions kept in the metrics store."""
+
+    minute = "1m"
+    hour = "1h"
+
+
+class InstanceMetricBase(SQLModel):
+    env_name: str = Field(primary_key=True)
+    resolution: MetricResolution = Field(primary_key=True)
+    bucket_start: int = Field(primary_key=True, description="Unix timestamp of the bucket start")
+    sample_count: int = Field(default=0)
+
+    gpu_usage_avg: float | None = None
+    gpu_usage_max: float | None = None
+    gpu_memory_used_avg: float | None = None
+    gpu_memory_used_max: float | None = None
+    cpu_usage_avg: float | None = None
+    cpu_usage_max: float | None = None
+    disk_usage_avg: float | None = None
+    disk_usage_max: float | None = None
+
+
+class InstanceMetric(InstanceMetricBase, table=True):
+    pass
+
+
+class InstanceMetricCreate(InstanceMetricBase):
+    pass
+
+
+class InstanceMetricUpdate(SQLModel):
+    sample_count: int | None = None
+    gpu_usage_avg: float | None = None
+    gpu_usage_max: float | None = None
+    gpu_memory_used_avg: float | None = None
+    gpu_memory_used_max: float | None = None
+    cpu_usage_avg: float | None = None
+    cpu_usage_max: float | None = None
+    disk_usage_avg: float | None = None
+    disk_usage_max: float | None = None
+
+
+class InstanceMetricRead(InstanceMetricBase):
+    pass
+
+
+class MetricsChartData(SQLModel):
+    env_name: str
+    resolution: MetricResolution
+    timestamps: list[int] = []
+    series: dict[str, list[float | None]] = {}
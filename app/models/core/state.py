@@ -1,10 +1,12 @@
 from datetime import datetime, timedelta, timezone
+from typing import Any
 
 from sqlmodel import Field, SQLModel
 
 
 class InstanceStateBase(SQLModel):
     id: str = Field(default=None, primary_key=True, unique=True, alias="env_name")
+    version: int = Field(default=0)  # Incremented on every change
     last_updated: datetime | None = None
     project_name: str
     base_url: str
@@ -65,6 +67,15 @@ class InstanceStateRead(InstanceStateBase):
     pass
 
 
+class InstanceStateDelta(SQLModel):
+    """The fields of an instance state that changed between two versions."""
+
+    id: str
+    base_version: int  # Version the changes apply to
+    version: int | None = None  # Version after applying the changes
+    changes: dict[str, Any]
+
+
 class NetworkState(SQLModel):
     last_updated: datetime | None = None
     dev: InstanceState
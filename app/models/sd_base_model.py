@@ -2,6 +2,8 @@ from typing import TYPE_CHECKING
 
 from sqlmodel import Field, Relationship, SQLModel
 
+from framework.models.common import TimestampModel
+
 
 if TYPE_CHECKING:
     from .sd_checkpoint import SDCheckpoint
@@ -13,7 +15,7 @@ class SDBaseModelBase(SQLModel):
     name: str = Field(default=None)
 
 
-class SDBaseModel(SDBaseModelBase, table=True):
+class SDBaseModel(SDBaseModelBase, TimestampModel, table=True):
     sd_checkpoints: list["SDCheckpoint"] = Relationship(back_populates="sd_base_model")
     sd_extra_networks: list["SDExtraNetwork"] = Relationship(back_populates="sd_base_model")
 
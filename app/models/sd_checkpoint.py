@@ -4,6 +4,8 @@ from typing import TYPE_CHECKING, Any
 from pydantic import root_validator
 from sqlmodel import Field, Relationship, SQLModel
 
+from framework.models.common import TimestampModel
+
 
 if TYPE_CHECKING:
     from .sd_base_model import SDBaseModel
@@ -18,7 +20,7 @@ class SDCheckpointBase(SQLModel):
     sd_base_model_id: str = Field(default=None, foreign_key="sdbasemodel.id")
 
 
-class SDCheckpoint(SDCheckpointBase, table=True):
+class SDCheckpoint(SDCheckpointBase, TimestampModel, table=True):
     sd_base_model: "SDBaseModel" = Relationship(back_populates="sd_checkpoints")
 
 
@@ -6,6 +6,7 @@ from sqlmodel import JSON, Column, Field, Relationship, SQLModel
 
 from app.logic.hub import Safetensor
 from app.models.settings import get_settings
+from framework.models.common import TimestampModel
 from framework.paths import ENV_FILE
 
 
@@ -85,7 +86,7 @@ class SDExtraNetworkBase(SQLModel):
         )
 
 
-class SDExtraNetwork(SDExtraNetworkBase, table=True):
+class SDExtraNetwork(SDExtraNetworkBase, TimestampModel, table=True):
     sd_base_model: "SDBaseModel" = Relationship(
         back_populates="sd_extra_networks", sa_relationship_kwargs={"lazy": "selectin"}
     )
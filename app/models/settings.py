@@ -14,6 +14,11 @@ class Settings(PythonFastAPIBaseSettings):
     RISA_CONFIG_PATH: str = "app/data/config_dashboard.yaml"
     DATASET_TAGGER_WALKTHROUGH_PATH: str = "app/data/dataset_tagger_walkthrough.yaml"
     IDLE_TIMEOUT_MINUTES: int = 30
+    APP_STATUS_TTL_SECONDS: int = 5
+    NETWORK_STATE_POLL_SECONDS: int = 5
+    RSYNC_STREAMS: int = 4
+    METRICS_MINUTE_RETENTION_HOURS: int = 48
+    METRICS_HOUR_RETENTION_DAYS: int = 90
 
     @validator("EXPORT_API_KEY")
     def validate_export_api_key(cls, v: str) -> str:
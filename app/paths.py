@@ -66,3 +66,7 @@ HUEY_DEFAULT_LOG_PATH = convert_relative_path_to_absolute(settings.HUEY_DEFAULT_
 HUEY_RESERVED_LOG_PATH = convert_relative_path_to_absolute(settings.HUEY_RESERVED_LOG_PATH)
 HUEY_DEFAULT_PID_FILE = HUEY_DEFAULT_LOG_PATH.with_suffix(".pid")
 HUEY_RESERVED_PID_FILE = HUEY_RESERVED_LOG_PATH.with_suffix(".pid")
+JOB_SCHEDULER_LOCK_PATH = HUEY_DEFAULT_DB_PATH.with_name("job_scheduler.lock")
+LEADER_LOCK_PATH = HUEY_DEFAULT_DB_PATH.with_name("leader.lock")
+WEBSOCKET_BACKPLANE_DB_PATH = HUEY_DEFAULT_DB_PATH.with_name("websocket_backplane.db")
+METRICS_SNAPSHOTS_PATH = HUEY_DEFAULT_DB_PATH.with_name("metrics")
@@ -5,7 +5,9 @@ from app.api.v1.endpoints import (
     app_manager_ws,
     character,
     export,
+    hub,
     idle_watcher,
+    network_state_ws,
     sd_base_model,
     sd_checkpoint,
     sd_extra_network,
@@ -17,7 +19,7 @@ from app.api.v1.endpoints.scripts import (
     generate_xy_for_lora_epochs,
     rsync_files,
 )
-from framework.api.v1.endpoints import job_queue_ws, job_scheduler, users
+from framework.api.v1.endpoints import job_queue_ws, job_scheduler, profiles, users
 from framework.api.v1.endpoints.job_queue import router as job_queue_router
 
 
@@ -28,6 +30,7 @@ api_router.include_router(state.router, tags=["State"])
 api_router.include_router(job_queue_router, tags=["Job Queue"])
 api_router.include_router(idle_watcher.router, tags=["Idle Watcher"])
 api_router.include_router(export.router, tags=["Export"])
+api_router.include_router(hub.router, tags=["Hub"])
 api_router.include_router(users.router, tags=["Users"])
 api_router.include_router(character.router, tags=["Characters"])
 api_router.include_router(sd_base_model.router, tags=["SD Base Models"])
@@ -37,6 +40,8 @@ api_router.include_router(app_manager.router, tags=["App Manager"])
 api_router.include_router(job_queue_ws.router, tags=["Job Queue WS"])
 api_router.include_router(job_scheduler.router, tags=["Job Schedulers"])
 api_router.include_router(app_manager_ws.router, tags=["App Manager WS"])
+api_router.include_router(network_state_ws.router, tags=["Network State WS"])
+api_router.include_router(profiles.router, tags=["Profiles"])
 
 # Scripts
 api_router.include_router(generate_xy_for_lora_epochs.router, tags=["Scripts"])
@@ -0,0 +1,99 @@
+"""
+Registers the app's scripts by dotted path. The script modules are only imported when
+a job runs them; the metadata here is available without importing them.
+"""
+
+from pydantic import BaseModel, ConfigDict
+
+from framework.models.job import ResourceClass, RetryPolicy
+from framework.services import scripts
+
+
+class ScriptMeta(BaseModel):
+    # Jobs carry extra keys (e.g. `job_id`, `queue_name`)
+    model_config = ConfigDict(extra="allow")
+
+
+class GenerateXYForLoraEpochsMeta(ScriptMeta):
+    lora_output_name: str
+    sd_checkpoint_id: str
+    trigger: str
+    character_id: str | None = None
+    lora_weight: float = 1.0
+    start_epoch: int = 9
+    end_epoch: int = 30
+    max_epochs: int = 30
+    epoch_selection: str = "off"
+    selected_epochs: str = ""
+    seeds_per_epoch: int = 1
+    prompt: str = ""
+
+
+class ChooseBestEpochMeta(ScriptMeta):
+    select_lora_output_name: str
+    select_best_epoch: int | str
+    select_character_id: str | None = None
+    select_sd_checkpoint_id: str | None = None
+
+
+class FixCivitaiDownloadFilenamesMeta(ScriptMeta):
+    hub_path: str
+
+
+class RsyncFilesMeta(ScriptMeta):
+    source_env: str
+    source_location: str
+    destination_env: str
+    destination_location: str
+    option_u: bool | str | None = None
+    option_ignore_existing: bool | str | None = None
+    option_recursive: bool | str | None = None
+    streams: int | None = None
+    dedup: bool | str | None = None
+
+
+scripts.register_lazy(
+    "app.scripts.example:ScriptExample",
+    estimated_runtime_seconds=10,
+    description="Example script",
+)
+scripts.register_lazy(
+    "app.scripts.generate_xy_for_lora_epochs:ScriptGenerateXYForLoraEpochs",
+    resource_class=ResourceClass.gpu,
+    estimated_runtime_seconds=30 * 60,
+    meta_schema=GenerateXYForLoraEpochsMeta,
+    # A1111 restarting or busy: retry instead of stalling the pipeline
+    retry_policy=RetryPolicy(
+        max_attempts=3,
+        backoff_seconds=5 * 60,
+        retry_exceptions=["requests.exceptions.Timeout", "requests.exceptions.ConnectionError"],
+    ),
+    description="Generate a XY plot of the epochs of a trained Lora",
+)
+scripts.register_lazy(
+    "app.scripts.choose_best_epoch:ScriptChooseBestEpoch",
+    resource_class=ResourceClass.io,
+    estimated_runtime_seconds=5 * 60,
+    meta_schema=ChooseBestEpochMeta,
+    description="Copy the best epoch of a trained Lora to the hub",
+)
+scripts.register_lazy(
+    "app.scripts.fix_civitai_download_filenames:ScriptFixCivitaiDownloadFilenames",
+    resource_class=ResourceClass.io,
+    estimated_runtime_seconds=60,
+    meta_schema=FixCivitaiDownloadFilenamesMeta,
+    description="Remove the Civitai model id suffix from downloaded filenames",
+)
+scripts.register_lazy(
+    "app.scripts.rsync_files:ScriptRsyncFiles",
+    resource_class=ResourceClass.io,
+    estimated_runtime_seconds=10 * 60,
+    meta_schema=RsyncFilesMeta,
+    # Dropped SSH connections and unreachable hosts
+    retry_policy=RetryPolicy(
+        max_attempts=4,
+        backoff_seconds=60,
+        retry_exceptions=["ScriptFailedError"],
+    ),
+    description="Rsync files between environments",
+)
@@ -123,11 +123,14 @@ class ScriptChooseBestEpoch(scripts.Script):
 
         return deleted_paths
 
-    def _create_local_job_to_dl_epoch_from_hub(self, best_epoch_file_path: str) -> None:
+    def _create_local_job_to_dl_epoch_from_hub(
+        self, best_epoch_file_path: str, job_id: str | None = None
+    ) -> None:
         """Create a local job to download the epoch from the cloud hub to local hub.
 
         Args:
             best_epoch_file_path: The path to the best epoch file.
+            job_id: The ID of this script's job. The download waits until it is done.
         """
         destination_location = best_epoch_file_path.replace(str(paths.HUB_PATH), "/hub")
         # Create a local job to download the epoch from the cloud hub to local hub
@@ -149,7 +152,9 @@ class ScriptChooseBestEpoch(scripts.Script):
                         "destination_location": destination_location,
                         "option_recursive": "on",
                         "option_u": "on",
+                        "dedup": "on",
                     },
+                    depends_on=[job_id] if job_id else [],
                     status=models.JobStatus.queued,
                 ),
             )
@@ -221,7 +226,9 @@ class ScriptChooseBestEpoch(scripts.Script):
         )
 
         # Create a Job in LOCAL to download the epoch from the cloud hub to local hub (placeholder)
-        self._create_local_job_to_dl_epoch_from_hub(best_epoch_file_path)
+        self._create_local_job_to_dl_epoch_from_hub(
+            best_epoch_file_path, job_id=kwargs.get("job_id")
+        )
 
         return scripts.ScriptOutput(
             success=True,
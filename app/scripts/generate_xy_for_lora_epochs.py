@@ -4,7 +4,7 @@ from datetime import datetime, timezone
 from typing import Any
 
 from app import logger, paths
-from app.services.a1111_wrapper import RisaA1111Wrapper, Text2ImgSettings
+from app.services.a1111_wrapper import A1111Wrapper, RisaA1111Wrapper, Text2ImgSettings
 from framework.services import scripts
 
 
@@ -42,6 +42,12 @@ class ScriptGenerateXYForLoraEpochs(scripts.Script):
         risa_a1111_wrapper = RisaA1111Wrapper()
         logger.debug(f"risa_a1111_wrapper: {risa_a1111_wrapper}")
 
+        # Interrupt the generation when the job is cancelled, to release the GPU right away.
+        # Called from the heartbeat thread, so with its own session
+        self.cancel_token.add_callback(
+            lambda: A1111Wrapper(base_url=risa_a1111_wrapper.base_url).interrupt()
+        )
+
         text2img_settings = Text2ImgSettings(**kwargs)
         logger.debug(f"text2img_settings: {text2img_settings}")
 
@@ -104,6 +110,8 @@ class ScriptGenerateXYForLoraEpochs(scripts.Script):
             text2img_settings=text2img_settings,
         )
 
+        self.cancel_token.raise_if_cancelled()
+
         images_data = response["images"]
 
         image_paths = []
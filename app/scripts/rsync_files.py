@@ -1,9 +1,13 @@
-import subprocess
+import json
+import time
 from pathlib import Path
 from typing import Any
 
-from app import logger
-from app.logic.rsync import generate_rsync_command_job
+from app import crud, logger, models, paths, settings
+from app.logic.hub_sync import dedup_transfer
+from app.logic.rsync import get_rsync_transport
+from app.logic.transfer import ParallelRsync
+from framework.core.db import get_db_context
 from framework.services import scripts
 
 
@@ -19,6 +23,11 @@ class ScriptRsyncFiles(scripts.Script):
     - option_u: Skip destination files that are newer.
     - option_ignore_existing: Skip destination files that already exist.
     - option_recursive: Recursively copy directories.
+    - streams: Number of parallel rsync streams (default: `RSYNC_STREAMS`).
+    - dedup: When pulling, skip hub files this environment already has (by sha256) and
+      move/hardlink them into place instead.
+
+    Progress is written as JSON lines to `job_<id>_events.jsonl` in the job logs folder.
     """
 
     def _validate_input(self, *args: Any, **kwargs: Any) -> bool:
@@ -61,16 +70,12 @@ class ScriptRsyncFiles(scripts.Script):
         logger.debug(f"Starting {self.__class__.__name__}._run()")
         logger.debug(f"kwargs: {kwargs}")
 
-        # Create rsync command job
-        rsync_command = generate_rsync_command_job(
+        ssh_command, source_spec, destination_spec = get_rsync_transport(
             job_env=kwargs["job_env"],
             source_env=kwargs["source_env"],
             source_location=kwargs["source_location"],
             destination_env=kwargs["destination_env"],
             destination_location=kwargs["destination_location"],
-            option_u=kwargs.get("option_u", False),
-            option_ignore_existing=kwargs.get("option_ignore_existing", False),
-            option_recursive=kwargs.get("option_recursive", False),
         )
 
         # Make destination directory if it doesn't exist
@@ -80,31 +85,93 @@ class ScriptRsyncFiles(scripts.Script):
         if not destination_location.exists():
             destination_location.mkdir(parents=True, exist_ok=True)
 
-        # Run command using subprocess save output to file
+        job_events = TransferJobEvents(job_id=kwargs.get("job_id"))
+        transfer = ParallelRsync(
+            ssh_command=ssh_command,
+            source_spec=source_spec,
+            destination_spec=destination_spec,
+            streams=int(kwargs.get("streams", settings.RSYNC_STREAMS)),
+            recursive=kwargs.get("option_recursive", False),
+            option_u=kwargs.get("option_u", False),
+            option_ignore_existing=kwargs.get("option_ignore_existing", False),
+            on_event=job_events.handle,
+        )
+
+        hub_sync_plan = None
         try:
-            process = subprocess.run(rsync_command, shell=True, capture_output=True, text=True)
+            if kwargs.get("dedup") and kwargs["destination_env"] == kwargs["job_env"]:
+                hub_sync_plan = dedup_transfer(
+                    transfer,
+                    source_env=kwargs["source_env"],
+                    destination_location=kwargs["destination_location"],
+                    overwrite=not (
+                        kwargs.get("option_u", False)
+                        or kwargs.get("option_ignore_existing", False)
+                    ),
+                )
+            result = transfer.run()
+        except Exception as e:
+            logger.error(f"Exception while running rsync: {e}")
+            return scripts.ScriptOutput(success=False, message=str(e), data={})
 
-            logger.debug(f"STDOUT:\n{process.stdout}")
-            logger.debug(f"STDERR:\n{process.stderr}")
-            logger.debug(f"Return code: {process.returncode}")
+        data = result.model_dump()
+        data["throughput_bytes_per_second"] = result.throughput_bytes_per_second
+        if hub_sync_plan:
+            data["hub_sync_bytes_saved"] = hub_sync_plan.bytes_saved
 
-            if process.returncode != 0:
-                stderr = process.stderr.lower()
+        if not result.success:
+            stderr = " ".join(s.stderr for s in result.streams).lower()
 
-                if "connection refused" in stderr:
-                    message = "SSH connection refused by remote host."
-                elif "rsync error" in stderr or "unexpectedly closed" in stderr:
-                    message = "Rsync failed: connection closed or other issue."
-                else:
-                    message = "Rsync failed with unknown error."
+            if "connection refused" in stderr:
+                message = "SSH connection refused by remote host."
+            elif "rsync error" in stderr or "unexpectedly closed" in stderr:
+                message = "Rsync failed: connection closed or other issue."
+            else:
+                message = "Rsync failed with unknown error."
 
-                logger.error(message)
-                return scripts.ScriptOutput(success=False, message=message, data={})
+            logger.error(message)
+            return scripts.ScriptOutput(success=False, message=message, data=data)
 
-            return scripts.ScriptOutput(
-                success=True, message="Rsync completed.", data={"rsync_command": rsync_command}
-            )
+        return scripts.ScriptOutput(success=True, message="Rsync completed.", data=data)
 
+
+class TransferJobEvents:
+    """
+    Writes transfer events as JSON lines to the job's events file and stores the latest
+    progress in `job.meta["transfer"]`, throttled to limit database writes.
+    """
+
+    def __init__(self, job_id: str | None, meta_interval_seconds: float = 5) -> None:
+        self.job_id = job_id
+        self.meta_interval_seconds = meta_interval_seconds
+        self._last_meta_update: float = 0
+        self.events_path = (
+            paths.JOB_LOGS_PATH / f"job_{job_id}_events.jsonl" if job_id else None
+        )
+
+    def handle(self, event: dict[str, Any]) -> None:
+        if self.events_path:
+            self.events_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.events_path, "a") as f:
+                f.write(json.dumps(event) + "\n")
+
+        is_final = event["event"] == "transfer_finished"
+        if event["event"] not in ("progress", "transfer_finished"):
+            return
+        if not is_final and time.time() - self._last_meta_update < self.meta_interval_seconds:
+            return
+        self._last_meta_update = time.time()
+        self._update_job_meta(event)
+
+    def _update_job_meta(self, event: dict[str, Any]) -> None:
+        if not self.job_id:
+            return
+        try:
+            with get_db_context() as db:
+                db_job = crud.job.sync.get_or_none(db, id=self.job_id)
+                if not db_job:
+                    return
+                meta = {**db_job.meta, "transfer": event}
+                crud.job.sync.update(db, db_obj=db_job, obj_in=models.JobUpdate(meta=meta))
         except Exception as e:
-            logger.error(f"Exception while running rsync: {e}")
-            return scripts.ScriptOutput(success=False, message=str(e), data={})
+            logger.error(f"Failed to update transfer progress of job {self.job_id}: {e}")
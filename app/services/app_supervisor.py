@@ -0,0 +1,493 @@
+"""
+This service supervises the app manager apps.
+
+Apps with a `command_run` are started directly as child processes in their own process
+group. Their PIDs are tracked, stops escalate from SIGTERM to SIGKILL, crashed apps are
+restarted with backoff and their CPU/RSS is sampled. Other apps are checked with their
+`command_check_running` or a TCP probe.
+
+Checks run concurrently without blocking the event loop, results are cached for a short
+TTL, and status changes are pushed to the app manager websocket clients.
+
+The supervised apps are children of the leader worker (see `framework.core.leader`).
+Other workers forward start/restart/stop commands to it through the backplane, and only
+the leader broadcasts status changes.
+
+The supervisor subscribes to config reloads: edited apps are picked up, and removed apps
+are dropped from the status cache and, if supervised, stopped.
+"""
+
+import asyncio
+import os
+import shlex
+import signal
+import time
+from pathlib import Path
+from typing import Any
+
+import psutil
+from pydantic import BaseModel
+
+from app import logger, paths, settings
+from app.logic.app_manager import AppManagerApp
+from app.logic.config import Config, config_service, get_config
+from app.services.app_manager_ws_manager import app_manager_ws_manager
+from framework.core.backplane import Backplane, backplane as default_backplane
+from framework.core.leader import LeaderLock, leader_lock
+
+
+class AppStatus(BaseModel):
+    app_id: str
+    is_running: bool
+    checked_at: float
+
+
+class AppResourceUsage(BaseModel):
+    app_id: str
+    pid: int
+    num_processes: int
+    cpu_percent: float
+    rss_bytes: int
+
+
+RESTART_BACKOFF_BASE_SECONDS = 1
+RESTART_BACKOFF_MAX_SECONDS = 60
+
+# A process that ran at least this long before exiting restarts without backoff
+RESTART_BACKOFF_RESET_SECONDS = 60
+
+# Backplane channel of the commands forwarded to the leader
+COMMAND_CHANNEL = "AppSupervisorCommands"
+
+
+class ManagedProcess:
+    """A supervised app child process."""
+
+    def __init__(self, app: AppManagerApp) -> None:
+        self.app = app
+        self.process: asyncio.subprocess.Process | None = None
+        self.desired_running = False
+        self.started_at: float | None = None
+        self.restart_count = 0
+        self.monitor_task: asyncio.Task[None] | None = None
+        self._psutil_processes: dict[int, psutil.Process] = {}
+
+    @property
+    def pid(self) -> int | None:
+        return self.process.pid if self.process else None
+
+    @property
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def sample_resources(self) -> AppResourceUsage | None:
+        """Sum CPU and RSS over the process and its children since the previous sample."""
+        if not self.is_running or self.pid is None:
+            return None
+
+        try:
+            root = self._psutil_processes.get(self.pid) or psutil.Process(self.pid)
+            current = [root, *root.children(recursive=True)]
+        except psutil.NoSuchProcess:
+            return None
+
+        # Reuse psutil handles so `cpu_percent` measures since the previous sample
+        processes = {p.pid: self._psutil_processes.get(p.pid, p) for p in current}
+        self._psutil_processes = processes
+
+        cpu_percent = 0.0
+        rss_bytes = 0
+        for process in processes.values():
+            try:
+                cpu_percent += process.cpu_percent(interval=None)
+                rss_bytes += process.memory_info().rss
+            except psutil.NoSuchProcess:
+                continue
+
+        return AppResourceUsage(
+            app_id=self.app.id,
+            pid=self.pid,
+            num_processes=len(processes),
+            cpu_percent=cpu_percent,
+            rss_bytes=rss_bytes,
+        )
+
+
+class AppSupervisor:
+    """
+    Runs app health checks and caches their results.
+
+    A supervised app is running while its child process is alive. Other apps are checked
+    with their `command_check_running` if set, otherwise with a TCP connect to
+    `port_internal` on localhost.
+
+    Args:
+        ttl_seconds: Seconds a checked status is cached.
+        check_timeout: Seconds a check may take.
+        backplane: Backplane the commands go through. Defaults to the shared one.
+        leader: Lock of the worker that runs the apps. None: this process runs them.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 5,
+        check_timeout: float = 5,
+        backplane: Backplane | None = None,
+        leader: LeaderLock | None = None,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.check_timeout = check_timeout
+        self.leader = leader
+        self.backplane = backplane or default_backplane
+        self.backplane.subscribe(COMMAND_CHANNEL, self.handle_command)
+        # Last checked (and broadcast) status of each app
+        self._statuses: dict[str, AppStatus] = {}
+        # Apps to re-check on the next read even if their status is within the TTL
+        self._stale: set[str] = set()
+        self._inflight: dict[str, asyncio.Task[bool]] = {}
+        self._managed: dict[str, ManagedProcess] = {}
+        self._background_tasks: set[asyncio.Task[Any]] = set()
+        # Loop of `run`, config reloads can be notified from other threads (e.g. SIGHUP)
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def get_log_path(self, app: AppManagerApp) -> Path:
+        """The app's `log_file`, or a default log file in the logs folder."""
+        if app.log_file:
+            return Path(app.log_file)
+        return paths.LOGS_PATH / f"app_{app.id}.log"
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process runs the supervised apps."""
+        return self.leader is None or self.leader.is_leader
+
+    def get_managed_process(self, app_id: str) -> ManagedProcess | None:
+        return self._managed.get(app_id)
+
+    def run_in_background(self, coroutine: Any) -> None:
+        """Run a coroutine as a task so the caller (e.g. an endpoint) returns immediately."""
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _spawn(self, managed: ManagedProcess) -> None:
+        app = managed.app
+        log_path = self.get_log_path(app)
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(log_path, "ab") as log_file:
+            log_file.write(f"\n--- Starting {app.name}: {app.command_run} ---\n".encode())
+            log_file.flush()
+            managed.process = await asyncio.create_subprocess_exec(
+                *shlex.split(app.command_run),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=log_file,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=app.cwd,
+                env={**os.environ, **app.env},
+                start_new_session=True,
+            )
+        managed.started_at = time.time()
+        logger.info(f"Started '{app.name}' with PID {managed.pid}.")
+
+    @staticmethod
+    def _wants_restart(managed: ManagedProcess) -> bool:
+        return managed.desired_running and managed.app.auto_restart
+
+    async def _monitor(self, managed: ManagedProcess) -> None:
+        """Wait for the process to exit and restart it with backoff if configured."""
+        while managed.process is not None:
+            return_code = await managed.process.wait()
+            logger.info(f"'{managed.app.name}' (PID {managed.pid}) exited with {return_code}.")
+            self.invalidate(managed.app.id)
+            await self.get_status_map([managed.app])
+
+            if not self._wants_restart(managed):
+                return
+
+            if time.time() - (managed.started_at or 0) >= RESTART_BACKOFF_RESET_SECONDS:
+                managed.restart_count = 0
+            delay = min(
+                RESTART_BACKOFF_MAX_SECONDS,
+                RESTART_BACKOFF_BASE_SECONDS * 2**managed.restart_count,
+            )
+            managed.restart_count += 1
+            logger.info(f"Restarting '{managed.app.name}' in {delay}s.")
+            await asyncio.sleep(delay)
+
+            # The app may have been stopped while waiting
+            if not self._wants_restart(managed):
+                return
+            try:
+                await self._spawn(managed)
+            except Exception as e:
+                logger.error(f"Failed to restart '{managed.app.name}': {e}")
+                return
+            self.invalidate(managed.app.id)
+            await self.get_status_map([managed.app])
+
+    async def start_app(self, app: AppManagerApp) -> dict[str, Any]:
+        """Start a supervised app. Returns once the process is spawned."""
+        if not app.command_run:
+            raise ValueError(f"command_run is not set for `{app.id}`")
+
+        managed = self._managed.get(app.id)
+        if managed and managed.is_running:
+            return {"success": False, "message": f"`{app.id}` is already running"}
+
+        if managed:
+            # Stop a pending auto-restart of the previous process
+            managed.desired_running = False
+
+        managed = ManagedProcess(app)
+        managed.desired_running = True
+        self._managed[app.id] = managed
+        await self._spawn(managed)
+        managed.monitor_task = asyncio.create_task(self._monitor(managed))
+
+        self.invalidate(app.id)
+        await self.get_status_map([app])
+        return {"success": True, "message": f"Started `{app.id}` with PID {managed.pid}"}
+
+    async def stop_app(self, app: AppManagerApp) -> dict[str, Any]:
+        """Stop a supervised app's process group, escalating to SIGKILL after a timeout."""
+        managed = self._managed.get(app.id)
+        if not managed or not managed.is_running or managed.process is None:
+            return {"success": False, "message": f"`{app.id}` is not running"}
+
+        managed.desired_running = False
+        process = managed.process
+        try:
+            # The child is a session leader, so its PID is also its process group ID
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(process.wait(), timeout=app.stop_timeout_seconds)
+            except asyncio.TimeoutError:
+                logger.warning(f"'{app.name}' did not stop in time. Sending SIGKILL.")
+                os.killpg(process.pid, signal.SIGKILL)
+                await process.wait()
+        except ProcessLookupError:
+            pass
+
+        self.invalidate(app.id)
+        await self.get_status_map([app])
+        return {"success": True, "message": f"Stopped `{app.id}` (PID {process.pid})"}
+
+    async def restart_app(self, app: AppManagerApp) -> dict[str, Any]:
+        """Stop (if running) and start a supervised app."""
+        await self.stop_app(app)
+        return await self.start_app(app)
+
+    async def send_command(self, action: str, app: AppManagerApp) -> None:
+        """
+        Start, restart or stop a supervised app in the background, in the leader worker.
+
+        Args:
+            action: start, restart or stop.
+            app: The supervised app.
+        """
+        await self.backplane.publish(COMMAND_CHANNEL, {"action": action, "app_id": app.id})
+
+    async def handle_command(self, message: dict[str, Any]) -> None:
+        """Run a command sent with `send_command`, if this process runs the apps."""
+        if not self.is_leader:
+            return
+        app = next((a for a in get_config().app_manager.apps if a.id == message["app_id"]), None)
+        if app is None:
+            logger.error(f"App supervisor command for unknown app: {message}")
+            return
+        commands = {"start": self.start_app, "restart": self.restart_app, "stop": self.stop_app}
+        if message["action"] not in commands:
+            logger.error(f"Unknown app supervisor command: {message}")
+            return
+        # Stopping can take up to `stop_timeout_seconds`, so don't hold up the backplane
+        self.run_in_background(commands[message["action"]](app))
+
+    async def stop_all(self) -> None:
+        """Stop all supervised apps. Called on shutdown."""
+        managed_apps = [m.app for m in self._managed.values() if m.is_running]
+        await asyncio.gather(*(self.stop_app(app) for app in managed_apps))
+
+    def get_resource_usage(self) -> dict[str, AppResourceUsage]:
+        """Sample CPU/RSS of every running supervised app."""
+        usage = {}
+        for app_id, managed in self._managed.items():
+            try:
+                sample = managed.sample_resources()
+            except Exception as e:
+                logger.error(f"Failed to sample resources of '{app_id}': {e}")
+                continue
+            if sample:
+                usage[app_id] = sample
+        return usage
+
+    async def _run_check_command(self, app: AppManagerApp) -> bool:
+        process = await asyncio.create_subprocess_shell(
+            app.command_check_running,  # type: ignore
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            return_code = await asyncio.wait_for(process.wait(), timeout=self.check_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Health check for '{app.name}' timed out.")
+            process.kill()
+            await process.wait()
+            return False
+        return return_code == 0
+
+    async def _probe_port(self, port: int) -> bool:
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection("127.0.0.1", port), timeout=self.check_timeout
+            )
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        await writer.wait_closed()
+        return True
+
+    async def check_app(self, app: AppManagerApp) -> bool:
+        """Check if an app is running, bypassing the cache."""
+        managed = self._managed.get(app.id)
+        if app.is_supervised and managed:
+            return managed.is_running
+
+        try:
+            if app.command_check_running:
+                return await self._run_check_command(app)
+            if app.port_internal:
+                return await self._probe_port(app.port_internal)
+        except Exception as e:
+            logger.error(f"Error checking if '{app.name}' is running: {e}")
+            return False
+
+        logger.warning(
+            f"Neither 'command_check_running' nor 'port_internal' is set for '{app.name}' app. "
+            "Check config."
+        )
+        return False
+
+    async def _check_app_once(self, app: AppManagerApp) -> bool:
+        """Check an app, sharing the result with concurrent callers checking the same app."""
+        task = self._inflight.get(app.id)
+        if task is None:
+            task = asyncio.create_task(self.check_app(app))
+            self._inflight[app.id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(app.id, None))
+        return await task
+
+    def _is_fresh(self, app_id: str, now: float) -> bool:
+        if app_id in self._stale:
+            return False
+        status = self._statuses.get(app_id)
+        return status is not None and now - status.checked_at < self.ttl_seconds
+
+    async def get_status_map(
+        self, apps: list[AppManagerApp], force: bool = False
+    ) -> dict[str, bool]:
+        """Get a mapping of app id to whether it is running.
+
+        Args:
+            apps: Apps to check
+            force: Re-check every app even if its cached status is still fresh
+
+        Returns:
+            Mapping of app id to running status. Changes are broadcast to websocket clients.
+        """
+        now = time.time()
+        stale_apps = [app for app in apps if force or not self._is_fresh(app.id, now)]
+
+        if stale_apps:
+            results = await asyncio.gather(*(self._check_app_once(app) for app in stale_apps))
+            checked_at = time.time()
+
+            changes = {}
+            for app, is_running in zip(stale_apps, results, strict=True):
+                previous = self._statuses.get(app.id)
+                if previous is None or previous.is_running != is_running:
+                    changes[app.id] = is_running
+                self._statuses[app.id] = AppStatus(
+                    app_id=app.id, is_running=is_running, checked_at=checked_at
+                )
+                self._stale.discard(app.id)
+
+            # Other workers can't see the supervised apps, only the leader broadcasts
+            if changes and self.is_leader:
+                await self.broadcast_status(changes)
+
+        return {app.id: self._statuses[app.id].is_running for app in apps}
+
+    def invalidate(self, app_id: str | None = None) -> None:
+        """
+        Mark the cached status of an app (or all apps) as stale so the next read re-checks
+        it. The status is kept, so the re-check only broadcasts if it changed.
+        """
+        if app_id is None:
+            self._stale.update(self._statuses)
+        else:
+            self._stale.add(app_id)
+
+    def on_config_change(self, config: Config) -> None:
+        """Config subscriber, applies the new app definitions on the supervisor's loop."""
+        if self._loop is None:
+            self.apply_config(config)
+        else:
+            self._loop.call_soon_threadsafe(self.apply_config, config)
+
+    def apply_config(self, config: Config) -> None:
+        """
+        Use the new app definitions: a supervised app restarts with its edited command,
+        removed apps are dropped from the status cache and stopped, and all statuses are
+        re-checked on the next read.
+        """
+        apps = {app.id: app for app in config.app_manager.apps}
+
+        for app_id in list(self._statuses):
+            if app_id not in apps:
+                del self._statuses[app_id]
+                self._stale.discard(app_id)
+
+        for app_id, managed in self._managed.items():
+            app = apps.get(app_id)
+            if app is not None:
+                managed.app = app
+            elif managed.is_running:
+                logger.info(f"'{managed.app.name}' was removed from the config. Stopping it.")
+                self.run_in_background(self.stop_app(managed.app))
+
+        self.invalidate()
+
+    async def broadcast_status(self, app_status: dict[str, bool]) -> None:
+        try:
+            await app_manager_ws_manager.broadcast({"app_status": app_status})
+        except Exception as e:
+            logger.error(f"Failed to broadcast app status: {e}")
+
+    async def run(self) -> None:
+        """
+        Re-check all apps every TTL so status changes are pushed without a page load,
+        and push the resource usage of supervised apps.
+        """
+        logger.info("App supervisor status loop started.")
+        self._loop = asyncio.get_running_loop()
+        config_service.subscribe(self.on_config_change)
+        try:
+            while True:
+                try:
+                    await self.get_status_map(get_config().app_manager.apps)
+                    usage = self.get_resource_usage()
+                    if usage:
+                        await app_manager_ws_manager.broadcast(
+                            {"app_resources": {k: v.model_dump() for k, v in usage.items()}}
+                        )
+                except Exception as e:
+                    logger.error(f"Error refreshing app status: {e}")
+                await asyncio.sleep(self.ttl_seconds)
+        finally:
+            config_service.unsubscribe(self.on_config_change)
+            self._loop = None
+
+
+# Singleton instance of the supervisor
+app_supervisor = AppSupervisor(ttl_seconds=settings.APP_STATUS_TTL_SECONDS, leader=leader_lock)
@@ -1,105 +1,255 @@
 """
-This service monitors GPU activity and triggers jobs when the system is idle.
+This service monitors GPU activity and starts queued jobs when the system is idle.
+
+The watcher keeps a small state machine per watched queue and re-evaluates it whenever
+new GPU telemetry arrives or a job changes, instead of polling on a coarse interval:
+
+    paused        -> woken by the user, no jobs are started until resumed
+    busy          -> a job is running on the queue or its GPUs are in use
+    idle_pending  -> the GPUs are idle, waiting for the idle timeout to pass
+    dispatched    -> a job was handed to the queue's consumer and has not finished yet
 """
 
-import asyncio
-import subprocess
 import threading
 import time
+from enum import Enum
+
+from pydantic import BaseModel
+from sqlmodel import Session
 
 from app import logger, settings
+from app.logic.config import Config, IdleWatcherQueueConfig, config_service, get_config
+from framework import crud, models
 from framework.core.db import get_db_context
+from framework.crud.job import subscribe_to_job_changes, unsubscribe_from_job_changes
 from framework.services import job_queue
+from framework.services.gpu_telemetry import GPUSample, gpu_telemetry
+
+
+class IdleWatcherState(str, Enum):
+    paused = "paused"
+    busy = "busy"
+    idle_pending = "idle_pending"
+    dispatched = "dispatched"
+
+
+class IdleWatcherQueueStatus(BaseModel):
+    queue_name: str
+    gpu_indices: list[int] | None = None
+    state: IdleWatcherState = IdleWatcherState.busy
+    idle_since: float | None = None
+    dispatch_at: float | None = None
+    dispatched_job_id: str | None = None
+
+
+class IdleWatcherStatus(BaseModel):
+    running: bool
+    paused: bool
+    idle_timeout_minutes: int
+    queues: list[IdleWatcherQueueStatus]
 
 
 class IdleWatcher(threading.Thread):
     """
-    A background thread that monitors GPU utilization and triggers jobs
-    from the queue when the system is determined to be idle.
+    A background thread that watches GPU utilization and starts the next queued job
+    of a queue as soon as that queue's GPUs have been idle for the idle timeout.
     """
 
-    def __init__(self, poll_interval: int = 60):
+    def __init__(self, fallback_poll_interval: int = 60):
         super().__init__(daemon=True)
-        self.poll_interval = poll_interval
-        self.idle_start_time: float | None = None
-        self.wake_flag = threading.Event()
+        self.fallback_poll_interval = fallback_poll_interval
+        self.idle_timeout_minutes = settings.IDLE_TIMEOUT_MINUTES
+        self.queues: dict[str, IdleWatcherQueueStatus] = {}
+        self.paused = False
+        self._lock = threading.Lock()
+        self._evaluate_event = threading.Event()
         self.stop_event = threading.Event()
 
-    def is_gpu_idle(self) -> bool:
-        """
-        Checks if the GPU is currently idle by querying nvidia-smi.
-        A GPU is considered idle if its utilization is 0%.
+    def load_queues(self, config: Config | None = None) -> None:
+        """Loads the watched queues from the config, keeping the state of existing ones.
+        Subscribed to config reloads.
         """
         try:
-            # This command queries GPU utilization and returns it.
-            # It's a common way to check GPU status on NVIDIA hardware.
-            result = subprocess.run(
-                ["nvidia-smi", "--query-gpu=utilization.gpu", "--format=csv,noheader,nounits"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            utilization = int(result.stdout.strip())
-            return utilization == 0
-        except (FileNotFoundError, subprocess.CalledProcessError, ValueError) as e:
-            # Handle cases where nvidia-smi is not found or fails.
-            logger.warning(f"Could not check GPU status: {e}. Assuming not idle.")
-            return False
+            queue_configs = (config or get_config()).idle_watcher.queues
+        except Exception as e:
+            logger.warning(f"Could not load idle watcher config: {e}. Watching default queue.")
+            queue_configs = [IdleWatcherQueueConfig(name="default")]
+
+        with self._lock:
+            queues = {}
+            for queue_config in queue_configs:
+                queue = self.queues.get(queue_config.name) or IdleWatcherQueueStatus(
+                    queue_name=queue_config.name
+                )
+                queue.gpu_indices = queue_config.gpu_indices
+                queues[queue_config.name] = queue
+            self.queues = queues
+        self.notify()
+
+    def notify(self, *_args: object) -> None:
+        """Requests a re-evaluation. Subscribed to GPU telemetry and job changes."""
+        self._evaluate_event.set()
+
+    def _on_gpu_samples(self, _samples: list[GPUSample]) -> None:
+        self.notify()
+
+    def evaluate(self) -> float | None:
+        """
+        Advances the state machine of every watched queue.
+
+        Returns:
+            Seconds until the next idle timeout expires, or None if no timeout is pending.
+        """
+        with self._lock:
+            if self.paused:
+                for queue in self.queues.values():
+                    self._reset(queue, IdleWatcherState.paused)
+                return None
+
+            next_deadline = None
+            with get_db_context() as db:
+                for queue in self.queues.values():
+                    try:
+                        remaining = self._evaluate_queue(db, queue)
+                    except Exception as e:
+                        logger.error(f"Idle watcher failed to evaluate {queue.queue_name}: {e}")
+                        continue
+                    if remaining is not None:
+                        next_deadline = (
+                            remaining if next_deadline is None else min(next_deadline, remaining)
+                        )
+            return next_deadline
+
+    def _reset(self, queue: IdleWatcherQueueStatus, state: IdleWatcherState) -> None:
+        queue.state = state
+        queue.idle_since = None
+        queue.dispatch_at = None
+        queue.dispatched_job_id = None
+
+    def _evaluate_queue(self, db: Session, queue: IdleWatcherQueueStatus) -> float | None:
+        now = time.time()
+
+        if queue.state == IdleWatcherState.dispatched and queue.dispatched_job_id:
+            db_job = crud.job.sync.get_or_none(db, id=queue.dispatched_job_id)
+            if db_job and db_job.status in (
+                models.JobStatus.queued,
+                models.JobStatus.dispatched,
+                models.JobStatus.running,
+            ):
+                return None
+            self._reset(queue, IdleWatcherState.busy)
+
+        running_jobs = [
+            job
+            for job in crud.job.sync.get_active_jobs(db, env_name=settings.ENV_NAME)
+            if job.queue_name == queue.queue_name
+        ]
+        gpus_idle = gpu_telemetry.is_idle(
+            window_seconds=settings.GPU_IDLE_WINDOW_SECONDS,
+            threshold=settings.GPU_IDLE_UTILIZATION_THRESHOLD,
+            indices=queue.gpu_indices,
+        )
+        if running_jobs or not gpus_idle:
+            if queue.state == IdleWatcherState.idle_pending:
+                logger.info(f"Queue {queue.queue_name} is busy. Resetting idle timer.")
+            self._reset(queue, IdleWatcherState.busy)
+            return None
+
+        if queue.idle_since is None:
+            logger.info(f"Queue {queue.queue_name} is now idle. Starting idle timer.")
+            queue.state = IdleWatcherState.idle_pending
+            queue.idle_since = now
+            queue.dispatch_at = now + self.idle_timeout_minutes * 60
+
+        remaining = (queue.dispatch_at or now) - now
+        if remaining > 0:
+            return remaining
+
+        next_job = job_queue.trigger_next_job(db, queue_name=queue.queue_name)
+        if next_job is None:
+            # Stay idle_pending; a newly queued job is dispatched on the next job change
+            return None
+
+        logger.info(
+            f"Idle timeout of {self.idle_timeout_minutes} minutes reached. "
+            f"Started job {next_job.id} on queue {queue.queue_name}."
+        )
+        self._reset(queue, IdleWatcherState.dispatched)
+        queue.dispatched_job_id = str(next_job.id)
+        return None
 
     def run(self):
         """
         The main loop for the watcher thread.
         """
         logger.info("Idle Watcher thread started.")
-        while not self.stop_event.is_set():
-            if self.wake_flag.is_set():
-                logger.info("Wake flag is set. Idle watcher is paused.")
-                self.idle_start_time = None
-                # Wait until the wake_flag is cleared before resuming checks
-                self.wake_flag.wait()
-                logger.info("Wake flag cleared. Resuming idle checks.")
-
-            if self.is_gpu_idle():
-                if self.idle_start_time is None:
-                    # Mark the time when the system first became idle
-                    self.idle_start_time = time.time()
-                    logger.info("System is now idle. Starting idle timer.")
-
-                idle_duration = time.time() - self.idle_start_time
-                idle_timeout_seconds = settings.IDLE_TIMEOUT_MINUTES * 60
-
-                if idle_duration >= idle_timeout_seconds:
-                    logger.info(
-                        f"Idle timeout of {settings.IDLE_TIMEOUT_MINUTES} minutes reached. Triggering next job."
-                    )
-                    # Trigger the next job from the queue
-                    with get_db_context() as db:
-                        asyncio.run(job_queue.trigger_next_job(db))
-                    # Reset the idle timer after triggering a job to wait again
-                    self.idle_start_time = None
-            else:
-                # If the GPU is active, reset the idle timer
-                if self.idle_start_time is not None:
-                    logger.info("GPU is active. Resetting idle timer.")
-                self.idle_start_time = None
-
-            # Wait for the next poll interval
-            self.stop_event.wait(self.poll_interval)
+        self.load_queues()
+        gpu_telemetry.subscribe(self._on_gpu_samples)
+        subscribe_to_job_changes(self.notify)
+        config_service.subscribe(self.load_queues)
+
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    next_deadline = self.evaluate()
+                except Exception as e:
+                    logger.error(f"Idle watcher evaluation failed: {e}")
+                    next_deadline = None
+
+                # Sleep until an event arrives, the next idle timeout expires, or the
+                # fallback poll catches changes made by other processes (e.g. consumers)
+                timeout: float = self.fallback_poll_interval
+                if next_deadline is not None:
+                    timeout = min(timeout, next_deadline)
+                self._evaluate_event.wait(timeout)
+                self._evaluate_event.clear()
+        finally:
+            gpu_telemetry.unsubscribe(self._on_gpu_samples)
+            unsubscribe_from_job_changes(self.notify)
+            config_service.unsubscribe(self.load_queues)
 
     def wake(self):
         """
-        Sets the wake flag to pause idle-triggered execution and resets the timer.
+        Pauses idle-triggered execution and resets the idle timers.
         """
         logger.info("Waking up! Pausing idle job execution.")
-        self.wake_flag.set()
-        self.idle_start_time = None
+        with self._lock:
+            self.paused = True
+        self.notify()
 
     def resume(self):
         """
-        Clears the wake flag to allow the idle watcher to resume.
+        Allows the idle watcher to start jobs again.
         """
         logger.info("Resuming idle watcher.")
-        self.wake_flag.clear()
+        with self._lock:
+            self.paused = False
+            for queue in self.queues.values():
+                if queue.state == IdleWatcherState.paused:
+                    self._reset(queue, IdleWatcherState.busy)
+        self.notify()
+
+    def configure(self, idle_timeout_minutes: int) -> None:
+        """
+        Changes the idle timeout. Pending timers are recalculated from when they started.
+        """
+        logger.info(f"Setting idle timeout to {idle_timeout_minutes} minutes.")
+        with self._lock:
+            self.idle_timeout_minutes = idle_timeout_minutes
+            for queue in self.queues.values():
+                if queue.idle_since is not None:
+                    queue.dispatch_at = queue.idle_since + idle_timeout_minutes * 60
+        self.notify()
+
+    def get_status(self) -> IdleWatcherStatus:
+        """Returns the state of the watcher and each watched queue."""
+        with self._lock:
+            return IdleWatcherStatus(
+                running=self.is_alive(),
+                paused=self.paused,
+                idle_timeout_minutes=self.idle_timeout_minutes,
+                queues=[queue.model_copy() for queue in self.queues.values()],
+            )
 
     def stop(self):
         """
@@ -107,6 +257,7 @@ class IdleWatcher(threading.Thread):
         """
         logger.info("Stopping idle watcher thread.")
         self.stop_event.set()
+        self.notify()
 
 
 # Singleton instance of the watcher
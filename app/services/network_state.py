@@ -0,0 +1,122 @@
+"""
+This service keeps the network state (the instance state of every environment) in
+memory and pushes changes to websocket subscribers.
+
+All environments write to the same database, so the watcher polls the state versions
+(one small query) and only reloads the rows whose version changed. Subscribers get the
+full network state when they connect and then only the changed fields.
+"""
+
+import asyncio
+from typing import Any
+
+from sqlmodel import Session
+
+from app import crud, logger, models, settings
+from app.logic.state import (
+    NETWORK_ENV_NAMES,
+    UNVERSIONED_FIELDS,
+    diff_instance_state,
+    network_state_from_instance_states,
+)
+from framework.core.db import get_db_context
+from framework.core.websocket import WebSocketManager
+
+
+class NetworkStateConnectionManager(WebSocketManager):
+    # Clients that missed a delta have to reconnect to get a new snapshot
+    evict_when_full = True
+
+
+network_state_ws_manager = NetworkStateConnectionManager()
+
+
+class NetworkStateWatcher:
+    """
+    Caches the instance states and broadcasts the changes between versions.
+
+    Args:
+        poll_seconds: Seconds between version checks.
+    """
+
+    def __init__(self, poll_seconds: float = 5) -> None:
+        self.poll_seconds = poll_seconds
+        self._instance_states: dict[str, models.InstanceState] = {}
+        self._versions: dict[str, int] = {}
+
+    def refresh(self, db: Session) -> list[models.InstanceStateDelta]:
+        """Reload the instance states whose version changed.
+
+        Returns:
+            The changes since the last refresh, one delta per changed environment.
+        """
+        versions = crud.instance_state.sync.get_versions(db)
+        changed_ids = [id for id, version in versions.items() if self._versions.get(id) != version]
+        if not changed_ids:
+            return []
+
+        deltas = []
+        for id, db_instance_state in crud.instance_state.sync.get_by_ids(db, changed_ids).items():
+            # Detached copy, so the cache outlives the session
+            instance_state = models.InstanceState.model_validate(db_instance_state.model_dump())
+            old = self._instance_states.get(id)
+            if old is None:
+                changes = instance_state.model_dump(exclude=UNVERSIONED_FIELDS)
+            else:
+                changes = diff_instance_state(old, instance_state)
+            self._instance_states[id] = instance_state
+            deltas.append(
+                models.InstanceStateDelta(
+                    id=id,
+                    base_version=old.version if old else 0,
+                    version=instance_state.version,
+                    changes=changes,
+                )
+            )
+        self._versions = versions
+        return deltas
+
+    def _refresh(self) -> list[models.InstanceStateDelta]:
+        with get_db_context() as db:
+            return self.refresh(db)
+
+    def get_network_state(self) -> models.NetworkState | None:
+        """Get the cached network state, or None if it hasn't been loaded yet."""
+        if not all(env_name in self._instance_states for env_name in NETWORK_ENV_NAMES):
+            return None
+        return network_state_from_instance_states(self._instance_states)
+
+    def get_snapshot(self) -> dict[str, Any]:
+        """The message sent to new subscribers."""
+        return {
+            "type": "network_state",
+            "network_state": {
+                id: instance_state.model_dump(mode="json")
+                for id, instance_state in self._instance_states.items()
+            },
+        }
+
+    async def refresh_and_broadcast(self) -> None:
+        """Refresh the cache and broadcast the changed fields to all subscribers."""
+        deltas = await asyncio.to_thread(self._refresh)
+        for delta in deltas:
+            # Every worker runs a watcher, and the deltas are relative to its own cache
+            await network_state_ws_manager.broadcast_local(
+                {"type": "network_state_delta", **delta.model_dump(mode="json")}
+            )
+
+    async def run(self) -> None:
+        """
+        Poll the state versions and broadcast the changed fields.
+        """
+        logger.info("Network state watcher started.")
+        while True:
+            try:
+                await self.refresh_and_broadcast()
+            except Exception as e:
+                logger.error(f"Error refreshing network state: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+
+# Singleton instance of the watcher
+network_state_watcher = NetworkStateWatcher(poll_seconds=settings.NETWORK_STATE_POLL_SECONDS)
@@ -0,0 +1,24 @@
+"""
+Fixtures of the performance benchmarks: a SQLite database with synthetic rows, offline.
+
+The benchmarks use pytest-benchmark. Results are saved as JSON and compared against the
+previous run with `make benchmark-compare`.
+"""
+
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+import framework.models  # noqa: F401 Registers the tables
+
+
+@pytest.fixture(name="bench_db")
+def fixture_bench_db(tmp_path: Path) -> Generator[Session, None, None]:
+    """A file SQLite database with all tables, like the app's, in a temporary directory."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'bench.db'}")
+    SQLModel.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        yield db
+    engine.dispose()
@@ -0,0 +1,34 @@
+"""
+Synthetic rows for the benchmarks.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import Session
+
+from app import settings
+from framework import models
+
+
+def add_jobs(
+    db: Session,
+    count: int,
+    status: models.JobStatus = models.JobStatus.done,
+    queue_name: str = "default",
+) -> list[models.Job]:
+    """Insert `count` jobs of the current environment in a single transaction."""
+    created_at = datetime.now(tz=timezone.utc) - timedelta(days=1)
+    jobs = [
+        models.Job(
+            env_name=settings.ENV_NAME,
+            name=f"job {i}",
+            command="echo benchmark",
+            status=status,
+            queue_name=queue_name,
+            created_at=created_at + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+    db.add_all(jobs)
+    db.commit()
+    return jobs
@@ -0,0 +1,75 @@
+"""
+Measures the cold-start import time of the web process and the Huey workers with
+`python -X importtime`.
+
+Usage:
+    python -m benchmarks.import_time app.core.app app.tasks
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from pydantic import BaseModel
+
+
+ROOT_PATH = Path(__file__).resolve().parent.parent
+
+
+class ImportTime(BaseModel):
+    module: str
+    cumulative_ms: float  # Time to import the module, including its imports
+    imported: dict[str, float]  # Every imported module -> its own import time in ms
+
+    def slowest(self, count: int = 10) -> list[tuple[str, float]]:
+        return sorted(self.imported.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def parse_importtime(output: str) -> dict[str, tuple[float, float]]:
+    """Parse `-X importtime` output into `module -> (self ms, cumulative ms)`."""
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # Header
+        times[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return times
+
+
+def measure_import_time(module: str, runs: int = 3) -> ImportTime:
+    """Import `module` in fresh interpreters and keep the fastest run to reduce noise."""
+    best: ImportTime | None = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT_PATH,
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+        times = parse_importtime(result.stderr)
+        if module not in times:
+            raise RuntimeError(f"{module} not found in the importtime output")
+        import_time = ImportTime(
+            module=module,
+            cumulative_ms=times[module][1],
+            imported={name: self_ms for name, (self_ms, _) in times.items()},
+        )
+        if best is None or import_time.cumulative_ms < best.cumulative_ms:
+            best = import_time
+    assert best is not None
+    return best
+
+
+if __name__ == "__main__":
+    for module in sys.argv[1:] or ["app.core.app", "app.tasks"]:
+        import_time = measure_import_time(module)
+        print(f"{module}: {import_time.cumulative_ms:.0f} ms")
+        for name, self_ms in import_time.slowest():
+            print(f"    {self_ms:8.1f} ms  {name}")
@@ -0,0 +1,40 @@
+"""
+CRUD layer benchmarks: `get_multi` on a large table and `create` throughput.
+"""
+
+from typing import Any
+
+import pytest
+from sqlmodel import Session
+
+from benchmarks.data import add_jobs
+from framework import models
+from framework.crud.base import BaseCRUDSync
+
+
+pytest.importorskip("pytest_benchmark")
+
+JobCRUD = BaseCRUDSync[models.Job, models.JobCreate, models.JobUpdate]
+
+
+@pytest.mark.benchmark(group="crud")
+def test_get_multi(benchmark: Any, bench_db: Session) -> None:
+    """Filter 100 queued jobs out of 10k."""
+    job_crud = JobCRUD(models.Job)
+    add_jobs(bench_db, 10_000)
+    add_jobs(bench_db, 100, status=models.JobStatus.queued)
+
+    jobs = benchmark(job_crud.get_multi, bench_db, status=models.JobStatus.queued)
+    assert len(jobs) == 100
+
+
+@pytest.mark.benchmark(group="crud")
+def test_create(benchmark: Any, bench_db: Session) -> None:
+    """Create a job, one transaction each."""
+    job_crud = JobCRUD(models.Job)
+    add_jobs(bench_db, 1_000)
+
+    def create() -> models.Job:
+        return job_crud.create(bench_db, obj_in=models.JobCreate(name="job", command="echo"))
+
+    benchmark(create)
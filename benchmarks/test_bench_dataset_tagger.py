@@ -0,0 +1,54 @@
+"""
+Dataset tagger benchmarks: thumbnail generation and tag file read/write throughput.
+"""
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app.frontend.handlers.tools import dataset_tagger
+
+
+pytest.importorskip("pytest_benchmark")
+
+IMAGES = 10
+TAG_FILES = 200
+
+
+@pytest.mark.benchmark(group="dataset_tagger")
+def test_generate_thumbnail(benchmark: Any, tmp_path: Path) -> None:
+    """Generate the thumbnails of 10 1536x1024 images."""
+    image_module = pytest.importorskip("PIL.Image")
+    originals = []
+    for i in range(IMAGES):
+        original = tmp_path / f"image_{i}.png"
+        image_module.effect_noise((1536, 1024), 64).convert("RGB").save(original)
+        originals.append(original)
+    thumb_dir = dataset_tagger._ensure_thumb_dir_exists(str(tmp_path))
+
+    def generate_thumbnails() -> list[str | None]:
+        return [
+            dataset_tagger._generate_thumbnail(original, thumb_dir / original.name, original.name)
+            for original in originals
+        ]
+
+    thumbnails = benchmark.pedantic(generate_thumbnails, rounds=5)
+    assert all(thumbnails)
+
+
+@pytest.mark.benchmark(group="dataset_tagger")
+def test_tag_read_write(benchmark: Any, tmp_path: Path) -> None:
+    """Add a tag to, read, and remove it from the tag files of 200 images."""
+    filenames = [f"image_{i}.png" for i in range(TAG_FILES)]
+    for filename in filenames:
+        (tmp_path / filename).with_suffix(".txt").write_text("1girl, solo, smile, outdoors")
+
+    def tag_round_trip() -> None:
+        for filename in filenames:
+            dataset_tagger._write_tag_to_file(str(tmp_path), filename, "benchmark")
+            tags = dataset_tagger._read_tags_from_file((tmp_path / filename).with_suffix(".txt"))
+            assert "benchmark" in tags
+            dataset_tagger._remove_tag_from_file(str(tmp_path), filename, "benchmark")
+
+    benchmark(tag_round_trip)
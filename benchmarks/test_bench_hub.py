@@ -0,0 +1,49 @@
+"""
+Hub benchmark: `get_hub()` scanning a generated tree of 10k files.
+"""
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app.logic import hub
+
+
+pytest.importorskip("pytest_benchmark")
+
+CHARACTERS = 1_000
+LORAS_PER_CHARACTER = 3
+CHECKPOINTS = 100
+
+
+def _generate_hub_tree(models_path: Path) -> int:
+    """Create empty safetensors with their JSON and preview files. Returns the file count."""
+    files = []
+    loras_path = models_path / "SDXL" / "loras" / "pony" / "characters"
+    for character in range(CHARACTERS):
+        character_path = loras_path / f"character_{character}"
+        character_path.mkdir(parents=True)
+        for lora in range(LORAS_PER_CHARACTER):
+            for suffix in (".safetensors", ".json", ".preview.png"):
+                files.append(character_path / f"character_{character}_v{lora}{suffix}")
+    checkpoints_path = models_path / "SDXL" / "base_models" / "sdxl"
+    checkpoints_path.mkdir(parents=True)
+    for checkpoint in range(CHECKPOINTS):
+        files.append(checkpoints_path / f"checkpoint_{checkpoint}.safetensors")
+
+    for file in files:
+        file.touch()
+    return len(files)
+
+
+@pytest.mark.benchmark(group="hub")
+def test_get_hub_scan(benchmark: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Scan the hub for checkpoints and character LoRAs."""
+    assert _generate_hub_tree(tmp_path) >= 9_000 + CHECKPOINTS
+    monkeypatch.setattr(hub, "HUB_MODELS_PATH", tmp_path)
+
+    result = benchmark(hub.get_hub)
+
+    pony = next(m for m in result.hub_base_models if m.sd_base_model_id == "pony")
+    assert len(pony.safetensors_loras) == CHARACTERS * LORAS_PER_CHARACTER
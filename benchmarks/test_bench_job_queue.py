@@ -0,0 +1,108 @@
+"""
+Job queue benchmarks: dispatch latency vs. job table size, and the cost of the job
+broadcast that follows every job write vs. connected websocket clients.
+"""
+
+import asyncio
+import importlib
+from pathlib import Path
+from typing import Any
+
+import pytest
+from sqlalchemy import update
+from sqlmodel import Session, col
+
+from benchmarks.data import add_jobs
+from framework import crud, models
+from framework.core.backplane import LocalBackplane
+from framework.models.job import ResourceClass
+from framework.services.job_queue_ws_manager import JobQueueConnectionManager
+from framework.services.resource_scheduler import ResourceScheduler
+
+
+pytest.importorskip("pytest_benchmark")
+
+
+class FakeWebSocket:
+    """A client that receives everything instantly."""
+
+    def __init__(self) -> None:
+        self.received = 0
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        self.received += 1
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+@pytest.mark.benchmark(group="dispatch")
+@pytest.mark.parametrize("table_size", [100, 1_000, 10_000])
+def test_dispatch_latency(
+    benchmark: Any,
+    bench_db: Session,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    table_size: int,
+) -> None:
+    """Dispatch the next queued job, with `table_size` finished jobs in the table."""
+    import framework.tasks.execute_tasks as execute_tasks
+
+    # Claim the job, but don't enqueue it on Huey
+    monkeypatch.setattr(execute_tasks, "execute_job_task_default", lambda **kwargs: None)
+    scheduler = ResourceScheduler(
+        capacity={ResourceClass.gpu: 1, ResourceClass.cpu: 2, ResourceClass.io: 2},
+        lock_path=tmp_path / "job_scheduler.lock",
+    )
+    add_jobs(bench_db, table_size)
+    queued_ids = [job.id for job in add_jobs(bench_db, 10, status=models.JobStatus.queued)]
+
+    def requeue() -> None:
+        bench_db.exec(  # type: ignore
+            update(models.Job)
+            .where(col(models.Job.id).in_(queued_ids))
+            .values(status=models.JobStatus.queued)
+        )
+        bench_db.commit()
+
+    dispatched = benchmark.pedantic(
+        scheduler.dispatch, args=(bench_db,), kwargs={"limit": 1}, setup=requeue, rounds=30
+    )
+    assert len(dispatched) == 1
+
+
+@pytest.mark.benchmark(group="broadcast")
+@pytest.mark.parametrize("clients", [0, 10, 100])
+def test_broadcast_jobs_after(
+    benchmark: Any, bench_db: Session, monkeypatch: pytest.MonkeyPatch, clients: int
+) -> None:
+    """Update a job, which broadcasts the 200 jobs of the table to `clients` clients."""
+    manager = JobQueueConnectionManager(backplane=LocalBackplane())
+    # `framework.crud.job` is also the name of the JobCRUD instance, so patch the module
+    job_crud_module = importlib.import_module("framework.crud.job")
+    monkeypatch.setattr(job_crud_module, "job_queue_ws_manager", manager)
+    add_jobs(bench_db, 199)
+    job = add_jobs(bench_db, 1, status=models.JobStatus.pending)[0]
+
+    loop = asyncio.new_event_loop()
+    websockets = [FakeWebSocket() for _ in range(clients)]
+    for websocket in websockets:
+        loop.run_until_complete(manager.connect(websocket))  # type: ignore
+
+    def update_job() -> None:
+        loop.run_until_complete(
+            crud.job.update(bench_db, id=job.id, obj_in=models.JobUpdate(name="renamed"))
+        )
+
+    benchmark(update_job)
+
+    async def disconnect_all() -> None:
+        for websocket in websockets:
+            manager.disconnect(websocket)  # type: ignore
+        await asyncio.sleep(0)
+
+    loop.run_until_complete(disconnect_all())
+    loop.close()
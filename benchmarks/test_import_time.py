@@ -0,0 +1,63 @@
+"""
+Cold-start budget for the web process (`app.core.app`) and the Huey workers
+(`app.tasks`, imported by `huey_consumer`).
+
+Budgets can be scaled for slower machines with `IMPORT_TIME_BUDGET_SCALE`, e.g. `2`.
+"""
+
+import os
+
+import pytest
+
+from benchmarks.import_time import measure_import_time, parse_importtime
+
+
+# Module -> cumulative import time budget in ms
+IMPORT_TIME_BUDGETS_MS = {
+    "app.core.app": 3000,
+    "app.tasks": 2000,
+}
+
+# Heavy dependencies that have to be imported on first use, never at startup
+DEFERRED_MODULES = ["safetensors", "torch", "PIL", "emails", "phi"]
+
+# Workers import the script modules only when they run a script job
+WORKER_DEFERRED_MODULES = [
+    "app.scripts.choose_best_epoch",
+    "app.scripts.fix_civitai_download_filenames",
+    "app.scripts.generate_xy_for_lora_epochs",
+    "app.scripts.rsync_files",
+]
+
+BUDGET_SCALE = float(os.environ.get("IMPORT_TIME_BUDGET_SCALE", "1"))
+
+
+def test_parse_importtime() -> None:
+    """Test that the importtime output is parsed per module, skipping the header."""
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       233 |        233 |   _io\n"
+        "import time:      1500 |       2500 | app.tasks\n"
+    )
+
+    assert parse_importtime(output) == {"_io": (0.233, 0.233), "app.tasks": (1.5, 2.5)}
+
+
+@pytest.mark.parametrize("module,budget_ms", IMPORT_TIME_BUDGETS_MS.items())
+def test_import_time_budget(module: str, budget_ms: float) -> None:
+    """Test that a cold import stays within its budget and defers heavy dependencies."""
+    import_time = measure_import_time(module)
+
+    deferred = DEFERRED_MODULES + (WORKER_DEFERRED_MODULES if module == "app.tasks" else [])
+    imported_too_early = [
+        name
+        for name in import_time.imported
+        if any(name == d or name.startswith(f"{d}.") for d in deferred)
+    ]
+    assert not imported_too_early, f"{module} imports deferred modules: {imported_too_early}"
+
+    slowest = ", ".join(f"{name} {ms:.0f} ms" for name, ms in import_time.slowest(5))
+    assert import_time.cumulative_ms <= budget_ms * BUDGET_SCALE, (
+        f"{module} took {import_time.cumulative_ms:.0f} ms to import "
+        f"(budget {budget_ms * BUDGET_SCALE:.0f} ms). Slowest: {slowest}"
+    )
@@ -6,18 +6,22 @@ from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter, Body, Depends, HTTPException
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from sqlmodel import Session
 
+import app.scripts  # noqa: F401 Registers the app's scripts
 from app import paths, settings
 from framework import crud, models
 from framework.core.db import get_db
+from framework.logic.job_stats import get_job_stats
 from framework.services.job_queue import (
     kill_job_process,
     start_consumer_process,
     stop_consumer_process,
 )
 from framework.services.job_queue_ws_manager import job_queue_ws_manager
+from framework.services.scripts import script_registry
+from framework.workflows import Workflow, create_workflow_jobs
 
 
 router = APIRouter(prefix="/jobs", tags=["Job Queue"])
@@ -45,6 +49,54 @@ async def list_jobs(db: Session = Depends(get_db)) -> list[models.Job]:
     return await crud.job.get_all(db)
 
 
+@router.get("/scripts")
+async def list_scripts() -> list[dict[str, Any]]:
+    """
+    Retrieve the registered scripts and their metadata, without importing them.
+    """
+    return [
+        {
+            **info.model_dump(mode="json", exclude={"meta_schema"}),
+            "meta_schema": info.meta_schema.model_json_schema() if info.meta_schema else None,
+        }
+        for info in script_registry.get_all()
+    ]
+
+
+@router.get("/stats", response_model=list[models.JobStats])
+async def get_stats(
+    env_name: str | None = None, days: int = 30, db: Session = Depends(get_db)
+) -> list[models.JobStats]:
+    """
+    Retrieve p50/p95 queue wait and run times of finished jobs per type, script and queue.
+    """
+    return get_job_stats(db, env_name=env_name, days=days)
+
+
+@router.post("/workflows", response_model=list[models.Job], status_code=201)
+async def create_workflow(
+    db: Session = Depends(get_db), workflow: Workflow = Body(...)
+) -> list[models.Job]:
+    """
+    Create the jobs of a workflow. Each job is queued and runs once its parents are done.
+    """
+    try:
+        return create_workflow_jobs(db, workflow)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.get("/workflows/{workflow_id}", response_model=list[models.Job])
+async def get_workflow_jobs(workflow_id: UUID, db: Session = Depends(get_db)) -> list[models.Job]:
+    """
+    Retrieve the jobs of a workflow.
+    """
+    jobs = await crud.job.get_multi(db, workflow_id=workflow_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail=f"Workflow {workflow_id} not found.")
+    return jobs
+
+
 @router.get("/{job_id}", response_model=models.Job)
 async def get_job(job_id: UUID, db: Session = Depends(get_db)) -> models.Job:
     """
@@ -137,7 +189,7 @@ async def update_job_status(
 
 @router.post("/{job_id}/kill")
 async def kill_job(job_id: str, db: Session = Depends(get_db)) -> dict[str, Any]:
-    """Immediately kill a running job by its PID.
+    """Stop a running job: kill its process group, or cancel its script.
 
     Args:
         job_id: The ID of the job to kill.
@@ -155,14 +207,19 @@ async def kill_job(job_id: str, db: Session = Depends(get_db)) -> dict[str, Any]
 
 
 @router.get("/{job_id}/log", response_class=PlainTextResponse)
-def get_job_log(job_id: str) -> PlainTextResponse:
+def get_job_log(
+    job_id: str, retry: int | None = None, db: Session = Depends(get_db)
+) -> PlainTextResponse:
     """
     Retrieves the log file for a specific job.
-    For now, it retrieves the log of the first run (retry_count=0).
+    By default the log of the job's latest attempt, or of the given retry.
     """
-    # NOTE: This currently only fetches the log for the first run (retry 0).
-    # A more robust solution would handle multiple retries.
-    log_file_name = f"job_{job_id}_retry_0.txt"
+    if retry is None:
+        db_job = crud.job.sync.get(db, id=job_id)
+        if not db_job:
+            raise HTTPException(status_code=404, detail="Job not found.")
+        retry = db_job.retry_count
+    log_file_name = f"job_{job_id}_retry_{retry}.txt"
     log_file_path = paths.JOB_LOGS_PATH / log_file_name
 
     if not log_file_path.exists():
@@ -171,6 +228,27 @@ def get_job_log(job_id: str) -> PlainTextResponse:
     return PlainTextResponse(content=log_file_path.read_text())
 
 
+@router.get("/{job_id}/profile")
+def get_job_profile(
+    job_id: str, retry: int | None = None, db: Session = Depends(get_db)
+) -> FileResponse:
+    """
+    Retrieves the profile of a job run with `"profile": true` in its meta.
+    By default the profile of the job's latest attempt, or of the given retry.
+    """
+    if retry is None:
+        db_job = crud.job.sync.get(db, id=job_id)
+        if not db_job:
+            raise HTTPException(status_code=404, detail="Job not found.")
+        retry = db_job.retry_count
+    for suffix, media_type in ((".html", "text/html"), (".txt", "text/plain")):
+        profile_path = paths.JOB_LOGS_PATH / f"job_{job_id}_retry_{retry}_profile{suffix}"
+        if profile_path.exists():
+            return FileResponse(profile_path, media_type=media_type)
+
+    raise HTTPException(status_code=404, detail="Profile not found.")
+
+
 @router.post("/start-consumer")
 async def start_huey_consumer(body: dict[str, Any] = Body(default={})) -> JSONResponse:
     """Start Huey consumer for the specified queue (or all if not specified)."""
@@ -5,7 +5,7 @@ from sqlmodel import Session
 
 from app import logger, paths, settings
 from framework import crud
-from framework.core.db import get_db
+from framework.core.db import get_db, get_db_context
 from framework.services.job_queue import get_consumer_status_map
 from framework.services.job_queue_ws_manager import job_queue_ws_manager
 
@@ -21,11 +21,12 @@ async def websocket_job_queue(websocket: WebSocket, db: Session = Depends(get_db
     jobs = await crud.job.get_all_jobs_for_env_name(db=db, env_name=settings.ENV_NAME)
     consumer_status = get_consumer_status_map()
     print(f"Consumer status: {consumer_status}")
-    await websocket.send_json(
+    await job_queue_ws_manager.send(
+        websocket,
         {
             "jobs": [j.model_dump(mode="json") for j in jobs],
             "consumer_status": consumer_status,
-        }
+        },
     )
     log_task = None
     try:
@@ -38,7 +39,9 @@ async def websocket_job_queue(websocket: WebSocket, db: Session = Depends(get_db
                 msg = json.loads(data)
             except Exception:
                 msg = None
-            if msg and msg.get("type") == "subscribe_log" and "topic" in msg:
+            if msg and msg.get("type") == "pong":
+                job_queue_ws_manager.receive_pong(websocket)
+            elif msg and msg.get("type") == "subscribe_log" and "topic" in msg:
                 # Cancel any previous log task
                 if log_task:
                     log_task.cancel()
@@ -59,28 +62,52 @@ async def websocket_job_queue(websocket: WebSocket, db: Session = Depends(get_db
             log_task.cancel()
 
 
-async def stream_job_log(websocket: WebSocket, topic: str) -> None:
-    """Stream the job log file to the websocket client in real-time."""
-    log_file_name = f"job_{topic}_retry_0.txt"
-    from app import paths
+def _get_job_retry_count(job_id: str) -> int:
+    """The retry count of a job, i.e. the attempt whose log is written. 0 if not found."""
+    with get_db_context() as db:
+        db_job = crud.job.sync.get(db, id=job_id)
+        return db_job.retry_count if db_job else 0
+
 
-    log_path = paths.JOB_LOGS_PATH / log_file_name
+async def stream_job_log(websocket: WebSocket, topic: str) -> None:
+    """
+    Stream the job log file to the websocket client in real-time.
+    Follows the job to the log of its next attempt when it is retried.
+    """
+    retry_count = await asyncio.to_thread(_get_job_retry_count, topic)
+    log_path = paths.JOB_LOGS_PATH / f"job_{topic}_retry_{retry_count}.txt"
     logger.debug(f"log_path: {log_path}")
     last_pos = 0
     try:
         while True:
-            if not log_path.exists():
-                await asyncio.sleep(0.5)
-                logger.warning(f"log_path does not exist: {log_path}")
-                continue
-            with open(log_path) as f:
-                f.seek(last_pos)
-                new_content = f.read()
+            new_content = ""
+            if log_path.exists():
+                with open(log_path) as f:
+                    f.seek(last_pos)
+                    new_content = f.read()
+                    last_pos = f.tell()
                 if new_content:
                     await websocket.send_json(
                         {"type": "log_update", "topic": topic, "content": new_content}
                     )
-                    last_pos = f.tell()
+            else:
+                logger.warning(f"log_path does not exist: {log_path}")
+
+            if not new_content:
+                # Nothing new: check whether the job moved on to another attempt
+                current_retry_count = await asyncio.to_thread(_get_job_retry_count, topic)
+                if current_retry_count != retry_count:
+                    retry_count = current_retry_count
+                    log_path = paths.JOB_LOGS_PATH / f"job_{topic}_retry_{retry_count}.txt"
+                    last_pos = 0
+                    await websocket.send_json(
+                        {
+                            "type": "log_update",
+                            "topic": topic,
+                            "content": f"\n--- Retry {retry_count} ---\n",
+                        }
+                    )
+                    continue
             await asyncio.sleep(0.5)
     except asyncio.CancelledError:
         pass
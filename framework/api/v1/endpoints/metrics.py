@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Response
+
+import framework.services.metrics_collectors  # noqa: F401 Registers the metrics collectors
+from framework.core.prometheus import CONTENT_TYPE, registry
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    """
+    Metrics in the Prometheus text format, for scraping. With several workers, the
+    metrics of all workers are added up (see framework.core.prometheus).
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
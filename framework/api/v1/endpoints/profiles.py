@@ -0,0 +1,40 @@
+"""
+API endpoints for the reports of profiled requests (see framework.middleware.profiling).
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from app import paths
+from framework import models
+from framework.api import deps
+
+
+router = APIRouter(prefix="/profiles", tags=["Profiles"])
+
+
+@router.get("/", response_model=list[str])
+def get_profiles(
+    _: models.User = Depends(deps.get_current_active_superuser),
+) -> list[str]:
+    """
+    Lists the saved request profiles, newest first.
+    """
+    if not paths.PROFILES_PATH.exists():
+        return []
+    return sorted((p.name for p in paths.PROFILES_PATH.iterdir() if p.is_file()), reverse=True)
+
+
+@router.get("/{name}")
+def get_profile(
+    name: str,
+    _: models.User = Depends(deps.get_current_active_superuser),
+) -> FileResponse:
+    """
+    Retrieves the report of a profiled request, by the name from its X-Profile-Report header.
+    """
+    profile_path = paths.PROFILES_PATH / name
+    if profile_path.parent != paths.PROFILES_PATH or not profile_path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    media_type = "text/html" if profile_path.suffix == ".html" else "text/plain"
+    return FileResponse(profile_path, media_type=media_type)
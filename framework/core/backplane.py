@@ -0,0 +1,324 @@
+"""
+Backplanes carry websocket broadcasts between processes, so every Uvicorn worker (and
+Huey consumer) can broadcast to the clients connected to any worker.
+
+A websocket manager publishes its broadcasts on its channel. Every process that started
+the backplane receives them, including the publishing one, and sends them to its own
+connections. Until a backplane is started (or shared, in processes without websocket
+clients like the Huey consumers), messages are only delivered within the process.
+
+Backplanes:
+- Local: in-process only. Enough with a single Uvicorn worker.
+- SQLite: an event table in a shared SQLite file, polled by every worker.
+- Redis: Redis pub/sub. Requires `redis`.
+- Fake: the Redis backplane on an in-process fake Redis, for tests.
+"""
+
+import asyncio
+import fnmatch
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from app import logger, paths, settings
+
+
+Handler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+class Backplane(ABC):
+    """Base class for websocket backplanes."""
+
+    name: str = "base"
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+        # Whether messages are published to the other processes
+        self.shared = False
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """Call `handler` with every message published on `channel`, from any process."""
+        if handler not in self._handlers[channel]:
+            self._handlers[channel].append(handler)
+
+    async def deliver(self, channel: str, message: dict[str, Any]) -> None:
+        for handler in list(self._handlers.get(channel, [])):
+            try:
+                await handler(message)
+            except Exception as e:
+                logger.error(f"Backplane handler for {channel} failed: {e}")
+
+    async def publish(self, channel: str, message: dict[str, Any]) -> None:
+        """
+        Publish a message to the subscribers of a channel in all processes, or only in this
+        process if the backplane is not shared.
+        """
+        if self.shared:
+            await self._publish(channel, message)
+        else:
+            await self.deliver(channel, message)
+
+    @abstractmethod
+    async def _publish(self, channel: str, message: dict[str, Any]) -> None:
+        """Publish a message to the other processes."""
+
+    def share(self) -> None:
+        """Publish messages to the other processes, without receiving theirs."""
+        self.shared = True
+
+    async def start(self) -> None:
+        """Publish messages to the other processes and start receiving theirs."""
+        self.share()
+
+    async def stop(self) -> None:
+        """Stop receiving messages and release any resources held by the backplane."""
+        self.shared = False
+
+
+class LocalBackplane(Backplane):
+    """Delivers messages within this process only."""
+
+    name = "local"
+
+    async def _publish(self, channel: str, message: dict[str, Any]) -> None:
+        await self.deliver(channel, message)
+
+
+class SQLiteBackplane(Backplane):
+    """
+    Shares messages through an event table that every process polls.
+
+    Args:
+        path: SQLite file shared by the processes.
+        poll_interval: Seconds between polls.
+        retention_seconds: Events older than this are deleted.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self, path: Path, poll_interval: float = 0.2, retention_seconds: float = 60
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._last_id = 0
+        self._task: asyncio.Task[None] | None = None
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._poll_lock = asyncio.Lock()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "channel TEXT NOT NULL, "
+                "payload TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _insert(self, channel: str, payload: str) -> None:
+        with self._lock:
+            self._get_conn().execute(
+                "INSERT INTO events (channel, payload, created_at) VALUES (?, ?, ?)",
+                (channel, payload, time.time()),
+            )
+
+    def _fetch(self) -> list[tuple[int, str, str]]:
+        with self._lock:
+            return self._get_conn().execute(
+                "SELECT id, channel, payload FROM events WHERE id > ? ORDER BY id",
+                (self._last_id,),
+            ).fetchall()
+
+    def _prune(self) -> None:
+        with self._lock:
+            self._get_conn().execute(
+                "DELETE FROM events WHERE created_at < ?",
+                (time.time() - self.retention_seconds,),
+            )
+
+    def _get_last_id(self) -> int:
+        with self._lock:
+            row = self._get_conn().execute("SELECT MAX(id) FROM events").fetchone()
+        return row[0] or 0
+
+    async def _publish(self, channel: str, message: dict[str, Any]) -> None:
+        await asyncio.to_thread(self._insert, channel, json.dumps(message, default=str))
+
+    async def poll(self) -> None:
+        """Deliver the events published since the last poll."""
+        async with self._poll_lock:
+            for id, channel, payload in await asyncio.to_thread(self._fetch):
+                self._last_id = id
+                await self.deliver(channel, json.loads(payload))
+
+    async def _run(self) -> None:
+        last_prune = time.monotonic()
+        while True:
+            try:
+                await self.poll()
+                if time.monotonic() - last_prune > self.retention_seconds:
+                    await asyncio.to_thread(self._prune)
+                    last_prune = time.monotonic()
+            except Exception as e:
+                logger.error(f"Error polling the websocket backplane: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self) -> None:
+        await super().start()
+        # Only deliver the events published from now on
+        self._last_id = await asyncio.to_thread(self._get_last_id)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RedisBackplane(Backplane):
+    """
+    Shares messages through Redis pub/sub.
+
+    Args:
+        url: Redis URL.
+        client: A `redis.asyncio` client (or `FakeRedis`). Created from the URL if None.
+    """
+
+    name = "redis"
+    prefix = "websocket:"
+
+    def __init__(self, url: str = "", client: Any = None) -> None:
+        super().__init__()
+        if client is None:
+            import redis.asyncio  # Optional dependency: `redis`
+
+            client = redis.asyncio.from_url(url)
+        self._client = client
+        self._pubsub: Any = None
+        self._task: asyncio.Task[None] | None = None
+
+    async def _publish(self, channel: str, message: dict[str, Any]) -> None:
+        await self._client.publish(f"{self.prefix}{channel}", json.dumps(message, default=str))
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                msg = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if msg is None:
+                    continue
+                channel = msg["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                await self.deliver(channel.removeprefix(self.prefix), json.loads(msg["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error receiving from the websocket backplane: {e}")
+                await asyncio.sleep(1)
+
+    async def start(self) -> None:
+        await super().start()
+        self._pubsub = self._client.pubsub()
+        await self._pubsub.psubscribe(f"{self.prefix}*")
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+
+class FakePubSub:
+    """The part of a `redis.asyncio` PubSub the Redis backplane uses."""
+
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.patterns: list[str] = []
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    async def psubscribe(self, pattern: str) -> None:
+        self.patterns.append(pattern)
+        if self not in self.redis.pubsubs:
+            self.redis.pubsubs.append(self)
+
+    async def get_message(
+        self, ignore_subscribe_messages: bool = False, timeout: float = 0.0
+    ) -> dict[str, Any] | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self) -> None:
+        if self in self.redis.pubsubs:
+            self.redis.pubsubs.remove(self)
+
+
+class FakeRedis:
+    """In-process fake of the `redis.asyncio` client, shared by backplanes in tests."""
+
+    def __init__(self) -> None:
+        self.pubsubs: list[FakePubSub] = []
+
+    async def publish(self, channel: str, data: str) -> int:
+        receivers = 0
+        for pubsub in self.pubsubs:
+            if any(fnmatch.fnmatchcase(channel, pattern) for pattern in pubsub.patterns):
+                pubsub.queue.put_nowait(
+                    {"type": "pmessage", "channel": channel.encode(), "data": data.encode()}
+                )
+                receivers += 1
+        return receivers
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self)
+
+
+def create_backplane(backend: str = "auto") -> Backplane:
+    """Create a websocket backplane.
+
+    Args:
+        backend: `auto`, `local`, `sqlite`, `redis` or `fake`. `auto` uses the local
+            backplane with a single Uvicorn worker, and SQLite with several.
+    """
+    if backend == "auto":
+        backend = "local" if settings.UVICORN_WORKERS <= 1 else "sqlite"
+    if backend == "local":
+        return LocalBackplane()
+    if backend == "sqlite":
+        return SQLiteBackplane(path=paths.WEBSOCKET_BACKPLANE_DB_PATH)
+    if backend == "redis":
+        return RedisBackplane(url=settings.WEBSOCKET_BACKPLANE_REDIS_URL)
+    if backend == "fake":
+        return RedisBackplane(client=FakeRedis())
+    raise ValueError(f"Unknown websocket backplane: {backend}")
+
+
+# Singleton instance of the backplane, shared by the websocket managers of this process
+backplane = create_backplane(settings.WEBSOCKET_BACKPLANE)
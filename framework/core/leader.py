@@ -0,0 +1,66 @@
+"""
+Leader election between the Uvicorn workers.
+
+Every worker runs the app's lifespan, but the services that must only run once per
+instance (the Huey consumers, schedulers, app supervisor, idle watcher, job reaper,
+metrics sampler and watchers) run in the worker holding the leader lock. The lock is an
+fcntl lock on a file shared by the workers, released by the OS when its process exits,
+so one of the other workers takes over.
+"""
+
+import asyncio
+import fcntl
+from pathlib import Path
+from typing import IO
+
+from app import logger, paths
+
+
+class LeaderLock:
+    """
+    Non-blocking file lock held by the leader for its lifetime.
+
+    Args:
+        lock_path: File locked by the leader, shared by all workers.
+        retry_interval: Seconds between the attempts of a waiting worker.
+    """
+
+    def __init__(self, lock_path: Path, retry_interval: float = 5) -> None:
+        self.lock_path = lock_path
+        self.retry_interval = retry_interval
+        self._lock_file: IO[str] | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_file is not None
+
+    def try_acquire(self) -> bool:
+        """Become the leader, unless another worker is. Returns whether this worker leads."""
+        if self._lock_file is not None:
+            return True
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.lock_path, "a")  # noqa: SIM115 Held until released
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(f"This worker is the leader (lock: {self.lock_path}).")
+        return True
+
+    async def wait(self) -> None:
+        """Wait until this worker is the leader."""
+        while not self.try_acquire():
+            await asyncio.sleep(self.retry_interval)
+
+    def release(self) -> None:
+        if self._lock_file is None:
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._lock_file.close()
+        self._lock_file = None
+
+
+# Singleton instance of the leader lock
+leader_lock = LeaderLock(lock_path=paths.LEADER_LOCK_PATH)
@@ -0,0 +1,377 @@
+"""
+Dependency-free Prometheus metrics: counters, gauges and histograms with labels, rendered
+in the Prometheus text exposition format by the `/metrics` endpoint.
+
+Values that are cheap to read but expensive to keep up to date are set by collectors,
+which the registry calls before every render:
+
+    def collect_example() -> None:
+        example_gauge.set(len(get_items()))
+
+    registry.add_collector(collect_example)
+
+Metrics are kept per process. With several Uvicorn workers, each scrape reaches one
+worker, so `enable_multiprocess` makes every worker write its values to a shared
+directory every few seconds, and a render adds up the values of all workers. Metrics
+read from state shared by the workers (e.g. the job table) are registered with
+`shared=True`, with their collectors: they are the same on every worker, so only the
+worker answering the scrape reports them. A worker that exits stops being counted once
+its snapshot is stale, which Prometheus sees as a counter reset.
+"""
+
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+from app import logger
+
+
+LabelValues = tuple[str, ...]
+
+# Latency buckets in seconds, from a fast cached page to a slow export
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+class Metric(ABC):
+    """Base class for metrics. Values are kept per combination of label values."""
+
+    type: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove the values of all label combinations."""
+
+    @abstractmethod
+    def dump(self) -> list[Any]:
+        """The values, JSON serializable, to add to those of another process."""
+
+    @abstractmethod
+    def samples(self, dumps: Sequence[list[Any]] = ()) -> list[str]:
+        """
+        Lines of the text exposition format, without the HELP and TYPE header.
+
+        Args:
+            dumps: Values of other processes (see `dump`), added to the values of this one.
+        """
+
+    def render(self, dumps: Sequence[list[Any]] = ()) -> str:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type}",
+            *self.samples(dumps),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A value that only goes up, like the number of requests served."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented by non-negative amounts.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def dump(self) -> list[Any]:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def samples(self, dumps: Sequence[list[Any]] = ()) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        for dumped in dumps:
+            for key, value in dumped:
+                values[tuple(key)] = values.get(tuple(key), 0) + value
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Gauge(Counter):
+    """A value that goes up and down, like the number of requests in flight."""
+
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Counts observations (e.g. request durations) in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: (count per bucket, with the +Inf bucket last, sum)
+        self._values: dict[LabelValues, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def get_count(self, **labels: str) -> int:
+        counts, _ = self._values.get(self._key(labels)) or ([0], 0.0)
+        return sum(counts)
+
+    def get_sum(self, **labels: str) -> float:
+        _, total = self._values.get(self._key(labels)) or ([0], 0.0)
+        return total
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def dump(self) -> list[Any]:
+        with self._lock:
+            return [
+                [list(key), list(counts), total] for key, (counts, total) in self._values.items()
+            ]
+
+    def samples(self, dumps: Sequence[list[Any]] = ()) -> list[str]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for dumped in dumps:
+            for key, counts, total in dumped:
+                key = tuple(key)
+                if key in values:
+                    own_counts, own_total = values[key]
+                    counts = [a + b for a, b in zip(own_counts, counts, strict=True)]
+                    total += own_total
+                values[key] = (counts, total)
+        names = (*self.labelnames, "le")
+        lines = []
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                labels = _format_labels(names, (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """The metrics of this process, and the collectors that update them before a render."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        # Names of the metrics every worker reads from shared state
+        self._shared: set[str] = set()
+        self._collectors: list[Callable[[], None]] = []
+        self._shared_collectors: list[Callable[[], None]] = []
+        self._snapshot_dir: Path | None = None
+        self._snapshot_interval = 5.0
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def register(self, metric: Metric, shared: bool = False) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self._metrics[metric.name] = metric
+        if shared:
+            self._shared.add(metric.name)
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), shared: bool = False
+    ) -> Counter:
+        counter = Counter(name, documentation, labelnames)
+        self.register(counter, shared=shared)
+        return counter
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), shared: bool = False
+    ) -> Gauge:
+        gauge = Gauge(name, documentation, labelnames)
+        self.register(gauge, shared=shared)
+        return gauge
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        self.register(histogram)
+        return histogram
+
+    def add_collector(self, collector: Callable[[], None], shared: bool = False) -> None:
+        """
+        Add a collector, called before every render. Shared collectors set shared metrics,
+        so they are only called by the worker answering the scrape.
+        """
+        collectors = self._shared_collectors if shared else self._collectors
+        if collector not in collectors:
+            collectors.append(collector)
+
+    def _run_collectors(self, collectors: list[Callable[[], None]]) -> None:
+        for collector in list(collectors):
+            try:
+                collector()
+            except Exception as e:
+                logger.error(f"Metrics collector {collector.__name__} failed: {e}")
+
+    def collect(self) -> None:
+        self._run_collectors(self._collectors)
+        self._run_collectors(self._shared_collectors)
+
+    def enable_multiprocess(self, snapshot_dir: Path, interval: float = 5.0) -> None:
+        """
+        Add up the metrics of the processes (Uvicorn workers) sharing `snapshot_dir`: this
+        process writes its values there every `interval` seconds, until `stop`.
+        """
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        self._snapshot_dir = snapshot_dir
+        self._snapshot_interval = interval
+        self._stop_event.clear()
+        self.write_snapshot()
+        self._thread = threading.Thread(target=self._write_snapshots, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop writing snapshots, and remove the snapshot of this process."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._snapshot_dir:
+            (self._snapshot_dir / f"{os.getpid()}.json").unlink(missing_ok=True)
+
+    def _write_snapshots(self) -> None:
+        while not self._stop_event.wait(self._snapshot_interval):
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                logger.error(f"Failed to write the metrics snapshot: {e}")
+
+    def write_snapshot(self) -> None:
+        """Write the values of the metrics of this process, for the other processes."""
+        if self._snapshot_dir is None:
+            return
+        self._run_collectors(self._collectors)
+        snapshot = {
+            name: metric.dump()
+            for name, metric in self._metrics.items()
+            if name not in self._shared
+        }
+        path = self._snapshot_dir / f"{os.getpid()}.json"
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(snapshot))
+        temp_path.replace(path)
+
+    def read_snapshots(self) -> list[dict[str, list[Any]]]:
+        """The snapshots of the other live processes, skipping stale ones (exited workers)."""
+        if self._snapshot_dir is None:
+            return []
+        own_name = f"{os.getpid()}.json"
+        stale_before = time.time() - 3 * self._snapshot_interval
+        snapshots = []
+        for path in self._snapshot_dir.glob("*.json"):
+            try:
+                if path.name == own_name or path.stat().st_mtime < stale_before:
+                    continue
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                # Removed by its process in the meantime
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        """Run the collectors and render all metrics in the text exposition format."""
+        self.collect()
+        snapshots = self.read_snapshots()
+        rendered = []
+        for name, metric in self._metrics.items():
+            if name in self._shared:
+                dumps = []
+            else:
+                dumps = [snapshot[name] for snapshot in snapshots if name in snapshot]
+            rendered.append(metric.render(dumps))
+        return "\n".join(rendered) + "\n"
+
+
+# Content type of the text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Singleton instance of the registry of this process
+registry = Registry()
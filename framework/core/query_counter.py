@@ -0,0 +1,126 @@
+"""
+Counts the SQL statements run by a block of code, to catch N+1 queries.
+
+A statement's shape is the statement with its literals and parameter lists collapsed,
+so `SELECT ... WHERE id = ?` run once per row of a list has a single shape. Shapes run
+many times in a block are reported as repeated: usually a query in a loop that could
+be a single `IN (...)` query or a join.
+
+    with QueryCounter() as counter:
+        export_data(db)
+    print(counter.count, counter.get_repeated_shapes())
+
+By default a counter only sees the statements of its own context: the block, and the
+threads it hands work to with a copy of its context (like FastAPI's threadpool). With
+`local=False` it sees every statement run on the engine, from any thread, which tests
+need since the test client runs the app in another thread.
+"""
+
+import re
+import threading
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from framework.core.db import engine as default_engine
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER_LIST = re.compile(r"\((?:\s*(?:\?|%s|:\w+)\s*,)+\s*(?:\?|%s|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def get_statement_shape(statement: str) -> str:
+    """The statement with its literals and parameter lists collapsed."""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _PARAMETER_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+_local_counters: ContextVar[tuple["QueryCounter", ...]] = ContextVar(
+    "local_query_counters", default=()
+)
+_global_counters: list["QueryCounter"] = []
+_global_lock = threading.Lock()
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    counters = _local_counters.get()
+    if _global_counters:
+        with _global_lock:
+            counters = (*counters, *_global_counters)
+    for counter in counters:
+        if counter.engine is conn.engine:
+            counter.record(statement)
+
+
+def _listen(engine: Engine) -> None:
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryCounter:
+    """
+    Context manager recording the SQL statements run while it is active.
+
+    Args:
+        engine: Engine to count the statements of. Defaults to the app's engine.
+        local: Only count the statements of this context (see the module docstring).
+    """
+
+    def __init__(self, engine: Engine | None = None, local: bool = True) -> None:
+        self.engine = engine or default_engine
+        self.local = local
+        self.statements: list[str] = []
+        self._token: Token[tuple[QueryCounter, ...]] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def record(self, statement: str) -> None:
+        with self._lock:
+            self.statements.append(statement)
+
+    def get_shapes(self) -> Counter[str]:
+        """How many times each statement shape ran."""
+        return Counter(get_statement_shape(statement) for statement in self.statements)
+
+    def get_repeated_shapes(self, threshold: int = 2) -> dict[str, int]:
+        """The shapes that ran at least `threshold` times, most repeated first."""
+        return {
+            shape: count
+            for shape, count in self.get_shapes().most_common()
+            if count >= threshold
+        }
+
+    def summary(self, threshold: int = 2, max_length: int = 200) -> str:
+        """A report of the statement count and repeated shapes, for logs and assertions."""
+        lines = [f"{self.count} queries"]
+        for shape, count in self.get_repeated_shapes(threshold).items():
+            lines.append(f"  {count}x {shape[:max_length]}")
+        return "\n".join(lines)
+
+    def __enter__(self) -> "QueryCounter":
+        _listen(self.engine)
+        if self.local:
+            self._token = _local_counters.set((*_local_counters.get(), self))
+        else:
+            with _global_lock:
+                _global_counters.append(self)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._token is not None:
+            _local_counters.reset(self._token)
+            self._token = None
+        else:
+            with _global_lock:
+                if self in _global_counters:
+                    _global_counters.remove(self)
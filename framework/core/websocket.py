@@ -1,24 +1,197 @@
-from typing import Any
+"""
+Websocket connection managers, which broadcast messages to all their connections.
 
+A broadcast serializes the message once and puts it in the bounded send queue of every
+connection. Each connection has its own writer task, so a slow or half-dead client only
+delays itself:
+
+- State snapshots (untyped messages, e.g. `{"jobs": [...]}`) replace the pending snapshot
+  with the same keys, so a slow client gets the latest state instead of every state.
+- When the queue is still full, the oldest message is dropped, or the connection is
+  evicted for managers whose messages can't be skipped (deltas), so the client
+  reconnects and resyncs.
+- A send that takes longer than the send timeout evicts the connection.
+
+Broadcasts go through the backplane (see framework.core.backplane), so with several
+Uvicorn workers every worker sends them to its own connections.
+
+Idle connections get a `{"type": "ping"}` message every ping interval. Clients that
+answer with `{"type": "pong"}` (passed to `receive_pong` by the endpoint) are evicted
+once they stop answering; others are only evicted when a send fails.
+"""
+
+import asyncio
+import contextlib
+import time
+import weakref
+from collections import deque
+from typing import Any, ClassVar
+
+import orjson
 from fastapi import WebSocket
 
+from app import logger
+from framework.core.backplane import Backplane, backplane as default_backplane
+
+
+def dumps(message: dict[str, Any]) -> str:
+    """Serialize a message to JSON."""
+    return orjson.dumps(message, default=str).decode()
+
+
+PING_MESSAGE = dumps({"type": "ping"})
+
+
+class WebSocketConnection:
+    """A websocket with its send queue. The writer task sends the queued messages."""
+
+    def __init__(self, websocket: WebSocket, max_queue_size: int) -> None:
+        self.websocket = websocket
+        self.max_queue_size = max_queue_size
+        # Pending messages as (coalesce key, JSON text)
+        self.queue: deque[tuple[str | None, str]] = deque()
+        self.ready = asyncio.Event()
+        self.last_pong: float | None = None
+        self.writer: asyncio.Task[None] | None = None
+
+    def put(self, text: str, coalesce_key: str | None = None) -> bool:
+        """
+        Queue a message. A pending message with the same coalesce key is replaced.
+
+        Returns:
+            False if the queue was full and the oldest message was dropped.
+        """
+        if coalesce_key is not None:
+            for i, (key, _) in enumerate(self.queue):
+                if key == coalesce_key:
+                    self.queue[i] = (coalesce_key, text)
+                    return True
+
+        dropped = len(self.queue) >= self.max_queue_size
+        if dropped:
+            self.queue.popleft()
+        self.queue.append((coalesce_key, text))
+        self.ready.set()
+        return not dropped
+
 
 class WebSocketManager:
-    def __init__(self) -> None:
-        self.active_connections: list[WebSocket] = []
+    """
+    Keeps the connections of a websocket endpoint and broadcasts messages to them.
+
+    Args:
+        channel: Backplane channel of the broadcasts. Defaults to the class name.
+        backplane: Backplane the broadcasts go through. Defaults to the shared one.
+        max_queue_size: Pending messages per connection before old ones are dropped.
+        send_timeout: Seconds a send may take before the connection is evicted.
+        ping_interval: Seconds without messages after which a connection is pinged.
+    """
+
+    # Evict connections whose queue is full instead of dropping messages
+    evict_when_full: bool = False
+    # Every manager of this process, for the connection metrics
+    instances: ClassVar[weakref.WeakSet["WebSocketManager"]] = weakref.WeakSet()
+
+    def __init__(
+        self,
+        channel: str | None = None,
+        backplane: Backplane | None = None,
+        max_queue_size: int = 32,
+        send_timeout: float = 10,
+        ping_interval: float = 20,
+    ) -> None:
+        self.channel = channel or type(self).__name__
+        self.backplane = backplane or default_backplane
+        self.backplane.subscribe(self.channel, self.broadcast_local)
+        self.max_queue_size = max_queue_size
+        self.send_timeout = send_timeout
+        self.ping_interval = ping_interval
+        self.connections: dict[WebSocket, WebSocketConnection] = {}
+        WebSocketManager.instances.add(self)
+
+    @property
+    def active_connections(self) -> list[WebSocket]:
+        return list(self.connections)
 
     async def connect(self, websocket: WebSocket) -> None:
         await websocket.accept()
-        self.active_connections.append(websocket)
+        connection = WebSocketConnection(websocket, max_queue_size=self.max_queue_size)
+        connection.writer = asyncio.create_task(self._write(connection))
+        self.connections[websocket] = connection
 
     def disconnect(self, websocket: WebSocket) -> None:
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        connection = self.connections.pop(websocket, None)
+        if connection and connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    async def _evict(self, connection: WebSocketConnection, reason: str) -> None:
+        logger.warning(f"Evicting websocket connection: {reason}")
+        self.disconnect(connection.websocket)
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(connection.websocket.close(code=1011), timeout=1)
+
+    def get_coalesce_key(self, message: dict[str, Any]) -> str | None:
+        """
+        Messages with the same key replace each other in a connection's queue.
+        Untyped messages are state snapshots, keyed by their fields; typed messages
+        (deltas, log lines) are all sent.
+        """
+        if "type" in message:
+            return None
+        return ",".join(sorted(message))
+
+    async def send(self, websocket: WebSocket, message: dict[str, Any]) -> None:
+        """Queue a message for one connection, in order with the broadcasts."""
+        connection = self.connections.get(websocket)
+        if connection is None:
+            await websocket.send_text(dumps(message))
+            return
+        await self._put(connection, dumps(message), self.get_coalesce_key(message))
 
     async def broadcast(self, message: dict[str, Any]) -> None:
-        for connection in self.active_connections:
+        """Broadcast a message to the connections of every process."""
+        await self.backplane.publish(self.channel, message)
+
+    async def broadcast_local(self, message: dict[str, Any]) -> None:
+        """Queue a message for every connection of this process, serialized once."""
+        text = dumps(message)
+        coalesce_key = self.get_coalesce_key(message)
+        for connection in list(self.connections.values()):
+            await self._put(connection, text, coalesce_key)
+
+    async def _put(self, connection: WebSocketConnection, text: str, key: str | None) -> None:
+        if self.evict_when_full and len(connection.queue) >= self.max_queue_size:
+            await self._evict(connection, "send queue full")
+            return
+        if not connection.put(text, coalesce_key=key):
+            logger.debug("Websocket send queue full, dropped the oldest message.")
+
+    def receive_pong(self, websocket: WebSocket) -> None:
+        """Record a pong from the client, which opts the connection into ping timeouts."""
+        connection = self.connections.get(websocket)
+        if connection:
+            connection.last_pong = time.monotonic()
+
+    async def _write(self, connection: WebSocketConnection) -> None:
+        while True:
             try:
-                await connection.send_json(message)
-            except Exception:
-                # Remove dead connections
-                self.disconnect(connection)
+                await asyncio.wait_for(connection.ready.wait(), timeout=self.ping_interval)
+            except asyncio.TimeoutError:
+                last_pong = connection.last_pong
+                if last_pong is not None and time.monotonic() - last_pong > 2 * self.ping_interval:
+                    await self._evict(connection, "no pong")
+                    return
+                connection.queue.append((None, PING_MESSAGE))
+
+            while connection.queue:
+                _, text = connection.queue.popleft()
+                try:
+                    await asyncio.wait_for(
+                        connection.websocket.send_text(text), timeout=self.send_timeout
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    await self._evict(connection, f"send failed ({type(e).__name__})")
+                    return
+            connection.ready.clear()
@@ -125,6 +125,20 @@ class BaseCrudMixin(Generic[ModelType, ModelCreateType, ModelUpdateType]):
         statement = select(self.model).filter(*args).filter_by(**kwargs).offset(skip).limit(limit)
         return list(db.exec(statement).fetchmany())
 
+    def _build(self, obj_in: ModelCreateType, **kwargs: Any) -> ModelType:
+        """
+        Build a new record. The fields are validated, since `model_dump` may return some
+        of them as strings (e.g. ids and timestamps), which the column types reject.
+
+        Args:
+            obj_in: The object to create.
+            kwargs: Fields to set on top of `obj_in`.
+
+        Returns:
+            The new, unsaved record.
+        """
+        return self.model.model_validate({**obj_in.model_dump(), **kwargs})
+
     def _create(self, db: Session, *, obj_in: ModelCreateType, **kwargs: Any) -> ModelType:
         """
         Create a new record.
@@ -140,7 +154,7 @@ class BaseCrudMixin(Generic[ModelType, ModelCreateType, ModelUpdateType]):
             RecordAlreadyExistsError: If the record already exists.
         """
         try:
-            out_obj = self.model(**{**obj_in.model_dump(), **kwargs})
+            out_obj = self._build(obj_in, **kwargs)
             db.add(out_obj)
             db.commit()
             db.refresh(out_obj)
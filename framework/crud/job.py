@@ -1,19 +1,57 @@
 import asyncio
 from collections.abc import Callable
+from datetime import datetime
 from functools import wraps
 from typing import Any, TypeVar, cast
+from uuid import UUID, uuid4
 
-from sqlalchemy import BinaryExpression
-from sqlmodel import Session
+from sqlalchemy import BinaryExpression, or_, update
+from sqlmodel import Session, SQLModel, col, select
 
 from app import logger, settings
 from framework import models
 from framework.services.job_queue_ws_manager import job_queue_ws_manager
+from framework.utils.datetime import utc_now
 
 from .base import BaseCRUD, BaseCRUDSync
 
 
 T = TypeVar("T")
+JobIn = TypeVar("JobIn", bound=SQLModel)
+
+# Statuses of jobs that have stopped running
+FINISHED_STATUSES = {
+    models.JobStatus.done,
+    models.JobStatus.failed,
+    models.JobStatus.cancelled,
+    models.JobStatus.error,
+}
+
+_job_change_listeners: list[Callable[[], None]] = []
+
+
+def subscribe_to_job_changes(callback: Callable[[], None]) -> None:
+    """Registers a callback that is called after jobs are created, updated or removed.
+
+    Callbacks run in the process that made the change, so they only see changes made
+    through this process' CRUD (not changes made by the Huey consumers).
+    """
+    if callback not in _job_change_listeners:
+        _job_change_listeners.append(callback)
+
+
+def unsubscribe_from_job_changes(callback: Callable[[], None]) -> None:
+    """Removes a previously registered job change callback."""
+    if callback in _job_change_listeners:
+        _job_change_listeners.remove(callback)
+
+
+def _notify_job_change_listeners() -> None:
+    for callback in list(_job_change_listeners):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Job change listener {callback} failed: {e}")
 
 
 def broadcast_jobs_after(func: Callable[..., T]) -> Callable[..., T]:
@@ -33,6 +71,7 @@ def broadcast_jobs_after(func: Callable[..., T]) -> Callable[..., T]:
     async def wrapper(self: "JobCRUD", db: Session, *args: Any, **kwargs: Any) -> Any:
         # Execute the original method
         result = await func(self, db, *args, **kwargs)
+        _notify_job_change_listeners()
 
         # Broadcast all jobs to the websocket
         jobs = await self.get_all_jobs_for_env_name(db, settings.ENV_NAME)
@@ -68,6 +107,7 @@ def broadcast_jobs_after_sync(func: Callable[..., T]) -> Callable[..., T]:
     def wrapper(self: "JobCRUDSync", db: Session, *args: Any, **kwargs: Any) -> Any:
         # Execute the original method
         result = func(self, db, *args, **kwargs)
+        _notify_job_change_listeners()
 
         # Spawn async task to broadcast (fire-and-forget)
         async def broadcast_jobs() -> None:
@@ -96,6 +136,33 @@ def broadcast_jobs_after_sync(func: Callable[..., T]) -> Callable[..., T]:
     return cast(Callable[..., T], wrapper)
 
 
+def get_lifecycle_values(status: models.JobStatus) -> dict[str, Any]:
+    """Get the lifecycle timestamps (and reset usage) to store when a job enters a status."""
+    now = utc_now()
+    if status == models.JobStatus.queued:
+        return {
+            "queued_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "exit_code": None,
+            "cpu_time_seconds": None,
+            "peak_rss_bytes": None,
+        }
+    if status == models.JobStatus.running:
+        return {"started_at": now, "finished_at": None, "heartbeat_at": now}
+    if status in FINISHED_STATUSES or status == models.JobStatus.retrying:
+        return {"finished_at": now}
+    return {}
+
+
+def with_lifecycle_values(obj_in: JobIn, db_obj: models.Job | None = None) -> JobIn:
+    """Add the lifecycle values to a job create/update that changes the status."""
+    status = getattr(obj_in, "status", None)
+    if status is None or (db_obj is not None and db_obj.status == status):
+        return obj_in
+    return obj_in.model_copy(update=get_lifecycle_values(status))
+
+
 class JobCRUDSync(BaseCRUDSync[models.Job, models.JobCreate, models.JobUpdate]):
     def get_all_jobs_for_env_name(
         self,
@@ -118,9 +185,198 @@ class JobCRUDSync(BaseCRUDSync[models.Job, models.JobCreate, models.JobUpdate]):
     def get_running_jobs_for_queue(self, db: Session, queue_name: str) -> list[models.Job]:
         return self.get_multi(db, status=models.JobStatus.running, queue_name=queue_name)
 
+    def get_active_jobs(self, db: Session, env_name: str) -> list[models.Job]:
+        """Get the dispatched and running jobs, which hold their slots and a worker."""
+        return self.get_multi(
+            db,
+            col(self.model.status).in_([models.JobStatus.dispatched, models.JobStatus.running]),
+            env_name=env_name,
+        )
+
+    def get_queued_jobs_by_priority(
+        self, db: Session, env_name: str, queue_name: str | None = None
+    ) -> list[models.Job]:
+        """Get the queued jobs, highest priority first (oldest first within a priority)."""
+        filters: dict[str, Any] = {"queue_name": queue_name} if queue_name else {}
+        queued_jobs = self.get_multi(
+            db,
+            env_name=env_name,
+            status=models.JobStatus.queued,
+            archived=False,
+            **filters,
+        )
+        priority_order = list(models.Priority)
+        return sorted(queued_jobs, key=lambda j: (priority_order.index(j.priority), j.created_at))
+
+    def get_next_queued_job(
+        self, db: Session, env_name: str, queue_name: str
+    ) -> models.Job | None:
+        """Get the queued job with the highest priority (oldest first within a priority)."""
+        queued_jobs = self.get_queued_jobs_by_priority(db, env_name=env_name, queue_name=queue_name)
+        return queued_jobs[0] if queued_jobs else None
+
+    @broadcast_jobs_after_sync
+    def claim_queued_job(self, db: Session, id: UUID | str) -> UUID | None:
+        """
+        Set a queued job to dispatched, unless another process claimed it first. The job
+        has no heartbeat until its task starts it with the claim token.
+
+        Returns:
+            The claim token if this call claimed the job, else None.
+        """
+        claim_token = uuid4()
+        statement = (
+            update(self.model)
+            .where(col(self.model.id) == UUID(str(id)))
+            .where(col(self.model.status) == models.JobStatus.queued)
+            .values(status=models.JobStatus.dispatched, claim_token=claim_token, pid=None)
+        )
+        result = db.exec(statement)  # type: ignore
+        db.commit()
+        return claim_token if result.rowcount == 1 else None
+
+    @broadcast_jobs_after_sync
+    def start_claimed_job(self, db: Session, id: UUID | str, claim_token: UUID | str) -> bool:
+        """
+        Set a dispatched job to running, unless it was changed or claimed again since the
+        claim token was handed out.
+
+        Returns:
+            True if the job was started.
+        """
+        statement = (
+            update(self.model)
+            .where(col(self.model.id) == UUID(str(id)))
+            .where(col(self.model.status) == models.JobStatus.dispatched)
+            .where(col(self.model.claim_token) == UUID(str(claim_token)))
+            .values(
+                status=models.JobStatus.running,
+                **get_lifecycle_values(models.JobStatus.running),
+            )
+        )
+        result = db.exec(statement)  # type: ignore
+        db.commit()
+        return bool(result.rowcount == 1)
+
+    @broadcast_jobs_after_sync
+    def requeue_retrying_job(self, db: Session, id: UUID | str) -> bool:
+        """
+        Queue a job waiting for its retry, unless it was changed in the meantime.
+
+        Returns:
+            True if the job was queued.
+        """
+        statement = (
+            update(self.model)
+            .where(col(self.model.id) == UUID(str(id)))
+            .where(col(self.model.status) == models.JobStatus.retrying)
+            .values(
+                status=models.JobStatus.queued,
+                **get_lifecycle_values(models.JobStatus.queued),
+            )
+        )
+        result = db.exec(statement)  # type: ignore
+        db.commit()
+        return bool(result.rowcount == 1)
+
+    def touch_heartbeat(self, db: Session, id: UUID | str) -> bool:
+        """
+        Set the heartbeat of a running job to now. Not broadcast, it runs every few seconds.
+
+        Returns:
+            False if the job is no longer running.
+        """
+        statement = (
+            update(self.model)
+            .where(col(self.model.id) == UUID(str(id)))
+            .where(col(self.model.status) == models.JobStatus.running)
+            .values(heartbeat_at=utc_now())
+        )
+        result = db.exec(statement)  # type: ignore
+        db.commit()
+        return bool(result.rowcount == 1)
+
+    def get_stale_running_jobs(
+        self, db: Session, env_name: str, heartbeat_before: datetime
+    ) -> list[models.Job]:
+        """Get the running jobs without a heartbeat since the given time (uses the index)."""
+        heartbeat_at = col(self.model.heartbeat_at)
+        statement = select(self.model).where(
+            or_(heartbeat_at < heartbeat_before, heartbeat_at.is_(None)),
+            col(self.model.status) == models.JobStatus.running,
+            col(self.model.env_name) == env_name,
+        )
+        return list(db.exec(statement).all())
+
+    def get_finished_jobs(
+        self, db: Session, finished_after: datetime, env_name: str | None = None
+    ) -> list[models.Job]:
+        """Get the jobs that finished after the given time, of every environment if None."""
+        statement = select(self.model).where(
+            col(self.model.status).in_(FINISHED_STATUSES),
+            col(self.model.finished_at) >= finished_after,
+        )
+        if env_name:
+            statement = statement.where(col(self.model.env_name) == env_name)
+        return list(db.exec(statement).all())
+
+    @broadcast_jobs_after_sync
+    def release_stale_job(
+        self,
+        db: Session,
+        id: UUID | str,
+        heartbeat_before: datetime,
+        status: models.JobStatus,
+        retry_count: int,
+    ) -> bool:
+        """
+        Requeue or fail a running job, unless its heartbeat came back in the meantime.
+
+        Returns:
+            True if the job was released.
+        """
+        heartbeat_at = col(self.model.heartbeat_at)
+        statement = (
+            update(self.model)
+            .where(col(self.model.id) == UUID(str(id)))
+            .where(col(self.model.status) == models.JobStatus.running)
+            .where(or_(heartbeat_at < heartbeat_before, heartbeat_at.is_(None)))
+            .values(
+                status=status,
+                retry_count=retry_count,
+                pid=None,
+                heartbeat_at=None,
+                **get_lifecycle_values(status),
+            )
+        )
+        result = db.exec(statement)  # type: ignore
+        db.commit()
+        return bool(result.rowcount == 1)
+
     @broadcast_jobs_after_sync
     def create(self, db: Session, *, obj_in: models.JobCreate, **kwargs: Any) -> models.Job:
-        return super().create(db, obj_in=obj_in, **kwargs)
+        return super().create(db, obj_in=with_lifecycle_values(obj_in), **kwargs)
+
+    @broadcast_jobs_after_sync
+    def create_many(self, db: Session, *, objs_in: list[models.JobCreate]) -> list[models.Job]:
+        """Create several jobs in a single transaction."""
+        db_objs = [self._build(with_lifecycle_values(obj_in)) for obj_in in objs_in]
+        db.add_all(db_objs)
+        db.commit()
+        for db_obj in db_objs:
+            db.refresh(db_obj)
+        return db_objs
+
+    @broadcast_jobs_after_sync
+    def update_many_status(self, db: Session, *, ids: list[UUID], status: models.JobStatus) -> None:
+        """Set the status of several jobs in a single query."""
+        statement = (
+            update(self.model)
+            .where(col(self.model.id).in_(ids))
+            .values(status=status, **get_lifecycle_values(status))
+        )
+        db.exec(statement)  # type: ignore
+        db.commit()
 
     @broadcast_jobs_after_sync
     def update(
@@ -133,10 +389,12 @@ class JobCRUDSync(BaseCRUDSync[models.Job, models.JobCreate, models.JobUpdate]):
         exclude_unset: bool = True,
         **kwargs: Any,
     ) -> models.Job:
+        if db_obj is None:
+            db_obj = self.get(db, *args, **kwargs)
         return super().update(
             db,
             *args,
-            obj_in=obj_in,
+            obj_in=with_lifecycle_values(obj_in, db_obj=db_obj),
             db_obj=db_obj,
             exclude_none=exclude_none,
             exclude_unset=exclude_unset,
@@ -183,7 +441,7 @@ class JobCRUD(BaseCRUD[models.Job, models.JobCreate, models.JobUpdate]):
 
     @broadcast_jobs_after
     async def create(self, db: Session, *, obj_in: models.JobCreate, **kwargs: Any) -> models.Job:
-        return await super().create(db, obj_in=obj_in, **kwargs)
+        return await super().create(db, obj_in=with_lifecycle_values(obj_in), **kwargs)
 
     @broadcast_jobs_after
     async def update(
@@ -196,10 +454,12 @@ class JobCRUD(BaseCRUD[models.Job, models.JobCreate, models.JobUpdate]):
         exclude_unset: bool = True,
         **kwargs: Any,
     ) -> models.Job:
+        if db_obj is None:
+            db_obj = await self.get(db, *args, **kwargs)
         return await super().update(
             db,
             *args,
-            obj_in=obj_in,
+            obj_in=with_lifecycle_values(obj_in, db_obj=db_obj),
             db_obj=db_obj,
             exclude_none=exclude_none,
             exclude_unset=exclude_unset,
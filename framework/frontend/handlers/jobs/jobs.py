@@ -11,6 +11,7 @@ from framework import crud
 from framework.core.db import get_db
 from framework.frontend.templates import templates
 from framework.frontend.templates.context import get_template_context
+from framework.logic.job_stats import get_job_stats
 
 
 router = APIRouter(tags=["jobs"])
@@ -50,6 +51,12 @@ async def jobs_page(
 
     context["jobs"] = sorted_jobs
 
+    try:
+        context["job_stats"] = get_job_stats(db, env_name=settings.ENV_NAME)
+    except Exception as e:
+        logger.error(f"Error computing job stats: {str(e)}")
+        context["job_stats"] = []
+
     try:
         characters = await app_crud.character.get_all(db=db)
     except Exception as e:
@@ -0,0 +1,77 @@
+"""
+Aggregate job timing: how long jobs wait in the queue and how long they run, per job
+type, script and queue.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from framework import crud, models
+from framework.utils.datetime import utc_now
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Linearly interpolated percentile (q in 0..100), or None without values."""
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _seconds(start: datetime | None, end: datetime | None) -> float | None:
+    if start is None or end is None:
+        return None
+    return max(0.0, (end - start).total_seconds())
+
+
+def compute_job_stats(jobs: list[models.Job]) -> list[models.JobStats]:
+    """Group finished jobs by type, script and queue and compute their percentiles."""
+    groups: dict[tuple[models.JobType, str, str], list[models.Job]] = defaultdict(list)
+    for job in jobs:
+        name = job.command if job.type == models.JobType.script else job.type.value
+        groups[(job.type, name, job.queue_name)].append(job)
+
+    stats = []
+    for (type_, name, queue_name), group in sorted(groups.items()):
+        wait = [s for j in group if (s := _seconds(j.queued_at, j.started_at)) is not None]
+        run = [s for j in group if (s := _seconds(j.started_at, j.finished_at)) is not None]
+        cpu = [j.cpu_time_seconds for j in group if j.cpu_time_seconds is not None]
+        rss = [j.peak_rss_bytes for j in group if j.peak_rss_bytes is not None]
+        stats.append(
+            models.JobStats(
+                type=type_,
+                name=name,
+                queue_name=queue_name,
+                count=len(group),
+                failed=sum(1 for j in group if j.status != models.JobStatus.done),
+                wait_seconds_p50=percentile(wait, 50),
+                wait_seconds_p95=percentile(wait, 95),
+                run_seconds_p50=percentile(run, 50),
+                run_seconds_p95=percentile(run, 95),
+                cpu_time_seconds_avg=sum(cpu) / len(cpu) if cpu else None,
+                peak_rss_bytes_max=max(rss) if rss else None,
+            )
+        )
+    return stats
+
+
+def get_job_stats(
+    db: Session, env_name: str | None = None, days: int = 30
+) -> list[models.JobStats]:
+    """
+    Get the stats of the jobs that finished in the last days.
+
+    Args:
+        db: Database session
+        env_name: Only include jobs of this environment. All environments if None.
+        days: Number of days to look back.
+    """
+    jobs = crud.job.sync.get_finished_jobs(
+        db, finished_after=utc_now() - timedelta(days=days), env_name=env_name
+    )
+    return compute_job_stats(jobs)
@@ -0,0 +1,108 @@
+"""
+Profiles requests on demand, for superusers.
+
+Add `?profile=1` (or the `X-Profile: 1` header) to a request to run it under the profiler
+(see framework.services.profiling). The report is saved in the profiles directory and
+its file name returned in the `X-Profile-Report` header, to fetch from
+`/api/v1/profiles/{name}`. With `?profile=view`, the report is returned instead of the
+response, which is handy to profile a page from the browser.
+
+The flag is ignored for anyone but an active superuser, authenticated by the bearer
+token or the `access_token` cookie of the frontend.
+"""
+
+import re
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import logger, paths, settings
+from framework import crud, models
+from framework.core import security
+from framework.core.db import get_db_context
+from framework.services.profiling import ProfilerBusyError, profile
+
+
+PROFILE_HEADER = "x-profile"
+REPORT_HEADER = "x-profile-report"
+
+
+def _get_token(request: Request) -> str | None:
+    for value in (request.headers.get("authorization"), request.cookies.get("access_token")):
+        if value and "Bearer " in value:
+            return value.split("Bearer ")[1].strip('"')
+    return None
+
+
+async def get_superuser(request: Request) -> models.User | None:
+    """The active superuser making the request, or None."""
+    token = _get_token(request)
+    if not token:
+        return None
+    try:
+        user_id = security.decode_token(token=token, key=settings.JWT_ACCESS_SECRET_KEY)
+    except HTTPException:
+        return None
+    with get_db_context() as db:
+        user = await crud.user.get_or_none(db=db, id=user_id)
+    if user is None or not crud.user.is_active(user) or not crud.user.is_superuser(user_=user):
+        return None
+    return user
+
+
+def get_report_name(request: Request) -> str:
+    """A file name for the report of a request: time (UTC), method and path."""
+    path = re.sub(r"[^A-Za-z0-9]+", "_", request.url.path).strip("_") or "root"
+    timestamp = datetime.now(tz=timezone.utc).strftime("%Y%m%d_%H%M%S_%f")
+    return f"{timestamp}_{request.method.lower()}_{path[:80]}"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests of superusers that ask for it."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        mode = request.query_params.get("profile") or request.headers.get(PROFILE_HEADER)
+        if not mode or mode in ("0", "false") or await get_superuser(request) is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            with profile(paths.PROFILES_PATH / get_report_name(request)) as report:
+                if mode == "view":
+                    await self.app(scope, receive, self._discard)
+                else:
+                    await self.app(scope, receive, self._with_report_header(send, report.path.name))
+        except ProfilerBusyError:
+            logger.warning(f"Not profiling {request.url.path}: a profiler is already running.")
+            await self.app(scope, receive, send)
+            return
+
+        if mode == "view":
+            response = Response(content=report.path.read_text(), media_type=report.media_type)
+            await response(scope, receive, send)
+
+    @staticmethod
+    async def _discard(message: Message) -> None:
+        pass
+
+    @staticmethod
+    def _with_report_header(send: Send, report_name: str) -> Send:
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REPORT_HEADER.encode(), report_name.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        return send_wrapper
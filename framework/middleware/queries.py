@@ -0,0 +1,47 @@
+"""
+Counts the SQL statements of every request, to catch N+1 queries in development.
+
+Each response gets an `X-Query-Count` header with the statements run before it started.
+Requests that run a statement shape at least `QUERY_REPEAT_THRESHOLD` times are logged
+with their repeated shapes (see framework.core.query_counter).
+
+Enabled with the `QUERY_COUNTER_ENABLED` setting.
+"""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import logger, settings
+from framework.core.query_counter import QueryCounter
+
+
+QUERY_COUNT_HEADER = "x-query-count"
+
+
+class QueryCounterMiddleware:
+    """ASGI middleware counting the SQL statements of each request."""
+
+    def __init__(self, app: ASGIApp, threshold: int = settings.QUERY_REPEAT_THRESHOLD) -> None:
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with QueryCounter() as counter:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((QUERY_COUNT_HEADER.encode(), str(counter.count).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+        if counter.get_repeated_shapes(self.threshold):
+            logger.warning(
+                f"Repeated queries in {scope['method']} {scope['path']}: "
+                f"{counter.summary(self.threshold)}"
+            )
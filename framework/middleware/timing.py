@@ -0,0 +1,139 @@
+"""
+Request and database timing, exposed on `/metrics`.
+
+`RequestMetricsMiddleware` records the latency and the number of requests in flight per
+route. Requests are labeled with the route template (`/api/v1/jobs/{job_id}`), not the
+path, so the number of series stays bounded. Requests no route matches share the
+`<unmatched>` label.
+
+`instrument_engine` adds SQLAlchemy event hooks that time every query. Queries made while
+a request is handled (including in the threadpool of sync endpoints, which copies the
+context) are also counted per request.
+"""
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from framework.core.prometheus import registry
+
+
+# Queries per request, from a single lookup to a page that lists everything
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests handled.", ["method", "route", "status"]
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ["method", "route"]
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress", "HTTP requests being handled.", ["method", "route"]
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries",
+    "Database queries per HTTP request.",
+    ["method", "route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+http_request_db_duration_seconds = registry.histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in database queries per HTTP request.",
+    ["method", "route"],
+)
+db_queries_total = registry.counter("db_queries_total", "Database queries executed.")
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "Database query latency."
+)
+
+
+@dataclass
+class QueryStats:
+    """Queries made while handling one request."""
+
+    count: int = 0
+    seconds: float = 0.0
+
+
+_request_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "request_query_stats", default=None
+)
+
+
+def get_route_template(scope: Scope) -> str:
+    """The template of the route matching the request, like the router would match it."""
+    router = getattr(scope.get("app"), "router", None)
+    for route in getattr(router, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return str(getattr(route, "path_format", None) or getattr(route, "path", ""))
+    return "<unmatched>"
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording the latency and in-flight count of HTTP requests."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = get_route_template(scope)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        query_stats = QueryStats()
+        token = _request_query_stats.set(query_stats)
+        http_requests_in_progress.inc(method=method, route=route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            _request_query_stats.reset(token)
+            http_requests_in_progress.dec(method=method, route=route)
+            http_requests_total.inc(method=method, route=route, status=str(status_code))
+            http_request_duration_seconds.observe(duration, method=method, route=route)
+            http_request_db_queries.observe(query_stats.count, method=method, route=route)
+            http_request_db_duration_seconds.observe(
+                query_stats.seconds, method=method, route=route
+            )
+
+
+def _before_cursor_execute(conn: Any, *args: Any) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, *args: Any) -> None:
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    duration = time.perf_counter() - start_times.pop()
+    db_queries_total.inc()
+    db_query_duration_seconds.observe(duration)
+    query_stats = _request_query_stats.get()
+    if query_stats is not None:
+        query_stats.count += 1
+        query_stats.seconds += duration
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time the queries of an engine. Safe to call more than once."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
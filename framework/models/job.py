@@ -29,6 +29,14 @@ class Priority(str, Enum):
     lowest = "lowest"
 
 
+class ResourceClass(str, Enum):
+    """The resources the job scheduler hands out in slots."""
+
+    gpu = "gpu"
+    cpu = "cpu"
+    io = "io"
+
+
 class JobStatus(str, Enum):
     """Enum for the status of a job."""
 
@@ -39,6 +47,47 @@ class JobStatus(str, Enum):
     done = "done"
     cancelled = "cancelled"
     error = "error"
+    retrying = "retrying"  # Failed, waiting for its retry to be queued
+    dispatched = "dispatched"  # Claimed by the scheduler, waiting for a worker to start it
+
+
+class RetryPolicy(SQLModel):
+    """
+    When and how often a failed job is retried, with exponential backoff.
+
+    A failure is retried if it matches `retry_exceptions` (class names, with or without
+    module, matched against the exception's base classes too) or `retry_exit_codes` (for
+    command jobs). Without either, every failure is retried.
+    """
+
+    max_attempts: int = Field(default=1, description="Attempts including the first run.")
+    backoff_seconds: float = Field(default=30, description="Delay before the first retry.")
+    backoff_factor: float = Field(default=2, description="Delay multiplier per retry.")
+    max_backoff_seconds: float = Field(default=60 * 60)
+    retry_exceptions: list[str] = Field(default_factory=list)
+    retry_exit_codes: list[int] = Field(default_factory=list)
+
+    def get_delay(self, retry_count: int) -> float:
+        """Seconds to wait before the retry after the given number of retries."""
+        delay = self.backoff_seconds * self.backoff_factor**retry_count
+        return min(delay, self.max_backoff_seconds)
+
+    def should_retry(self, retry_count: int, exc: BaseException) -> bool:
+        """Whether a job that failed with `exc` after `retry_count` retries is retried."""
+        if retry_count + 1 >= self.max_attempts:
+            return False
+        if not self.retry_exceptions and not self.retry_exit_codes:
+            return True
+
+        exit_code = getattr(exc, "returncode", None)
+        if exit_code is not None and exit_code in self.retry_exit_codes:
+            return True
+        for cls in type(exc).__mro__:
+            if {cls.__qualname__, f"{cls.__module__}.{cls.__qualname__}"} & set(
+                self.retry_exceptions
+            ):
+                return True
+        return False
 
 
 class JobBase(SQLModel):
@@ -54,23 +103,54 @@ class JobBase(SQLModel):
     )
     meta: dict[str, Any] = Field(default_factory=dict, sa_type=JSON)
     pid: int | None = Field(default=None)
+    claim_token: UUID | None = Field(
+        default=None, description="Set when the job is dispatched, only its task can start it."
+    )
     priority: Priority = Field(default=Priority.normal)
     status: JobStatus = Field(default=JobStatus.pending)
     retry_count: int = Field(default=0)
+    retry_policy: dict[str, Any] | None = Field(
+        default=None,
+        sa_type=JSON,
+        description="RetryPolicy of the job. None: the retry policy of the job's script.",
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow)
     recurrence: str | None = Field(default=None)
     archived: bool = Field(default=False)
     queue_name: str = Field(
         default="default", description="Queue this job belongs to (default or reserved)"
     )
+    # Slots held while running. All None: the resource class of the job's script, or
+    # one CPU slot
+    gpu_slots: int | None = Field(default=None)
+    cpu_slots: int | None = Field(default=None)
+    io_slots: int | None = Field(default=None)
+    depends_on: list[str] = Field(
+        default_factory=list,
+        sa_type=JSON,
+        description="IDs of the jobs that have to be done before this job can run.",
+    )
+    workflow_id: UUID | None = Field(default=None, index=True)
+    # Lifecycle (set by the job CRUD when the status changes) and resource usage
+    queued_at: datetime | None = Field(default=None)
+    started_at: datetime | None = Field(default=None)
+    finished_at: datetime | None = Field(default=None)
+    exit_code: int | None = Field(default=None)
+    cpu_time_seconds: float | None = Field(default=None)
+    peak_rss_bytes: int | None = Field(default=None)
+    heartbeat_at: datetime | None = Field(default=None, index=True)
 
     def model_dump(self, **kwargs: Any) -> dict[str, Any]:
         """Override model_dump to convert UUID to string."""
         data = super().model_dump(**kwargs)
         if "id" in data and isinstance(data["id"], UUID):
             data["id"] = str(data["id"])
-        if "created_at" in data and isinstance(data["created_at"], datetime):
-            data["created_at"] = data["created_at"].isoformat()
+        for key in ["workflow_id", "claim_token"]:
+            if key in data and isinstance(data[key], UUID):
+                data[key] = str(data[key])
+        for key in ["created_at", "queued_at", "started_at", "finished_at", "heartbeat_at"]:
+            if key in data and isinstance(data[key], datetime):
+                data[key] = data[key].isoformat()
         return data
 
 
@@ -91,9 +171,22 @@ class JobUpdate(SQLModel):
     priority: Priority | None = None
     status: JobStatus | None = None
     retry_count: int | None = None
+    retry_policy: dict[str, Any] | None = None
     recurrence: str | None = None
     archived: bool | None = None
     queue_name: str | None = None
+    gpu_slots: int | None = None
+    cpu_slots: int | None = None
+    io_slots: int | None = None
+    depends_on: list[str] | None = None
+    workflow_id: UUID | None = None
+    queued_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    exit_code: int | None = None
+    cpu_time_seconds: float | None = None
+    peak_rss_bytes: int | None = None
+    heartbeat_at: datetime | None = None
 
 
 class JobCreate(JobBase):
@@ -106,3 +199,19 @@ class JobRead(JobBase):
     """Pydantic model for reading a job."""
 
     pass
+
+
+class JobStats(SQLModel):
+    """Wait and run time percentiles of the finished jobs of a type, script and queue."""
+
+    type: JobType
+    name: str  # Script class name, or the job type for other jobs
+    queue_name: str
+    count: int
+    failed: int
+    wait_seconds_p50: float | None = None
+    wait_seconds_p95: float | None = None
+    run_seconds_p50: float | None = None
+    run_seconds_p95: float | None = None
+    cpu_time_seconds_avg: float | None = None
+    peak_rss_bytes_max: int | None = None
@@ -25,6 +25,37 @@ class PythonFastAPIBaseSettings(BaseSettings):
 
     HUEY_DEFAULT_LOG_PATH: str = "app/data/logs/huey_consumer__default.log"
     HUEY_RESERVED_LOG_PATH: str = "app/data/logs/huey_consumer__reserved.log"
+    HUEY_CONSUMER_WORKERS: int = 4
+
+    # Job Scheduler (max concurrent slots per resource, shared by all queues)
+    JOB_GPU_SLOTS: int = 1
+    JOB_CPU_SLOTS: int = 2
+    JOB_IO_SLOTS: int = 2
+
+    # Job Heartbeats (running jobs without a heartbeat for the timeout are requeued/failed)
+    JOB_HEARTBEAT_INTERVAL_SECONDS: int = 5
+    JOB_HEARTBEAT_TIMEOUT_SECONDS: int = 30
+    JOB_STALE_MAX_REQUEUES: int = 1
+    # Seconds a stopped job's process group gets between SIGTERM and SIGKILL
+    JOB_KILL_TIMEOUT_SECONDS: int = 10
+
+    # System Metrics
+    SYSTEM_METRICS_INTERVAL_SECONDS: int = 15
+    SYSTEM_METRICS_BUFFER_SIZE: int = 240
+
+    # Prometheus metrics on /metrics: request latency, queries, job queue depth and outcomes
+    METRICS_ENABLED: bool = True
+    # Profiles superuser requests with `?profile=1` (or the X-Profile header) and jobs with
+    # `"profile": true` in their meta: auto, pyinstrument, cprofile
+    PROFILER_BACKEND: str = "auto"
+    # Count the queries of every request and log the statements repeated in a request
+    QUERY_COUNTER_ENABLED: bool = False
+    QUERY_REPEAT_THRESHOLD: int = 5
+
+    # GPU Telemetry
+    GPU_TELEMETRY_BACKEND: str = "auto"  # auto, nvml, nvidia-smi, fake, none
+    GPU_IDLE_UTILIZATION_THRESHOLD: float = 5.0
+    GPU_IDLE_WINDOW_SECONDS: int = 120
 
     # Server
     SERVER_HOST: str = "0.0.0.0"
@@ -35,6 +66,9 @@ class PythonFastAPIBaseSettings(BaseSettings):
     UVICORN_RELOAD: bool = True
     UVICORN_ENTRYPOINT: str = "app.core.app:app"
     UVICORN_WORKERS: int = 1
+    # Carries websocket broadcasts between workers: auto, local, sqlite, redis, fake
+    WEBSOCKET_BACKPLANE: str = "auto"
+    WEBSOCKET_BACKPLANE_REDIS_URL: str = "redis://localhost:6379/0"
 
     # API
     API_V1_PREFIX: str = "/api/v1"
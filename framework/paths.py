@@ -27,6 +27,9 @@ UPLOAD_PATH = DATA_PATH / "uploads"
 # Job Queue Paths
 JOB_LOGS_PATH = LOGS_PATH / "jobs"
 
+# Reports of profiled requests
+PROFILES_PATH = LOGS_PATH / "profiles"
+
 # ENV File
 RISA_ENV_FILE = os.environ.get("ENV_FILE")
 
@@ -0,0 +1,318 @@
+"""
+This service reads GPU telemetry through a pluggable provider and keeps a short
+per-GPU history, so idle detection can use sustained (windowed) utilization
+instead of a single noisy sample.
+
+Providers:
+- NVML: holds one NVML handle per GPU. Requires `pynvml` (`nvidia-ml-py`).
+- nvidia-smi: spawns `nvidia-smi` per sample. Used when NVML is not available.
+- Fake: scripted values for tests and GPU-less machines.
+"""
+
+import shutil
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from pydantic import BaseModel
+
+from app import logger, settings
+
+
+class GPUSample(BaseModel):
+    index: int
+    name: str | None = None
+    utilization: float
+    memory_used: float  # MiB
+    memory_total: float | None = None  # MiB
+    sampled_at: float  # Unix timestamp
+
+
+class GPUTelemetryProvider(ABC):
+    """Base class for GPU telemetry backends."""
+
+    name: str = "base"
+
+    @abstractmethod
+    def sample(self) -> list[GPUSample]:
+        """Return one sample per GPU."""
+
+    def close(self) -> None:  # noqa: B027
+        """Release any resources held by the provider."""
+
+
+class NVMLTelemetryProvider(GPUTelemetryProvider):
+    """Reads GPU telemetry in-process through NVML."""
+
+    name = "nvml"
+
+    def __init__(self) -> None:
+        import pynvml  # Optional dependency: `nvidia-ml-py`
+
+        pynvml.nvmlInit()
+        self._pynvml = pynvml
+        self._handles = [
+            pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())
+        ]
+        self._names = [self._decode(pynvml.nvmlDeviceGetName(h)) for h in self._handles]
+
+    @staticmethod
+    def _decode(value: Any) -> str:
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    def sample(self) -> list[GPUSample]:
+        now = time.time()
+        samples = []
+        for index, handle in enumerate(self._handles):
+            utilization = self._pynvml.nvmlDeviceGetUtilizationRates(handle)
+            memory = self._pynvml.nvmlDeviceGetMemoryInfo(handle)
+            samples.append(
+                GPUSample(
+                    index=index,
+                    name=self._names[index],
+                    utilization=float(utilization.gpu),
+                    memory_used=memory.used / 1024**2,
+                    memory_total=memory.total / 1024**2,
+                    sampled_at=now,
+                )
+            )
+        return samples
+
+    def close(self) -> None:
+        try:
+            self._pynvml.nvmlShutdown()
+        except Exception as e:
+            logger.warning(f"Failed to shut down NVML: {e}")
+
+
+class NvidiaSmiTelemetryProvider(GPUTelemetryProvider):
+    """Reads GPU telemetry by spawning `nvidia-smi`."""
+
+    name = "nvidia-smi"
+
+    def sample(self) -> list[GPUSample]:
+        result = subprocess.run(
+            [
+                "nvidia-smi",
+                "--query-gpu=index,name,utilization.gpu,memory.used,memory.total",
+                "--format=csv,nounits,noheader",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            check=True,
+            timeout=5,
+        )
+        now = time.time()
+        samples = []
+        for line in result.stdout.strip().splitlines():
+            index, name, utilization, memory_used, memory_total = (
+                value.strip() for value in line.split(",")
+            )
+            samples.append(
+                GPUSample(
+                    index=int(index),
+                    name=name,
+                    utilization=float(utilization),
+                    memory_used=float(memory_used),
+                    memory_total=float(memory_total),
+                    sampled_at=now,
+                )
+            )
+        return samples
+
+
+class FakeTelemetryProvider(GPUTelemetryProvider):
+    """Returns scripted values. Used for tests and machines without a GPU."""
+
+    name = "fake"
+
+    def __init__(self, utilizations: list[float] | None = None, memory_used: float = 0) -> None:
+        self.utilizations = utilizations if utilizations is not None else [0.0]
+        self.memory_used = memory_used
+
+    def set_utilization(self, index: int, utilization: float) -> None:
+        self.utilizations[index] = utilization
+
+    def sample(self) -> list[GPUSample]:
+        now = time.time()
+        return [
+            GPUSample(
+                index=index,
+                name=f"Fake GPU {index}",
+                utilization=utilization,
+                memory_used=self.memory_used,
+                sampled_at=now,
+            )
+            for index, utilization in enumerate(self.utilizations)
+        ]
+
+
+def create_gpu_telemetry_provider(backend: str = "auto") -> GPUTelemetryProvider | None:
+    """Create a GPU telemetry provider.
+
+    Args:
+        backend: `auto`, `nvml`, `nvidia-smi`, `fake` or `none`. `auto` prefers NVML and
+            falls back to nvidia-smi when it is on the PATH.
+
+    Returns:
+        The provider, or None if no GPU telemetry is available.
+    """
+    if backend == "none":
+        return None
+    if backend == "fake":
+        return FakeTelemetryProvider()
+    if backend == "nvidia-smi":
+        return NvidiaSmiTelemetryProvider()
+    if backend == "nvml":
+        return NVMLTelemetryProvider()
+
+    try:
+        return NVMLTelemetryProvider()
+    except Exception as e:
+        logger.debug(f"NVML is not available ({e}). Falling back to nvidia-smi.")
+
+    if shutil.which("nvidia-smi"):
+        return NvidiaSmiTelemetryProvider()
+
+    logger.info("No GPU telemetry provider available.")
+    return None
+
+
+class GPUTelemetry:
+    """
+    Samples a GPU telemetry provider and keeps a time-bounded history per GPU.
+    """
+
+    def __init__(
+        self, provider: GPUTelemetryProvider | None = None, history_seconds: float = 900
+    ) -> None:
+        self._provider = provider
+        self._provider_initialized = provider is not None
+        self.history_seconds = history_seconds
+        self._history: dict[int, deque[GPUSample]] = {}
+        self._lock = threading.Lock()
+        self._subscribers: list[Callable[[list[GPUSample]], None]] = []
+
+    def subscribe(self, callback: Callable[[list[GPUSample]], None]) -> None:
+        """Registers a callback that is called with the samples of every GPU poll."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[list[GPUSample]], None]) -> None:
+        """Removes a previously registered callback."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    @property
+    def provider(self) -> GPUTelemetryProvider | None:
+        """The provider, created from settings on first use."""
+        if not self._provider_initialized:
+            try:
+                self._provider = create_gpu_telemetry_provider(settings.GPU_TELEMETRY_BACKEND)
+            except Exception as e:
+                logger.warning(f"Could not create GPU telemetry provider: {e}")
+                self._provider = None
+            self._provider_initialized = True
+        return self._provider
+
+    def sample(self) -> list[GPUSample]:
+        """
+        Samples every GPU and records the values in the history.
+        Returns an empty list if no GPU telemetry is available or sampling fails.
+        """
+        provider = self.provider
+        if provider is None:
+            return []
+
+        try:
+            samples = provider.sample()
+        except Exception as e:
+            logger.warning(f"Could not sample GPU telemetry ({provider.name}): {e}")
+            return []
+
+        cutoff = time.time() - self.history_seconds
+        with self._lock:
+            for sample in samples:
+                history = self._history.setdefault(sample.index, deque())
+                history.append(sample)
+                while history and history[0].sampled_at < cutoff:
+                    history.popleft()
+
+        for callback in list(self._subscribers):
+            try:
+                callback(samples)
+            except Exception as e:
+                logger.error(f"GPU telemetry subscriber {callback} failed: {e}")
+
+        return samples
+
+    def get_gpu_indices(self) -> list[int]:
+        """Returns the indices of all GPUs that have been sampled."""
+        with self._lock:
+            return sorted(self._history)
+
+    def get_window_samples(self, index: int, window_seconds: float) -> list[GPUSample]:
+        """Returns the samples of a GPU that fall within the last `window_seconds`."""
+        cutoff = time.time() - window_seconds
+        with self._lock:
+            return [s for s in self._history.get(index, ()) if s.sampled_at >= cutoff]
+
+    def get_window_average(self, index: int, window_seconds: float) -> float | None:
+        """Returns the average utilization of a GPU over the last `window_seconds`."""
+        samples = self.get_window_samples(index, window_seconds)
+        if not samples:
+            return None
+        return sum(s.utilization for s in samples) / len(samples)
+
+    def get_covering_samples(self, index: int, window_seconds: float) -> list[GPUSample] | None:
+        """
+        Returns the samples of a GPU covering the last `window_seconds`: the samples in the
+        window and the last one before it, which held at the start of the window.
+        Returns None if the history doesn't reach back to the start of the window.
+        """
+        cutoff = time.time() - window_seconds
+        with self._lock:
+            history = list(self._history.get(index, ()))
+        before = [s for s in history if s.sampled_at <= cutoff]
+        if not before:
+            return None
+        return [before[-1], *(s for s in history if s.sampled_at > cutoff)]
+
+    def is_idle(
+        self,
+        window_seconds: float,
+        threshold: float,
+        indices: list[int] | None = None,
+    ) -> bool:
+        """
+        Checks if GPUs have been idle for the whole window.
+
+        A GPU is idle when its average utilization over the window is at or below the
+        threshold. The samples must cover the whole window, so GPUs sampled for less than
+        the window (e.g. right after startup) are treated as not idle, and a gap in the
+        samples counts with the utilization before it.
+        """
+        indices = indices if indices is not None else self.get_gpu_indices()
+        if not indices:
+            return False
+
+        for index in indices:
+            samples = self.get_covering_samples(index, window_seconds)
+            if not samples:
+                return False
+            if sum(s.utilization for s in samples) / len(samples) > threshold:
+                return False
+        return True
+
+    def close(self) -> None:
+        if self._provider:
+            self._provider.close()
+
+
+# Singleton instance shared by the system metrics sampler and the idle watcher
+gpu_telemetry = GPUTelemetry()
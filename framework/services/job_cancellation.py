@@ -0,0 +1,111 @@
+"""
+Cancellation of running jobs.
+
+Command jobs run in their own process group (session), so stopping one signals the whole
+tree: the shell, and the processes it started (e.g. a training run holding the GPU).
+The group gets SIGTERM first and SIGKILL if it is still alive after the timeout.
+
+Script jobs run inside the Huey worker and are cancelled cooperatively. The worker's
+heartbeat cancels the job's `CancellationToken` as soon as the job is no longer running
+(e.g. it was stopped from the UI). Scripts check the token between steps, and register
+callbacks for work they can't check in between, like an A1111 generation:
+
+    class ScriptExample(scripts.Script):
+        def _run(self, *args: Any, **kwargs: Any) -> scripts.ScriptOutput:
+            self.cancel_token.add_callback(a1111.interrupt)
+            for step in steps:
+                self.cancel_token.raise_if_cancelled()
+                ...
+"""
+
+import contextlib
+import os
+import signal
+import threading
+import time
+from collections.abc import Callable
+
+from app import logger, settings
+
+
+class JobCancelledError(Exception):
+    """Raised when a job stops because it was cancelled."""
+
+
+class CancellationToken:
+    """Tells a running job that it was cancelled. Thread-safe."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._callbacks: list[Callable[[], object]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the token and run its callbacks, once."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            self._run_callback(callback)
+
+    def add_callback(self, callback: Callable[[], object]) -> None:
+        """Call `callback` on cancellation, right away if the token is already cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        self._run_callback(callback)
+
+    def raise_if_cancelled(self) -> None:
+        if self.is_cancelled:
+            raise JobCancelledError("Job was cancelled.")
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait until the token is cancelled. Returns True if it was cancelled."""
+        return self._event.wait(timeout)
+
+    @staticmethod
+    def _run_callback(callback: Callable[[], object]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Cancellation callback {callback} failed: {e}")
+
+
+def _is_group_alive(pgid: int) -> bool:
+    try:
+        os.killpg(pgid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+
+
+def kill_process_group(pid: int, timeout: float = settings.JOB_KILL_TIMEOUT_SECONDS) -> bool:
+    """
+    Stop the process group led by `pid` (a job started in its own session): SIGTERM, then
+    SIGKILL if any process of the group is still alive after the timeout.
+
+    Returns:
+        False if the group was already gone.
+    """
+    try:
+        os.killpg(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return False
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not _is_group_alive(pid):
+            return True
+        time.sleep(0.1)
+
+    logger.warning(f"Process group {pid} still alive {timeout}s after SIGTERM. Sending SIGKILL.")
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(pid, signal.SIGKILL)
+    return True
@@ -14,10 +14,12 @@ from typing import Any
 from pydantic import BaseModel
 from sqlmodel import Session
 
-from app import logger, paths
+from app import logger, paths, settings
 from app.logic.config import get_config
 from framework import crud, models
+from framework.services.job_cancellation import kill_process_group
 from framework.services.job_queue_ws_manager import job_queue_ws_manager
+from framework.services.resource_scheduler import resource_scheduler
 
 
 class HueyConsumerWorker(BaseModel):
@@ -26,6 +28,7 @@ class HueyConsumerWorker(BaseModel):
     log_path: Path
     pid_file: Path
     huey_module: str
+    workers: int = settings.HUEY_CONSUMER_WORKERS
 
 
 CONSUMERS: list[HueyConsumerWorker] = [
@@ -115,7 +118,7 @@ async def start_consumer_process(queue_name: str | None = None) -> dict[str, Any
         try:
             cwd = os.getcwd()
             which_poetry = shutil.which("poetry")
-            cmd = f"nohup {'poetry run ' if which_poetry else ''}huey_consumer {huey_module} --worker-type=process > {log_path} 2>&1 & echo $!"  # noqa: E501
+            cmd = f"nohup {'poetry run ' if which_poetry else ''}huey_consumer {huey_module} --worker-type=process --workers={consumer.workers} > {log_path} 2>&1 & echo $!"  # noqa: E501
             with open(log_path, "a") as f:
                 f.write(f"\n Starting {consumer.name} consumer...")
             proc = subprocess.Popen(
@@ -219,8 +222,26 @@ async def broadcast_consumer_status_for_all() -> None:
         logger.error(f"Failed to broadcast consumer status: {e}")
 
 
+def trigger_next_job(db: Session, queue_name: str = "default") -> models.Job | None:
+    """Dispatch the highest priority queued job of a queue that fits the free slots.
+
+    Args:
+        db: Database session
+        queue_name: Name of the queue (default, reserved)
+
+    Returns:
+        The job that was dispatched, or None if no queued job can run now.
+    """
+    dispatched = resource_scheduler.dispatch(db, queue_name=queue_name, limit=1)
+    return dispatched[0] if dispatched else None
+
+
 async def kill_job_process(job_id: str, db: Session) -> dict[str, Any]:
-    """Immediately kill a running job process by its PID.
+    """Stop a running job and set it back to pending.
+
+    Command jobs have their process group killed (SIGTERM, then SIGKILL after
+    `JOB_KILL_TIMEOUT_SECONDS`). Script jobs have no process of their own; their worker
+    cancels them at its next heartbeat, once it sees the job is no longer running.
 
     Args:
         job_id: The ID of the job to kill.
@@ -231,24 +252,19 @@ async def kill_job_process(job_id: str, db: Session) -> dict[str, Any]:
     job = await crud.job.get_or_none(db, id=job_id)
     if not job:
         return {"success": False, "message": f"Job {job_id} not found."}
+    # A dispatched job isn't started by its task once it's no longer dispatched
+    was_running = job.status in (models.JobStatus.dispatched, models.JobStatus.running)
     pid = job.pid
+
+    # Set the status first, so the worker treats the job as cancelled rather than failed
+    await crud.job.update(db, id=job_id, obj_in=models.JobUpdate(status=models.JobStatus.pending))
     if not pid:
-        await crud.job.update(
-            db, id=job_id, obj_in=models.JobUpdate(status=models.JobStatus.pending)
-        )
+        if was_running:
+            return {"success": True, "message": f"Job {job_id} cancellation requested."}
         return {"success": False, "message": f"No PID found for job {job_id}."}
     try:
-        os.kill(int(pid), signal.SIGKILL)
-
-        await crud.job.update(
-            db, id=job_id, obj_in=models.JobUpdate(status=models.JobStatus.pending)
-        )
-
+        if not await asyncio.to_thread(kill_process_group, int(pid)):
+            return {"success": True, "message": f"Job {job_id} (PID {pid}) not found."}
         return {"success": True, "message": f"Job {job_id} (PID {pid}) killed."}
-    except ProcessLookupError:
-        await crud.job.update(
-            db, id=job_id, obj_in=models.JobUpdate(status=models.JobStatus.pending)
-        )
-        return {"success": True, "message": f"Job {job_id} (PID {pid}) not found."}
     except Exception as e:
         return {"success": False, "message": f"Failed to kill job {job_id}: {e}"}
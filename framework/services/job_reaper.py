@@ -0,0 +1,173 @@
+"""
+Heartbeats for running jobs, and the reaper that releases jobs whose worker died.
+
+While a job runs, its worker sets `heartbeat_at` every few seconds from a background
+thread, for command and script jobs alike. The reaper only queries running jobs whose
+heartbeat is older than the timeout (through the `heartbeat_at` index) and requeues them,
+or fails them once they were requeued `JOB_STALE_MAX_REQUEUES` times. A long script job
+with a live worker keeps beating and is left alone; a crashed worker's job is released
+within seconds, without relying on PIDs that may have been reused.
+"""
+
+import asyncio
+import threading
+from datetime import timedelta
+from types import TracebackType
+
+from sqlmodel import Session
+
+from app import logger, settings
+from framework import crud, models
+from framework.core.db import get_db_context
+from framework.services.job_cancellation import CancellationToken
+from framework.services.resource_scheduler import resource_scheduler
+from framework.utils.datetime import utc_now
+from framework.workflows import cancel_dependents
+
+
+class JobHeartbeat:
+    """
+    Beats for a running job from a background thread, with its own database session.
+    When the job is no longer running (it was stopped or released), the heartbeat stops
+    and cancels the job's token.
+
+    Args:
+        job_id: The running job.
+        interval: Seconds between heartbeats.
+        cancel_token: Cancelled when the job is no longer running.
+    """
+
+    def __init__(
+        self, job_id: str, interval: float, cancel_token: CancellationToken | None = None
+    ) -> None:
+        self.job_id = job_id
+        self.interval = interval
+        self.cancel_token = cancel_token
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def beat(self) -> bool:
+        with get_db_context() as db:
+            return crud.job.sync.touch_heartbeat(db, id=self.job_id)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                if not self.beat():
+                    logger.warning(f"Job {self.job_id[:8]}: Job is no longer running. Cancelling.")
+                    if self.cancel_token:
+                        self.cancel_token.cancel()
+                    return
+            except Exception as e:
+                logger.error(f"Job {self.job_id[:8]}: Heartbeat failed: {e}")
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "JobHeartbeat":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+
+def reap_stale_jobs(
+    db: Session,
+    env_name: str,
+    timeout_seconds: float,
+    max_requeues: int,
+) -> list[models.Job]:
+    """
+    Requeue or fail the running jobs of an environment without a recent heartbeat.
+
+    Args:
+        db: Database session
+        env_name: Environment whose jobs are reaped.
+        timeout_seconds: Age of the last heartbeat after which a job is stale.
+        max_requeues: Stale jobs are failed once their retry count reaches this.
+
+    Returns:
+        The released jobs.
+    """
+    heartbeat_before = utc_now() - timedelta(seconds=timeout_seconds)
+    released = []
+    for job in crud.job.sync.get_stale_running_jobs(
+        db, env_name=env_name, heartbeat_before=heartbeat_before
+    ):
+        last_heartbeat_at = job.heartbeat_at
+        requeue = job.retry_count < max_requeues
+        status = models.JobStatus.queued if requeue else models.JobStatus.failed
+        if not crud.job.sync.release_stale_job(
+            db,
+            id=job.id,
+            heartbeat_before=heartbeat_before,
+            status=status,
+            retry_count=job.retry_count + 1 if requeue else job.retry_count,
+        ):
+            continue
+
+        logger.warning(
+            f"Job {str(job.id)[:8]}: No heartbeat since {last_heartbeat_at}. "
+            f"{'Requeued' if requeue else 'Failed'}."
+        )
+        if not requeue:
+            cancel_dependents(db, job_id=job.id)
+        released.append(job)
+    return released
+
+
+class JobReaper:
+    """
+    Reaps stale jobs on an interval and dispatches the requeued ones.
+
+    Args:
+        interval: Seconds between checks.
+        timeout_seconds: Age of the last heartbeat after which a job is stale.
+        max_requeues: Stale jobs are failed once their retry count reaches this.
+    """
+
+    def __init__(self, interval: float, timeout_seconds: float, max_requeues: int) -> None:
+        self.interval = interval
+        self.timeout_seconds = timeout_seconds
+        self.max_requeues = max_requeues
+
+    def reap(self) -> list[models.Job]:
+        with get_db_context() as db:
+            released = reap_stale_jobs(
+                db,
+                env_name=settings.ENV_NAME,
+                timeout_seconds=self.timeout_seconds,
+                max_requeues=self.max_requeues,
+            )
+            if released:
+                resource_scheduler.dispatch(db)
+        return released
+
+    async def run(self) -> None:
+        logger.info("Job reaper started.")
+        while True:
+            try:
+                await asyncio.to_thread(self.reap)
+            except Exception as e:
+                logger.error(f"Error reaping stale jobs: {e}")
+            await asyncio.sleep(self.interval)
+
+
+# Singleton instance of the reaper
+job_reaper = JobReaper(
+    interval=settings.JOB_HEARTBEAT_INTERVAL_SECONDS,
+    timeout_seconds=settings.JOB_HEARTBEAT_TIMEOUT_SECONDS,
+    max_requeues=settings.JOB_STALE_MAX_REQUEUES,
+)
@@ -0,0 +1,55 @@
+"""
+Automatic retries of failed jobs.
+
+A job's retry policy is its own `retry_policy`, or the retry policy its script was
+registered with. When a job fails with a retryable error, it is set to `retrying` with
+its `retry_count` incremented, and a Huey task scheduled after the backoff delay queues
+it again. The queue is not blocked while the job waits, and every attempt writes its own
+log file (`job_{id}_retry_{retry_count}.txt`).
+"""
+
+from sqlmodel import Session
+
+from app import logger
+from framework import crud, models
+from framework.services.scripts import script_registry
+
+
+def get_retry_policy(job: models.Job) -> models.RetryPolicy:
+    """Get the retry policy of a job. Without one, the job is not retried."""
+    if job.retry_policy is not None:
+        return models.RetryPolicy.model_validate(job.retry_policy)
+    if job.type == models.JobType.script:
+        try:
+            retry_policy = script_registry.get_info(job.command).retry_policy
+        except ValueError:
+            retry_policy = None  # Unknown script, not worth retrying
+        if retry_policy is not None:
+            return retry_policy
+    return models.RetryPolicy()
+
+
+def mark_for_retry(db: Session, job: models.Job, exc: BaseException) -> float | None:
+    """
+    Set a failed job to `retrying` if its retry policy retries the error.
+
+    Args:
+        db: Database session
+        job: The job that failed.
+        exc: The error the job failed with.
+
+    Returns:
+        Seconds until the job should be queued again, or None if it is not retried.
+    """
+    retry_policy = get_retry_policy(job)
+    if not retry_policy.should_retry(job.retry_count, exc):
+        return None
+
+    delay = retry_policy.get_delay(job.retry_count)
+    obj_in = models.JobUpdate(status=models.JobStatus.retrying, retry_count=job.retry_count + 1)
+    job = crud.job.sync.update(db, db_obj=job, obj_in=obj_in)
+    logger.warning(
+        f"Job {str(job.id)[:8]}: Retry {job.retry_count} of "
+        f"{retry_policy.max_attempts - 1} in {delay:.0f}s after: {exc}"
+    )
+    return delay
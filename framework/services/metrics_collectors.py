@@ -0,0 +1,81 @@
+"""
+Metrics read at scrape time: job queue depth and outcomes, websocket connections and
+Huey consumer status.
+
+Jobs run in the Huey consumer processes, so their counts are read from the job table
+rather than counted in this process. `jobs_finished` is therefore a gauge of the finished
+jobs still in the table, which goes down when jobs are deleted. The job and consumer
+metrics are shared by the Uvicorn workers, the websocket connections are added up.
+"""
+
+from sqlalchemy import func
+from sqlmodel import col, select
+
+from framework import models
+from framework.core.db import get_db_context
+from framework.core.prometheus import registry
+from framework.core.websocket import WebSocketManager
+from framework.crud.job import FINISHED_STATUSES
+from framework.services.job_queue import get_consumer_status_map
+
+
+job_queue_depth = registry.gauge(
+    "job_queue_depth",
+    "Jobs waiting or running, per queue and status.",
+    ["queue_name", "status"],
+    shared=True,
+)
+jobs_finished = registry.gauge(
+    "jobs_finished",
+    "Finished jobs in the job table, per queue and outcome.",
+    ["queue_name", "status"],
+    shared=True,
+)
+websocket_connections = registry.gauge(
+    "websocket_connections", "Open websocket connections.", ["manager"]
+)
+huey_consumer_up = registry.gauge(
+    "huey_consumer_up",
+    "Whether the Huey consumer of a queue is running.",
+    ["queue_name"],
+    shared=True,
+)
+
+
+def collect_job_metrics() -> None:
+    with get_db_context() as db:
+        rows = db.exec(
+            select(models.Job.queue_name, models.Job.status, func.count()).group_by(
+                col(models.Job.queue_name), col(models.Job.status)
+            )
+        ).all()
+
+    job_queue_depth.clear()
+    jobs_finished.clear()
+    # Report empty queues as 0 rather than leaving a gap in the series
+    for queue_name in get_consumer_status_map():
+        for status in models.JobStatus:
+            if status not in FINISHED_STATUSES:
+                job_queue_depth.set(0, queue_name=queue_name, status=status.value)
+    for queue_name, status_value, count in rows:
+        job_status = models.JobStatus(status_value)
+        if job_status in FINISHED_STATUSES:
+            jobs_finished.set(count, queue_name=queue_name, status=job_status.value)
+        else:
+            job_queue_depth.set(count, queue_name=queue_name, status=job_status.value)
+
+
+def collect_websocket_metrics() -> None:
+    websocket_connections.clear()
+    for manager in list(WebSocketManager.instances):
+        websocket_connections.inc(len(manager.connections), manager=manager.channel)
+
+
+def collect_consumer_metrics() -> None:
+    for queue_name, status in get_consumer_status_map().items():
+        huey_consumer_up.set(1 if status == "running" else 0, queue_name=queue_name)
+
+
+registry.add_collector(collect_job_metrics, shared=True)
+registry.add_collector(collect_websocket_metrics)
+registry.add_collector(collect_consumer_metrics, shared=True)
@@ -1,8 +1,6 @@
 from pathlib import Path
 from typing import Any
 
-import emails
-from emails.template import JinjaTemplate
 from loguru import logger as _logger
 
 from app import paths, settings
@@ -74,6 +72,10 @@ def send_email(
     final_subject = subject if subject is not None else subject_template
     final_html = message if message is not None else html_template
 
+    # Deferred: only needed when an email is actually sent
+    import emails
+    from emails.template import JinjaTemplate
+
     # Build the email
     message_obj: emails.Message = emails.Message(  # type: ignore
         subject=final_subject if subject is not None else JinjaTemplate(final_subject),
@@ -0,0 +1,161 @@
+"""
+On-demand profiling of requests and jobs, through a pluggable profiler.
+
+Profilers:
+- pyinstrument: a sampling profiler with an HTML report that follows `await`s.
+  Requires `pyinstrument`.
+- cProfile: the deterministic profiler of the standard library, with a text report of
+  the functions with the highest cumulative time. Used when pyinstrument is not installed.
+
+Both only see the thread they were started in. Profiling a request shows the time the
+event loop spends on it; the body of a sync endpoint (run in the threadpool) shows as
+time waiting for it.
+
+Only one profiler runs at a time per process, other requests to profile are refused
+while it runs:
+
+    with profile(paths.PROFILES_PATH / "report") as report:
+        do_work()
+    print(report.path)
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from app import logger, settings
+
+
+class Profiler(ABC):
+    """Base class for profilers."""
+
+    name: str = "base"
+    # Suffix of the report files
+    suffix: str = ".txt"
+    media_type: str = "text/plain"
+
+    @abstractmethod
+    def start(self) -> None:
+        """Start profiling the current thread."""
+
+    @abstractmethod
+    def stop(self) -> None:
+        """Stop profiling."""
+
+    @abstractmethod
+    def render(self) -> str:
+        """Return the report of the profiled period."""
+
+
+class PyinstrumentProfiler(Profiler):
+    """Samples the call stack with pyinstrument, and renders an HTML report."""
+
+    name = "pyinstrument"
+    suffix = ".html"
+    media_type = "text/html"
+
+    def __init__(self, interval: float = 0.001) -> None:
+        import pyinstrument  # Optional dependency: `pyinstrument`
+
+        self._profiler = pyinstrument.Profiler(interval=interval, async_mode="enabled")
+
+    def start(self) -> None:
+        self._profiler.start()
+
+    def stop(self) -> None:
+        self._profiler.stop()
+
+    def render(self) -> str:
+        html: str = self._profiler.output_html()
+        return html
+
+
+class CProfileProfiler(Profiler):
+    """Traces every call with cProfile, and renders the top functions as text."""
+
+    name = "cprofile"
+
+    def __init__(self, limit: int = 80) -> None:
+        self.limit = limit
+        self._profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profiler.enable()
+
+    def stop(self) -> None:
+        self._profiler.disable()
+
+    def render(self) -> str:
+        output = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.limit)
+        return output.getvalue()
+
+
+def create_profiler(backend: str = "auto") -> Profiler:
+    """Create a profiler.
+
+    Args:
+        backend: `auto`, `pyinstrument` or `cprofile`. `auto` prefers pyinstrument and
+            falls back to cProfile when it is not installed.
+    """
+    if backend == "cprofile":
+        return CProfileProfiler()
+    if backend == "pyinstrument":
+        return PyinstrumentProfiler()
+    if backend != "auto":
+        raise ValueError(f"Unknown profiler backend: {backend}")
+
+    try:
+        return PyinstrumentProfiler()
+    except ImportError:
+        logger.debug("pyinstrument is not installed. Falling back to cProfile.")
+        return CProfileProfiler()
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profiler is already running in this process."""
+
+
+@dataclass
+class ProfileReport:
+    """Where the report of a `profile` block is saved, once the block exits."""
+
+    path: Path
+    media_type: str
+
+
+_lock = threading.Lock()
+
+
+@contextmanager
+def profile(path: Path, backend: str | None = None) -> Iterator[ProfileReport]:
+    """
+    Profile the block and save the report to `path`, with the suffix of the profiler.
+
+    Raises:
+        ProfilerBusyError: If another block is being profiled in this process.
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profiler is already running.")
+    try:
+        profiler = create_profiler(backend or settings.PROFILER_BACKEND)
+        report = ProfileReport(
+            path=path.with_suffix(profiler.suffix), media_type=profiler.media_type
+        )
+        profiler.start()
+        try:
+            yield report
+        finally:
+            profiler.stop()
+            report.path.parent.mkdir(parents=True, exist_ok=True)
+            report.path.write_text(profiler.render())
+            logger.info(f"Saved {profiler.name} profile to {report.path}")
+    finally:
+        _lock.release()
@@ -0,0 +1,213 @@
+"""
+Resource-aware dispatch of queued jobs.
+
+Every job holds slots of the resources it uses while it runs (`gpu_slots`, `cpu_slots`,
+`io_slots` on the job; unset means the resource class of its script, or one CPU slot).
+The scheduler walks the queued jobs in priority order and dispatches every job whose
+slots fit next to the running jobs, so an rsync, a thumbnail batch and an XY plot run at
+the same time while two GPU jobs still wait for each other.
+
+A job that doesn't fit blocks the resources it needs for the lower priority jobs behind
+it, so a large job isn't starved by a stream of small ones. Jobs whose dependencies
+aren't done yet are skipped (see `framework.workflows`).
+
+Every queue runs at most `HUEY_CONSUMER_WORKERS` jobs at the same time, the number of
+workers of its consumer, so a dispatched job never waits for a worker while holding slots.
+
+The web server and both consumers dispatch, so dispatching is serialized with a file
+lock and every job is claimed with a conditional UPDATE before its Huey task is enqueued.
+The claim sets the job to dispatched with a claim token, and only the task given the token
+sets it to running (see `_execute_job_task`).
+"""
+
+import fcntl
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from pathlib import Path
+
+from sqlmodel import Session
+
+from app import logger, paths, settings
+from framework import crud, models
+from framework.models.job import ResourceClass
+from framework.services.scripts import script_registry
+from framework.workflows import filter_ready_jobs
+
+
+def get_job_slots(job: models.Job) -> dict[ResourceClass, int]:
+    """Get the slots a job holds while running."""
+    declared = {
+        ResourceClass.gpu: job.gpu_slots,
+        ResourceClass.cpu: job.cpu_slots,
+        ResourceClass.io: job.io_slots,
+    }
+    if any(slots is not None for slots in declared.values()):
+        return {resource: slots or 0 for resource, slots in declared.items()}
+
+    resource_class = ResourceClass.cpu
+    if job.type == models.JobType.script:
+        # An unknown script fails when the job runs
+        with suppress(ValueError):
+            resource_class = script_registry.get_info(job.command).resource_class
+    return {resource: int(resource == resource_class) for resource in ResourceClass}
+
+
+class ResourceScheduler:
+    """
+    Picks the queued jobs that can run next to the running jobs.
+
+    Args:
+        capacity: Maximum number of slots per resource. At least 1 each.
+        lock_path: File locked while dispatching, shared by all processes.
+        workers_per_queue: Maximum number of dispatched and running jobs per queue.
+            None: no maximum.
+    """
+
+    def __init__(
+        self,
+        capacity: dict[ResourceClass, int],
+        lock_path: Path | None = None,
+        workers_per_queue: int | None = None,
+    ) -> None:
+        self.capacity = {resource: max(1, capacity.get(resource, 1)) for resource in ResourceClass}
+        self.lock_path = lock_path
+        self.workers_per_queue = None if workers_per_queue is None else max(1, workers_per_queue)
+
+    def get_job_slots(self, job: models.Job) -> dict[ResourceClass, int]:
+        """The slots of a job, capped at the capacity so every job can run eventually."""
+        return {
+            resource: min(slots, self.capacity[resource])
+            for resource, slots in get_job_slots(job).items()
+        }
+
+    def get_usage(self, running_jobs: list[models.Job]) -> dict[ResourceClass, int]:
+        """Get the slots held by the dispatched and running jobs per resource."""
+        usage = dict.fromkeys(ResourceClass, 0)
+        for job in running_jobs:
+            for resource, slots in self.get_job_slots(job).items():
+                usage[resource] += slots
+        return usage
+
+    def select(
+        self,
+        queued_jobs: list[models.Job],
+        running_jobs: list[models.Job],
+        limit: int | None = None,
+    ) -> list[models.Job]:
+        """
+        Select the jobs to start now.
+
+        Args:
+            queued_jobs: Queued jobs, highest priority first.
+            running_jobs: Jobs holding slots and a worker of their queue.
+            limit: Maximum number of jobs to select.
+        """
+        usage = self.get_usage(running_jobs)
+        free = {resource: self.capacity[resource] - usage[resource] for resource in ResourceClass}
+        blocked: set[ResourceClass] = set()
+        busy_workers = Counter(job.queue_name for job in running_jobs)
+
+        selected: list[models.Job] = []
+        for job in queued_jobs:
+            if limit is not None and len(selected) >= limit:
+                break
+            if (
+                self.workers_per_queue is not None
+                and busy_workers[job.queue_name] >= self.workers_per_queue
+            ):
+                # The job waits for a worker of its queue, jobs of other queues can still run
+                continue
+            slots = self.get_job_slots(job)
+            needed = {resource for resource, count in slots.items() if count > 0}
+            if needed & blocked:
+                continue
+            if any(slots[resource] > free[resource] for resource in needed):
+                # Keep the freed slots for this job instead of lower priority ones
+                blocked |= needed
+                continue
+            for resource in needed:
+                free[resource] -= slots[resource]
+            busy_workers[job.queue_name] += 1
+            selected.append(job)
+        return selected
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        if self.lock_path is None:
+            yield
+            return
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def dispatch(
+        self, db: Session, queue_name: str | None = None, limit: int | None = None
+    ) -> list[models.Job]:
+        """
+        Claim the queued jobs whose slots are free and enqueue them on their consumers.
+
+        Args:
+            db: Database session
+            queue_name: Only dispatch jobs of this queue (default, reserved). Slots are
+                shared by all queues.
+            limit: Maximum number of jobs to dispatch.
+
+        Returns:
+            The dispatched jobs.
+        """
+        # Imported here because the tasks module imports the Huey instances and app scripts
+        from framework.tasks.execute_tasks import (
+            execute_job_task_default,
+            execute_job_task_reserved,
+        )
+
+        tasks = {"default": execute_job_task_default, "reserved": execute_job_task_reserved}
+        if queue_name is not None and queue_name not in tasks:
+            raise ValueError(f"No consumers found for queue_name: {queue_name}")
+
+        dispatched = []
+        with self._lock():
+            queued_jobs = crud.job.sync.get_queued_jobs_by_priority(
+                db, env_name=settings.ENV_NAME, queue_name=queue_name
+            )
+            # Jobs waiting for other jobs don't hold back the jobs behind them
+            queued_jobs = filter_ready_jobs(db, queued_jobs)
+            if not queued_jobs:
+                return []
+            running_jobs = crud.job.sync.get_active_jobs(db, env_name=settings.ENV_NAME)
+            priority_order = list(models.Priority)
+            for job in self.select(queued_jobs, running_jobs, limit=limit):
+                if job.queue_name not in tasks:
+                    logger.error(f"Job {job.id} has an unknown queue: {job.queue_name}")
+                    continue
+                claim_token = crud.job.sync.claim_queued_job(db, id=job.id)
+                if claim_token is None:
+                    continue
+                logger.info(
+                    f"Dispatching job {job.id} ({job.name}) on the {job.queue_name} queue "
+                    f"with slots {self.get_job_slots(job)}."
+                )
+                tasks[job.queue_name](
+                    job_id=str(job.id),
+                    priority=priority_order.index(job.priority),
+                    claim_token=str(claim_token),
+                )
+                dispatched.append(job)
+        return dispatched
+
+
+# Singleton instance of the scheduler
+resource_scheduler = ResourceScheduler(
+    capacity={
+        ResourceClass.gpu: settings.JOB_GPU_SLOTS,
+        ResourceClass.cpu: settings.JOB_CPU_SLOTS,
+        ResourceClass.io: settings.JOB_IO_SLOTS,
+    },
+    lock_path=paths.JOB_SCHEDULER_LOCK_PATH,
+    workers_per_queue=settings.HUEY_CONSUMER_WORKERS,
+)
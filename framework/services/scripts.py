@@ -1,9 +1,40 @@
+"""
+Scripts run as `script` jobs, and the registry that maps a job's `command` to its script.
+
+Scripts are registered by name with metadata the scheduler can route on (resource class,
+estimated runtime, default queue, `meta` schema), either lazily by dotted path, so the
+module is only imported when a job runs the script (`ResourceClass` and `RetryPolicy` are
+in framework.models.job):
+
+    scripts.register_lazy(
+        "app.scripts.rsync_files:ScriptRsyncFiles",
+        resource_class=ResourceClass.io,
+    )
+
+A script can set a retry policy for its jobs, used for jobs without their own:
+
+    scripts.register_lazy(
+        "app.scripts.rsync_files:ScriptRsyncFiles",
+        retry_policy=RetryPolicy(max_attempts=3, backoff_seconds=60),
+    )
+
+or with the decorator, for modules that are imported anyway:
+
+    @scripts.register(resource_class=ResourceClass.cpu)
+    class ScriptExample(scripts.Script): ...
+"""
+
+import threading
 from abc import abstractmethod
-from typing import Any
+from collections.abc import Callable
+from importlib import import_module
+from typing import Any, TypeVar
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr, ValidationError
 
 from app import logger
+from framework.models.job import ResourceClass, RetryPolicy
+from framework.services.job_cancellation import CancellationToken
 
 
 class ScriptOutput(BaseModel):
@@ -12,12 +43,23 @@ class ScriptOutput(BaseModel):
     data: Any | None = None
 
 
+class ScriptFailedError(Exception):
+    """Raised for a script job whose script returned an unsuccessful output."""
+
+
 class Script(BaseModel):
     # Input (Any or None)
 
     # Output
     output: ScriptOutput | None = None
 
+    # Cancellation, checked by `_run` (see framework.services.job_cancellation)
+    _cancel_token: CancellationToken = PrivateAttr(default_factory=CancellationToken)
+
+    @property
+    def cancel_token(self) -> CancellationToken:
+        return self._cancel_token
+
     # Run
     @abstractmethod
     def _validate_input(self, *args: Any, **kwargs: Any) -> bool:
@@ -27,8 +69,12 @@ class Script(BaseModel):
     def _run(self, *args: Any, **kwargs: Any) -> ScriptOutput:
         pass
 
-    def run(self, *args: Any, **kwargs: Any) -> ScriptOutput:
+    def run(
+        self, *args: Any, cancel_token: CancellationToken | None = None, **kwargs: Any
+    ) -> ScriptOutput:
         logger.info(f"Script {self.__class__.__name__}: Running script.")
+        if cancel_token is not None:
+            self._cancel_token = cancel_token
         if not self._validate_input(*args, **kwargs):
             raise ValueError("Script input validation failed.")
 
@@ -39,3 +85,159 @@ class Script(BaseModel):
         logger.info(f"Script {self.__class__.__name__}: Script completed.")
 
         return self.output
+
+
+class ScriptInfo(BaseModel):
+    name: str
+    path: str  # "module:attribute"
+    resource_class: ResourceClass = ResourceClass.cpu
+    estimated_runtime_seconds: float | None = None
+    queue_name: str | None = None  # Default queue, if the script should not use "default"
+    meta_schema: type[BaseModel] | None = None  # Validates the job's `meta`
+    retry_policy: RetryPolicy | None = None  # For the jobs without their own retry policy
+    description: str | None = None
+
+
+ScriptType = TypeVar("ScriptType", bound=type[Script])
+
+
+class ScriptRegistry:
+    """Maps script names to their classes and metadata."""
+
+    def __init__(self) -> None:
+        self._scripts: dict[str, ScriptInfo] = {}
+        self._classes: dict[str, type[Script]] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, info: ScriptInfo) -> None:
+        existing = self._scripts.get(info.name)
+        if existing and existing.path != info.path:
+            raise ValueError(
+                f"Script {info.name} is already registered as {existing.path}, not {info.path}"
+            )
+        if existing is None:
+            self._scripts[info.name] = info
+
+    def register_lazy(
+        self,
+        path: str,
+        name: str | None = None,
+        resource_class: ResourceClass = ResourceClass.cpu,
+        estimated_runtime_seconds: float | None = None,
+        queue_name: str | None = None,
+        meta_schema: type[BaseModel] | None = None,
+        retry_policy: RetryPolicy | None = None,
+        description: str | None = None,
+    ) -> ScriptInfo:
+        """
+        Register a script by dotted path without importing it.
+
+        Args:
+            path: "module:attribute" of the script class.
+            name: Name jobs use as `command`. Defaults to the class name.
+            resource_class: The resource the script mostly uses.
+            estimated_runtime_seconds: Typical runtime, for scheduling.
+            queue_name: Queue the script's jobs go to by default.
+            meta_schema: Model the job's `meta` has to validate against.
+            retry_policy: Retry policy of the script's jobs.
+            description: Short description.
+
+        Returns:
+            The registered script info.
+        """
+        if ":" not in path:
+            raise ValueError(f"Script path must be 'module:attribute', got {path}")
+        info = ScriptInfo(
+            name=name or path.split(":", 1)[1],
+            path=path,
+            resource_class=resource_class,
+            estimated_runtime_seconds=estimated_runtime_seconds,
+            queue_name=queue_name,
+            meta_schema=meta_schema,
+            retry_policy=retry_policy,
+            description=description,
+        )
+        with self._lock:
+            self._add(info)
+        return self._scripts[info.name]
+
+    def register(
+        self,
+        name: str | None = None,
+        resource_class: ResourceClass = ResourceClass.cpu,
+        estimated_runtime_seconds: float | None = None,
+        queue_name: str | None = None,
+        meta_schema: type[BaseModel] | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> Callable[[ScriptType], ScriptType]:
+        """Class decorator registering a script. See `register_lazy` for the arguments.
+
+        If the script was already registered lazily, its lazy metadata is kept.
+        """
+
+        def decorator(script_class: ScriptType) -> ScriptType:
+            info = ScriptInfo(
+                name=name or script_class.__name__,
+                path=f"{script_class.__module__}:{script_class.__qualname__}",
+                resource_class=resource_class,
+                estimated_runtime_seconds=estimated_runtime_seconds,
+                queue_name=queue_name,
+                meta_schema=meta_schema,
+                retry_policy=retry_policy,
+                description=(script_class.__doc__ or "").strip().split("\n")[0] or None,
+            )
+            with self._lock:
+                self._add(info)
+                self._classes[info.name] = script_class
+            return script_class
+
+        return decorator
+
+    def get_info(self, name: str) -> ScriptInfo:
+        info = self._scripts.get(name)
+        if info is None:
+            raise ValueError(
+                f"Unknown script class name: {name}. Hint: if you just added a new script, "
+                "register it with `scripts.register` or `scripts.register_lazy`."
+            )
+        return info
+
+    def get_class(self, name: str) -> type[Script]:
+        """Get a script class, importing its module on first use."""
+        script_class = self._classes.get(name)
+        if script_class is not None:
+            return script_class
+
+        info = self.get_info(name)
+        module_name, attribute = info.path.split(":", 1)
+        script_class = getattr(import_module(module_name), attribute)
+        if not (isinstance(script_class, type) and issubclass(script_class, Script)):
+            raise ValueError(f"{info.path} is not a Script")
+        with self._lock:
+            self._classes[name] = script_class
+        return script_class
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._classes
+
+    def validate_meta(self, name: str, meta: dict[str, Any]) -> None:
+        """Raise a ValueError if `meta` doesn't match the script's meta schema."""
+        meta_schema = self.get_info(name).meta_schema
+        if meta_schema is None:
+            return
+        try:
+            meta_schema.model_validate(meta)
+        except ValidationError as e:
+            raise ValueError(f"Invalid meta for script {name}: {e}") from e
+
+    def get_all(self) -> list[ScriptInfo]:
+        return list(self._scripts.values())
+
+
+# Singleton instance of the registry
+script_registry = ScriptRegistry()
+
+register = script_registry.register
+register_lazy = script_registry.register_lazy
+get_script_class = script_registry.get_class
+get_script_info = script_registry.get_info
@@ -0,0 +1,123 @@
+"""
+This service samples system metrics (GPU, CPU, disk) on a background thread and keeps
+the most recent samples in a ring buffer, so callers can read them without blocking.
+"""
+
+import threading
+from collections import deque
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+from pydantic import BaseModel
+
+from app import logger, settings
+from framework.utils.system_status import get_cpu_stats, get_disk_stats, get_gpu_stats
+
+
+class SystemMetricsSample(BaseModel):
+    sampled_at: datetime
+    gpu_usage: float | None = None
+    gpu_memory_used: float | None = None
+    cpu_usage: float | None = None
+    total_disk_space: int | None = None
+    used_disk_space: int | None = None
+    free_disk_space: int | None = None
+    disk_usage: float | None = None
+
+
+class SystemMetricsSampler(threading.Thread):
+    """
+    A background thread that polls system metrics at a fixed interval and stores
+    the samples in a ring buffer.
+    """
+
+    def __init__(self, interval_seconds: float = 15, buffer_size: int = 240):
+        super().__init__(daemon=True)
+        self.interval_seconds = interval_seconds
+        self._samples: deque[SystemMetricsSample] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._subscribers: list[Callable[[SystemMetricsSample], None]] = []
+        self.stop_event = threading.Event()
+
+    def subscribe(self, callback: Callable[[SystemMetricsSample], None]) -> None:
+        """Registers a callback that is called with every new sample."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[SystemMetricsSample], None]) -> None:
+        """Removes a previously registered callback."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def sample(self) -> SystemMetricsSample:
+        """
+        Takes a single sample and appends it to the ring buffer.
+        CPU usage is measured since the previous sample, so this never sleeps.
+        """
+        stats: dict[str, float | int | None] = {}
+        stats.update(get_gpu_stats())
+        stats.update(get_cpu_stats(interval=None))
+        stats.update(get_disk_stats())
+
+        sample = SystemMetricsSample(sampled_at=datetime.now(tz=timezone.utc), **stats)
+        with self._lock:
+            self._samples.append(sample)
+
+        for callback in list(self._subscribers):
+            try:
+                callback(sample)
+            except Exception as e:
+                logger.error(f"System metrics subscriber {callback} failed: {e}")
+
+        return sample
+
+    def get_latest(self) -> SystemMetricsSample | None:
+        """Returns the most recent sample, or None if nothing has been sampled yet."""
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    def get_samples(self) -> list[SystemMetricsSample]:
+        """Returns a copy of all samples in the ring buffer, oldest first."""
+        with self._lock:
+            return list(self._samples)
+
+    def run(self) -> None:
+        """
+        The main loop for the sampler thread.
+        """
+        logger.info("System metrics sampler thread started.")
+
+        # Prime psutil so the first CPU reading covers a full interval
+        get_cpu_stats(interval=None)
+
+        while not self.stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Error sampling system metrics: {e}")
+            self.stop_event.wait(self.interval_seconds)
+
+    def stop(self) -> None:
+        """
+        Stops the sampler thread gracefully.
+        """
+        logger.info("Stopping system metrics sampler thread.")
+        self.stop_event.set()
+
+
+# Singleton instance of the sampler
+system_metrics_sampler = SystemMetricsSampler(
+    interval_seconds=settings.SYSTEM_METRICS_INTERVAL_SECONDS,
+    buffer_size=settings.SYSTEM_METRICS_BUFFER_SIZE,
+)
+
+
+def start_system_metrics_sampler() -> None:
+    """Starts the global system metrics sampler thread."""
+    if not system_metrics_sampler.is_alive():
+        system_metrics_sampler.start()
+
+
+def stop_system_metrics_sampler() -> None:
+    """Stops the global system metrics sampler thread."""
+    system_metrics_sampler.stop()
@@ -5,7 +5,10 @@ This module defines the Huey tasks for background job processing.
 import json
 import subprocess
 import traceback
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from typing import TextIO
 from uuid import uuid4
 
 import requests
@@ -15,57 +18,69 @@ from sqlmodel import Session
 from app import logger, paths, settings
 from app.tasks.execute_tasks import hook_get_script_class_from_class_name
 from framework import crud, models
+from framework.core.backplane import backplane
 from framework.core.db import get_db_context
 from framework.core.huey import huey_default, huey_reserved
 from framework.logic.jobs import push_jobs_to_websocket
+from framework.services.job_cancellation import (
+    CancellationToken,
+    JobCancelledError,
+    kill_process_group,
+)
+from framework.services.job_reaper import JobHeartbeat, job_reaper
+from framework.services.job_retry import mark_for_retry
+from framework.services.profiling import ProfilerBusyError, profile
+from framework.services.resource_scheduler import resource_scheduler
+from framework.services.scripts import ScriptFailedError, script_registry
 from framework.tasks.execute_scheduler import check_repeat_schedulers
+from framework.utils.process_usage import ProcessUsage, ProcessUsageMonitor
+from framework.workflows import FAILED_STATUSES, cancel_dependents
 
 
-def _trigger_next_queued_job(queue_name: str) -> None:
+def _dispatch_queued_jobs(queue_name: str | None = None) -> None:
     """
-    Finds the next queued job and triggers it for execution.
-    This function is called after a job completes to ensure continuous processing.
+    Dispatches the queued jobs whose resource slots are free.
+    This function is called after a job completes, so the slots it held are reused.
     """
-    logger.info("--- HUEY CONSUMER: Checking for next queued job ---")
+    logger.info("--- HUEY CONSUMER: Dispatching queued jobs ---")
 
     with get_db_context() as db:
-        # Get all jobs and filter for queued status
-        all_jobs = crud.job.sync.get_all_jobs_for_env_name(
-            db, env_name=settings.ENV_NAME, queue_name=queue_name
-        )
-        queued_jobs = [j for j in all_jobs if j.status == models.JobStatus.queued]
-
-        if not queued_jobs:
-            logger.debug("No queued jobs found. Waiting for new jobs...")
-            return
-
-        # Sort by priority: highest -> high -> normal -> low -> lowest
-        priority_order = {
-            models.job.Priority.highest: 0,
-            models.job.Priority.high: 1,
-            models.job.Priority.normal: 2,
-            models.job.Priority.low: 3,
-            models.job.Priority.lowest: 4,
-        }
-        queued_jobs.sort(key=lambda j: priority_order[j.priority])
-
-        next_job = queued_jobs[0]
-
-        logger.info(
-            f"Triggering next job from queue: {next_job.id} ({next_job.name}) "
-            f"with priority {next_job.priority.value}"
+        dispatched = resource_scheduler.dispatch(db, queue_name=queue_name)
+        if not dispatched:
+            logger.debug("No queued jobs fit the free slots. Waiting for new jobs...")
+
+
+def _save_job_usage(
+    db: Session,
+    db_job: models.Job,
+    usage: ProcessUsage | None,
+    exit_code: int | None = None,
+) -> None:
+    """Store the exit code and resource usage of a job, without failing the job."""
+    try:
+        obj_in = models.JobUpdate(
+            exit_code=exit_code,
+            cpu_time_seconds=usage.cpu_time_seconds if usage else None,
+            peak_rss_bytes=usage.peak_rss_bytes if usage else None,
         )
-
-        # Enqueue the job for execution in Huey
-        _execute_job_task(job_id=str(next_job.id), priority=priority_order[next_job.priority])
+        crud.job.sync.update(db, obj_in=obj_in, id=db_job.id)
+    except Exception as e:
+        logger.error(f"Job {str(db_job.id)[:8]}: Failed to save resource usage: {e}")
 
 
-def _run_command_job(db: Session, db_job: models.Job, command: str | None = None) -> None:
+def _run_command_job(
+    db: Session,
+    db_job: models.Job,
+    command: str | None = None,
+    cancel_token: CancellationToken | None = None,
+) -> None:
     """
     Executes a command-line job using subprocess and logs output in real-time.
+    The command runs in its own process group, which is killed when the job is cancelled.
 
     Args:
         job: The job to execute.
+        cancel_token: Cancelled when the job is stopped.
     """
     logger.debug(f"\nJob {str(db_job.id)[:8]}: Recieved run_command_job() request.")
 
@@ -87,7 +102,10 @@ def _run_command_job(db: Session, db_job: models.Job, command: str | None = None
                 text=True,
                 bufsize=1,  # Line buffered
                 universal_newlines=True,
+                start_new_session=True,  # Own process group, so the whole tree can be killed
             )
+            if cancel_token:
+                cancel_token.add_callback(lambda: kill_process_group(process.pid))
 
             # Update the job with the PID
             db_job.pid = process.pid
@@ -95,15 +113,18 @@ def _run_command_job(db: Session, db_job: models.Job, command: str | None = None
 
             crud.job.sync.update(db, obj_in=models.JobUpdate(pid=db_job.pid), id=db_job.id)
 
-            # Read and write output in real-time
-            if process.stdout:
-                for line in process.stdout:
-                    log_file.write(line)
-                    log_file.flush()  # Ensure immediate writing to disk
-                    logger.debug(f"Job {str(db_job.id)[:8]}: OUTPUT: {line.strip()}")
+            with ProcessUsageMonitor(pid=process.pid) as usage_monitor:
+                # Read and write output in real-time
+                if process.stdout:
+                    for line in process.stdout:
+                        log_file.write(line)
+                        log_file.flush()  # Ensure immediate writing to disk
+                        logger.debug(f"Job {str(db_job.id)[:8]}: OUTPUT: {line.strip()}")
 
-            # Wait for the process to complete
-            return_code = process.wait()
+                # Wait for the process to complete
+                return_code = process.wait()
+
+            _save_job_usage(db, db_job, usage=usage_monitor.usage, exit_code=return_code)
 
             if return_code == 0:
                 logger.info(f"Job {str(db_job.id)[:8]}: SUCCESSFULLY COMPLETED")
@@ -123,9 +144,32 @@ def _run_command_job(db: Session, db_job: models.Job, command: str | None = None
         raise
 
 
-def _run_script_job(db_job: models.Job) -> None:
+@contextmanager
+def _profile_job(db_job: models.Job, log_file: TextIO) -> Iterator[None]:
+    """
+    Profile the block if the job's meta has `"profile": true`. The report is saved next
+    to the job log, as `job_<id>_retry_<n>_profile.html` (or `.txt` with cProfile).
+    """
+    if not db_job.meta.get("profile"):
+        yield
+        return
+
+    try:
+        profile_path = paths.JOB_LOGS_PATH / f"job_{db_job.id}_retry_{db_job.retry_count}_profile"
+        with profile(profile_path) as report:
+            log_file.write(f"profile: {report.path.name}\n")
+            yield
+    except ProfilerBusyError:
+        log_file.write("profile: skipped, another job is being profiled in this worker\n")
+        yield
+
+
+def _run_script_job(
+    db: Session, db_job: models.Job, cancel_token: CancellationToken | None = None
+) -> None:
     """
     Executes a script job using the script class.
+    The script gets the cancel token to check while it runs.
     """
     logger.debug(f"Job {str(db_job.id)[:8]}: Recieved run_script_job() request.")
 
@@ -145,13 +189,19 @@ def _run_script_job(db_job: models.Job) -> None:
 
         # Get scripts from the app: app.tasks.execute_tasks.py via hook
         script_class = hook_get_script_class_from_class_name(script_class_name=script_class_name)
+        script_registry.validate_meta(script_class_name, db_job.meta)
 
+        usage_monitor = ProcessUsageMonitor()
+        usage_monitor.start()
         try:
             db_job.meta["job_id"] = str(db_job.id)
-            script_output = script_class().run(**db_job.meta)
+            with _profile_job(db_job, log_file):
+                script_output = script_class().run(cancel_token=cancel_token, **db_job.meta)
         except Exception as e:
             log_file.write(f"Error: {e}\n Traceback: {traceback.format_exc()}\n")
             raise e
+        finally:
+            _save_job_usage(db, db_job, usage=usage_monitor.stop())
 
         log_file.write(
             f"Output: \n\n success: {script_output.success}\n message: {script_output.message}\n data: \n{json.dumps(script_output.data, indent=4)}\n"
@@ -159,6 +209,9 @@ def _run_script_job(db_job: models.Job) -> None:
 
     logger.info(f"Script {script_class_name} \noutput: {script_output}")
 
+    if script_output.success is False:
+        raise ScriptFailedError(script_output.message or f"Script {script_class_name} failed.")
+
 
 def _run_api_post_job(job: models.Job) -> None:  # TODO: Not implemented yet (dummy code)
     """
@@ -190,55 +243,120 @@ def _safe_push_jobs_to_websocket(context_msg: str = "") -> None:
         logger.error(f"[WebSocket] Failed to push jobs to websocket. {context_msg} Error: {e}")
 
 
-def _execute_job_task(job_id: str, priority: int = 100) -> None:
+def _was_cancelled(db: Session, db_job: models.Job, cancel_token: CancellationToken) -> bool:
+    """
+    Whether the job was stopped while it ran. The job's status may have been changed
+    before the heartbeat noticed it, e.g. when its process group was killed right away.
+    """
+    if cancel_token.is_cancelled:
+        return True
+    db.refresh(db_job)
+    if db_job.status != models.JobStatus.running:
+        cancel_token.cancel()
+        return True
+    return False
+
+
+def _fail_job(
+    db: Session,
+    db_job: models.Job,
+    exc: Exception,
+    status: models.JobStatus,
+    reason: str,
+    cancel_token: CancellationToken,
+) -> models.Job:
+    """
+    Set a failed job to retrying and schedule its retry if its retry policy allows it,
+    otherwise to the given status. A job that failed because it was stopped keeps the
+    status it was stopped with.
+    """
+    if _was_cancelled(db, db_job, cancel_token):
+        logger.warning(f"Job {str(db_job.id)[:8]}: CANCELLED ({reason}: {exc})")
+        return db_job
+
+    delay = mark_for_retry(db, job=db_job, exc=exc)
+    if delay is not None:
+        retry_task = (
+            retry_job_task_reserved if db_job.queue_name == "reserved" else retry_job_task_default
+        )
+        retry_task.schedule(args=(str(db_job.id),), delay=delay)
+        _safe_push_jobs_to_websocket(f"Job {db_job.id}: status set to retrying ({reason})")
+        return db_job
+
+    obj_in = models.JobUpdate(status=status)
+    db_job = crud.job.sync.update(db, db_obj=db_job, obj_in=obj_in)
+    _safe_push_jobs_to_websocket(f"Job {db_job.id}: status set to {status.value} ({reason})")
+    return db_job
+
+
+def _execute_job_task(job_id: str, priority: int = 100, claim_token: str | None = None) -> None:
     """
     Huey task to execute a job and update its status.
     This is the entry point for background job execution.
-    Version: 7 - Added proper status management and race condition protection
+    Version: 11 - Dispatched jobs are started with their claim token
+
+    Args:
+        job_id: The ID of the job to execute.
+        priority: Huey priority of the task.
+        claim_token: Token of the scheduler's claim. None: the task claims the job itself.
     """
     logger.info("\n\n\n")
     logger.info(f"--- EXECUTING JOB: {job_id} ---")
 
     with get_db_context() as db:
-        # First, try to claim the job by updating its status to "running"
+        # Claim the job by atomically updating its status from "queued" to "dispatched"
         # This prevents race conditions where multiple consumers might try to run the same job
-        db_job = crud.job.sync.get(db, id=job_id)
+        if claim_token is None:
+            new_claim_token = crud.job.sync.claim_queued_job(db, id=job_id)
+            if new_claim_token is None:
+                logger.warning(
+                    f"Job {job_id[:8]}: Job is not in queued status. "
+                    f"Another consumer may be processing it. Aborting task."
+                )
+                return
+            claim_token = str(new_claim_token)
 
-        logger.info(f"Job {str(db_job.id)[:8]}: Name: {db_job.name}")
+        # Only the task holding the current claim starts the job, a duplicate or stale task
+        # (the job was stopped or claimed again in the meantime) does nothing
+        if not crud.job.sync.start_claimed_job(db, id=job_id, claim_token=claim_token):
+            logger.warning(
+                f"Job {job_id[:8]}: Job is no longer dispatched with this task's claim. "
+                f"It was changed after it was claimed. Aborting task."
+            )
+            _dispatch_queued_jobs()
+            return
 
+        db_job = crud.job.sync.get(db, id=job_id)
         if not db_job:
             logger.error(f"Huey Consumer could not find job with ID: {job_id}. Aborting task.")
             return
 
-        # Check if job is still in queued status (race condition protection)
-        if db_job.status != models.JobStatus.queued:
-            logger.warning(
-                f"Job {str(db_job.id)[:8]}: Job is not in queued status (current: {db_job.status}). "
-                f"Another consumer may be processing it. Aborting task."
-            )
-            return
+        logger.info(f"Job {str(db_job.id)[:8]}: Name: {db_job.name}")
 
-        # Atomically update job status to "running" to claim it
-        try:
-            obj_in = models.JobUpdate(status=models.JobStatus.running)
-            db_job = crud.job.sync.update(db, db_obj=db_job, obj_in=obj_in)
-            _safe_push_jobs_to_websocket(f"Job {db_job.id}: status set to running")
-            logger.debug(
-                f"Job {str(db_job.id)[:8]}: Status updated to 'running' - job claimed for execution"
-            )
-        except Exception as e:
-            logger.error(f"Job {str(db_job.id)[:8]}: Failed to update status to 'running': {e}")
-            return
+        _safe_push_jobs_to_websocket(f"Job {db_job.id}: status set to running")
+        logger.debug(f"Job {str(db_job.id)[:8]}: Status is 'running' - job claimed for execution")
+
+        # Beat while the job runs, so the reaper can tell a running job from a dead worker.
+        # The heartbeat cancels the token once the job is no longer running (stopped)
+        cancel_token = CancellationToken()
+        heartbeat = JobHeartbeat(
+            job_id=str(db_job.id),
+            interval=settings.JOB_HEARTBEAT_INTERVAL_SECONDS,
+            cancel_token=cancel_token,
+        )
+        heartbeat.start()
 
         job_succeeded = False
         try:
             logger.info(f"Job {str(db_job.id)[:8]}: Starting execution...")
             if db_job.type == models.JobType.command:
                 try:
-                    _run_command_job(db=db, db_job=db_job)
+                    _run_command_job(db=db, db_job=db_job, cancel_token=cancel_token)
                     job_succeeded = True
                 except Exception as e:
-                    if "died with <Signals.SIGKILL: 9>" in str(e):
+                    if "died with <Signals.SIGKILL: 9>" in str(e) and not _was_cancelled(
+                        db, db_job, cancel_token
+                    ):
                         logger.error(f"Job {str(db_job.id)[:8]}: KILLED by SIGKILL signal")
                         # Handle SIGKILL specifically - could add custom handling here
 
@@ -255,26 +373,46 @@ def _execute_job_task(job_id: str, priority: int = 100) -> None:
                 _run_api_post_job(db_job)
                 job_succeeded = True
             elif db_job.type == models.JobType.script:
-                _run_script_job(db_job)
+                _run_script_job(db=db, db_job=db_job, cancel_token=cancel_token)
                 job_succeeded = True
 
+            if job_succeeded and _was_cancelled(db, db_job, cancel_token):
+                job_succeeded = False
+                raise JobCancelledError("Job was stopped while it ran.")
+
+        except JobCancelledError as e:
+            # The status was set by whoever stopped the job
+            logger.warning(f"Job {str(db_job.id)[:8]}: CANCELLED: {e}")
+
         except requests.exceptions.Timeout as e:
             logger.error(f"Job {db_job.id}: REQUEST TIMEOUT: {e}", exc_info=True)
 
-            # Update Status to error
-            obj_in = models.JobUpdate(status=models.JobStatus.error)
-            db_job = crud.job.sync.update(db, db_obj=db_job, obj_in=obj_in)
-            _safe_push_jobs_to_websocket(f"Job {db_job.id}: status set to error (timeout)")
+            # Update Status to retrying or error
+            db_job = _fail_job(
+                db,
+                db_job,
+                exc=e,
+                status=models.JobStatus.error,
+                reason="timeout",
+                cancel_token=cancel_token,
+            )
 
         except Exception as e:
             logger.error(f"\nJob {db_job.id}: FAILED: {e}", exc_info=True)
 
-            # Update Status to failed
-            obj_in = models.JobUpdate(status=models.JobStatus.failed)
-            db_job = crud.job.sync.update(db, db_obj=db_job, obj_in=obj_in)
-            _safe_push_jobs_to_websocket(f"Job {db_job.id}: status set to failed (exception)")
+            # Update Status to retrying or failed
+            db_job = _fail_job(
+                db,
+                db_job,
+                exc=e,
+                status=models.JobStatus.failed,
+                reason="exception",
+                cancel_token=cancel_token,
+            )
 
         finally:
+            heartbeat.stop()
+
             if job_succeeded:
                 # Update Status to done
                 obj_in = models.JobUpdate(status=models.JobStatus.done)
@@ -283,77 +421,50 @@ def _execute_job_task(job_id: str, priority: int = 100) -> None:
 
                 logger.debug(f"Job {str(db_job.id)[:8]}: Updated status to 'done'.")
 
+            if db_job.status in FAILED_STATUSES:
+                for dependent in cancel_dependents(db, job_id=db_job.id):
+                    logger.warning(
+                        f"Job {str(dependent.id)[:8]}: Cancelled because job "
+                        f"{str(db_job.id)[:8]} it depends on is {db_job.status.value}."
+                    )
+
             logger.info(f"--- FINISHED JOB: {str(db_job.id)[:8]} ---\n\n\n")
 
-            # Trigger the next queued job after this one completes
-            _trigger_next_queued_job(queue_name=db_job.queue_name)
+            # Dispatch the queued jobs that fit the slots this job held, in any queue,
+            # including the jobs that were waiting for this one
+            _dispatch_queued_jobs()
 
 
-def _check_and_process_queued_jobs(queue_name: str) -> None:
+def _retry_job(job_id: str) -> None:
     """
-    Periodic task that checks for queued jobs and triggers them for processing.
-    This ensures that jobs get processed even if the trigger_next_queued_job()
-    mechanism fails or if jobs are added while no jobs are running.
+    Delayed task that queues a job waiting for its retry and dispatches the queued jobs.
     """
-    logger.info(f"--- HUEY CONSUMER: Periodic check for queued jobs ({queue_name}) ---")
-
+    logger.info(f"--- HUEY CONSUMER: Retrying job {job_id[:8]} ---")
     with get_db_context() as db:
-        # Check if there are any running jobs
-        all_jobs = crud.job.sync.get_all_jobs_for_env_name(
-            db, env_name=settings.ENV_NAME, queue_name=queue_name
-        )
-        running_jobs = [j for j in all_jobs if j.status == models.JobStatus.running]
-
-        # If no jobs are running, check for queued jobs
-        if not running_jobs:
-            queued_jobs = [j for j in all_jobs if j.status == models.JobStatus.queued]
-            if queued_jobs:
-                logger.info(
-                    f"Found {len(queued_jobs)} queued jobs with no running jobs. Triggering next job."
-                )
-                _trigger_next_queued_job(queue_name=queue_name)
-            else:
-                logger.debug("No running jobs and no queued jobs found.")
-        else:
-            logger.debug(f"Found {len(running_jobs)} running job(s). Skipping queued job check.")
+        if not crud.job.sync.requeue_retrying_job(db, id=job_id):
+            logger.warning(f"Job {job_id[:8]}: Job is no longer waiting for a retry. Skipping.")
+            return
+        resource_scheduler.dispatch(db)
 
 
-def _cleanup_stuck_jobs(queue_name: str) -> None:
+def _check_and_process_queued_jobs(queue_name: str) -> None:
     """
-    Periodic task that checks for jobs that have been 'running' for too long
-    and may be stuck. This helps recover from situations where a job process
-    died but the status wasn't updated.
+    Periodic task that checks for queued jobs and dispatches them for processing.
+    This ensures that jobs get processed even if the dispatch after a finished job
+    fails or if jobs are added while no jobs are running.
     """
-    logger.info("--- HUEY CONSUMER: Checking for stuck jobs ---")
-
-    with get_db_context() as db:
-        all_jobs = crud.job.sync.get_all_jobs_for_env_name(
-            db, env_name=settings.ENV_NAME, queue_name=queue_name
-        )
-        running_jobs = [j for j in all_jobs if j.status == models.JobStatus.running]
+    logger.info(f"--- HUEY CONSUMER: Periodic check for queued jobs ({queue_name}) ---")
+    _dispatch_queued_jobs(queue_name=queue_name)
 
-        for job in running_jobs:
-            # Check if the process is still running
-            if job.pid:
-                try:
-                    import os
 
-                    os.kill(job.pid, 0)  # Check if process exists
-                    logger.debug(f"Job {job.id} with PID {job.pid} is still running")
-                except OSError:
-                    # Process is no longer running, but status wasn't updated
-                    logger.warning(
-                        f"Job {job.id} has PID {job.pid} but process is not running. Marking as failed."
-                    )
-                    obj_in = models.JobUpdate(status=models.JobStatus.failed)
-                    crud.job.sync.update(db, db_obj=job, obj_in=obj_in)
-            else:
-                # Job has no PID but is marked as running - this shouldn't happen
-                logger.warning(
-                    f"Job {job.id} is marked as running but has no PID. Marking as failed."
-                )
-                obj_in = models.JobUpdate(status=models.JobStatus.failed)
-                crud.job.sync.update(db, db_obj=job, obj_in=obj_in)
+def _reap_stale_jobs() -> None:
+    """
+    Periodic task that requeues or fails the running jobs without a recent heartbeat.
+    This is the fallback for the reaper loop of the web server, which runs every few
+    seconds.
+    """
+    logger.info("--- HUEY CONSUMER: Checking for stale jobs ---")
+    job_reaper.reap()
 
 
 def _enqueue_hourly_jobs(queue_name: str) -> None:
@@ -417,14 +528,35 @@ def _spawn_recurring_jobs(queue_name: str) -> None:
     _enqueue_daily_jobs(queue_name=queue_name)
 
 
+@huey_default.on_startup()
+@huey_reserved.on_startup()
+def share_websocket_backplane() -> None:
+    """Publish the broadcasts of the consumer's jobs to the clients of the web workers."""
+    backplane.share()
+
+
+@huey_default.task()
+def execute_job_task_default(
+    job_id: str, priority: int = 100, claim_token: str | None = None
+) -> None:
+    _execute_job_task(job_id=job_id, priority=priority, claim_token=claim_token)
+
+
+@huey_reserved.task()
+def execute_job_task_reserved(
+    job_id: str, priority: int = 100, claim_token: str | None = None
+) -> None:
+    _execute_job_task(job_id=job_id, priority=priority, claim_token=claim_token)
+
+
 @huey_default.task()
-def execute_job_task_default(job_id: str, priority: int = 100) -> None:
-    _execute_job_task(job_id=job_id, priority=priority)
+def retry_job_task_default(job_id: str) -> None:
+    _retry_job(job_id=job_id)
 
 
 @huey_reserved.task()
-def execute_job_task_reserved(job_id: str, priority: int = 100) -> None:
-    _execute_job_task(job_id=job_id, priority=priority)
+def retry_job_task_reserved(job_id: str) -> None:
+    _retry_job(job_id=job_id)
 
 
 @huey_default.periodic_task(crontab(minute="*/1"))  # Check every 1 minute
@@ -442,14 +574,14 @@ def check_and_process_queued_jobs_reserved() -> None:
     _check_and_process_queued_jobs(queue_name="reserved")
 
 
-@huey_default.periodic_task(crontab(minute="*/5"))  # Check every 5 minutes
-def cleanup_stuck_jobs_default() -> None:
-    _cleanup_stuck_jobs(queue_name="default")
+@huey_default.periodic_task(crontab(minute="*/1"))  # Check every 1 minute
+def reap_stale_jobs_default() -> None:
+    _reap_stale_jobs()
 
 
-@huey_reserved.periodic_task(crontab(minute="*/5"))
-def cleanup_stuck_jobs_reserved() -> None:
-    _cleanup_stuck_jobs(queue_name="reserved")
+@huey_reserved.periodic_task(crontab(minute="*/1"))
+def reap_stale_jobs_reserved() -> None:
+    _reap_stale_jobs()
 
 
 @huey_default.periodic_task(crontab(minute="0"), queue_name="default")  # TODO: NOT IMPLEMENTED YET
@@ -3,6 +3,11 @@ from datetime import datetime, timezone
 from app import settings
 
 
+def utc_now() -> datetime:
+    """Current UTC time as a naive datetime, like the timestamps of the job table."""
+    return datetime.now(tz=timezone.utc).replace(tzinfo=None)
+
+
 def parse_datetime(dt: str | datetime) -> datetime:
     """Convert string to datetime if needed."""
     if isinstance(dt, str):
@@ -1,17 +1,26 @@
-from phi.model.anthropic.claude import Claude
-from phi.model.base import Model
-from phi.model.google.gemini import Gemini
-from phi.model.groq.groq import Groq
-from phi.model.openai.chat import OpenAIChat
+from typing import TYPE_CHECKING
 
 
-def get_llm_model(provider: str, model_str: str) -> Model:
+if TYPE_CHECKING:
+    from phi.model.base import Model
+
+
+def get_llm_model(provider: str, model_str: str) -> "Model":
+    # The providers are imported on first use, each pulls in its own SDK
     if provider == "openai":
+        from phi.model.openai.chat import OpenAIChat
+
         return OpenAIChat(id=model_str)
     if provider == "anthropic":
+        from phi.model.anthropic.claude import Claude
+
         return Claude(id=model_str)
     if provider == "groq":
+        from phi.model.groq.groq import Groq
+
         return Groq(id=model_str)
     if provider == "google":
+        from phi.model.google.gemini import Gemini
+
         return Gemini(id=model_str)
     raise ValueError(f"Provider {provider} not supported")
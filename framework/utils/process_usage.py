@@ -0,0 +1,111 @@
+"""
+Resource accounting for jobs: CPU time from `getrusage` and peak RSS sampled with psutil.
+"""
+
+import os
+import resource
+import threading
+from types import TracebackType
+
+import psutil
+from pydantic import BaseModel
+
+
+class ProcessUsage(BaseModel):
+    cpu_time_seconds: float
+    peak_rss_bytes: int
+
+
+def _cpu_seconds(who: int) -> float:
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+class ProcessUsageMonitor:
+    """
+    Measures the CPU time and peak RSS of a process tree while it runs.
+
+    CPU time is the `getrusage` delta of the children this process waited for (the job's
+    subprocess and its descendants), plus this process itself when the work runs
+    in-process (script jobs). Peak RSS is the highest sampled sum over the process and
+    its children.
+
+    In-process, the RSS of the worker when monitoring starts is subtracted from the peak,
+    so it's what the job added. Both values are still worker-level: jobs running at the
+    same time in other threads of the worker are included.
+
+    Args:
+        pid: Root process to sample. Defaults to this process.
+        interval: Seconds between RSS samples.
+    """
+
+    def __init__(self, pid: int | None = None, interval: float = 1.0) -> None:
+        self.pid = pid or os.getpid()
+        self.interval = interval
+        self.usage: ProcessUsage | None = None
+        self._in_process = self.pid == os.getpid()
+        self._peak_rss_bytes = 0
+        self._baseline_rss_bytes = 0
+        self._cpu_start = 0.0
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _get_cpu_seconds(self) -> float:
+        cpu_seconds = _cpu_seconds(resource.RUSAGE_CHILDREN)
+        if self._in_process:
+            cpu_seconds += _cpu_seconds(resource.RUSAGE_SELF)
+        return cpu_seconds
+
+    def sample(self) -> int:
+        """Sample the RSS of the process tree and update the peak."""
+        try:
+            root = psutil.Process(self.pid)
+            processes = [root, *root.children(recursive=True)]
+        except psutil.NoSuchProcess:
+            return 0
+
+        rss_bytes = 0
+        for process in processes:
+            try:
+                rss_bytes += process.memory_info().rss
+            except psutil.NoSuchProcess:
+                continue
+        self._peak_rss_bytes = max(self._peak_rss_bytes, rss_bytes)
+        return rss_bytes
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def start(self) -> None:
+        self._cpu_start = self._get_cpu_seconds()
+        rss_bytes = self.sample()
+        if self._in_process:
+            self._baseline_rss_bytes = rss_bytes
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> ProcessUsage:
+        """Stop sampling. Call after the process was waited for."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        if self._in_process:
+            self.sample()
+        self.usage = ProcessUsage(
+            cpu_time_seconds=max(0.0, self._get_cpu_seconds() - self._cpu_start),
+            peak_rss_bytes=max(0, self._peak_rss_bytes - self._baseline_rss_bytes),
+        )
+        return self.usage
+
+    def __enter__(self) -> "ProcessUsageMonitor":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stop()
@@ -1,11 +1,12 @@
 import shutil
-import subprocess
 from pathlib import Path
 from typing import Any
 
 import psutil
 from pydantic import BaseModel
 
+from framework.services.gpu_telemetry import gpu_telemetry
+
 
 class SystemStatus(BaseModel):
     cpu_usage: float
@@ -17,34 +18,35 @@ class SystemStatus(BaseModel):
 
 
 def get_gpu_stats() -> dict[str, Any]:
-    try:
-        result = subprocess.run(
-            [
-                "nvidia-smi",
-                "--query-gpu=utilization.gpu,memory.used",
-                "--format=csv,nounits,noheader",
-            ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-            text=True,
-            check=True,
-            timeout=5,
-        )
-        usage, mem_used = result.stdout.strip().split(", ")
-        status = {
-            "gpu_usage": float(usage),
-            "gpu_memory_used": float(mem_used),
-        }
-        return status
-    except Exception:
+    """Get GPU usage from the shared GPU telemetry.
+
+    Returns:
+        Dictionary containing the average utilization and the total memory used (MiB)
+        across all GPUs, or None values if no GPU telemetry is available.
+    """
+    samples = gpu_telemetry.sample()
+    if not samples:
         return {
             "gpu_usage": None,
             "gpu_memory_used": None,
         }
+    return {
+        "gpu_usage": sum(s.utilization for s in samples) / len(samples),
+        "gpu_memory_used": sum(s.memory_used for s in samples),
+    }
 
 
-def get_cpu_stats() -> dict[str, float]:
-    cpu = psutil.cpu_percent(interval=0.5)
+def get_cpu_stats(interval: float | None = 0.5) -> dict[str, float]:
+    """Get CPU usage.
+
+    Args:
+        interval: Seconds to block while measuring. `None` returns the usage since the
+            previous call without blocking.
+
+    Returns:
+        Dictionary containing the CPU usage percentage.
+    """
+    cpu = psutil.cpu_percent(interval=interval)
     return {
         "cpu_usage": cpu,
     }
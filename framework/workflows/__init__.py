@@ -0,0 +1,24 @@
+from .dag import (
+    FAILED_STATUSES,
+    WAITING_STATUSES,
+    Workflow,
+    WorkflowStep,
+    cancel_dependents,
+    create_workflow_jobs,
+    filter_ready_jobs,
+    get_dependency_statuses,
+    get_unknown_job_ids,
+)
+
+
+__all__ = [
+    "FAILED_STATUSES",
+    "WAITING_STATUSES",
+    "Workflow",
+    "WorkflowStep",
+    "cancel_dependents",
+    "create_workflow_jobs",
+    "filter_ready_jobs",
+    "get_dependency_statuses",
+    "get_unknown_job_ids",
+]
@@ -0,0 +1,181 @@
+"""
+Job dependencies and workflows.
+
+A job with `depends_on` stays queued until every job it depends on is done. The resource
+scheduler only dispatches ready jobs, so the children of a job start as soon as it
+finishes (and their slots are free), while unrelated jobs keep running next to them.
+When a job fails, errors or is cancelled, the jobs waiting on it are cancelled.
+
+A workflow is a DAG of jobs submitted together, e.g. one branch per character:
+
+    Workflow(
+        name="Lora: alice",
+        steps=[
+            WorkflowStep(key="train", job=models.JobCreate(...)),
+            WorkflowStep(key="xy", job=models.JobCreate(...), depends_on=["train"]),
+        ],
+    )
+
+The steps become jobs sharing a `workflow_id`, with `depends_on` set to the job ids of
+the steps they depend on.
+"""
+
+from collections import deque
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel, Field
+from sqlmodel import Session, col, select
+
+from framework import crud, models
+
+
+# A job depending on a job with one of these statuses can never run
+FAILED_STATUSES = {models.JobStatus.failed, models.JobStatus.error, models.JobStatus.cancelled}
+
+# Statuses of jobs that are waiting to run
+WAITING_STATUSES = [models.JobStatus.pending, models.JobStatus.queued]
+
+
+class WorkflowStep(BaseModel):
+    key: str = Field(description="Name of the step, unique within the workflow.")
+    job: models.JobCreate
+    depends_on: list[str] = Field(default_factory=list, description="Keys of parent steps.")
+
+
+class Workflow(BaseModel):
+    name: str = ""
+    steps: list[WorkflowStep]
+
+    def get_order(self) -> list[WorkflowStep]:
+        """
+        Sort the steps so every step comes after the steps it depends on.
+
+        Raises:
+            ValueError: If a key is duplicated or unknown, or the steps contain a cycle.
+        """
+        steps = {step.key: step for step in self.steps}
+        if len(steps) != len(self.steps):
+            raise ValueError(f"Workflow {self.name} has duplicate step keys.")
+
+        children: dict[str, list[str]] = {key: [] for key in steps}
+        parent_counts = dict.fromkeys(steps, 0)
+        for step in self.steps:
+            for parent_key in step.depends_on:
+                if parent_key not in steps:
+                    raise ValueError(f"Step {step.key} depends on unknown step {parent_key}.")
+                children[parent_key].append(step.key)
+                parent_counts[step.key] += 1
+
+        ready = deque(key for key, count in parent_counts.items() if count == 0)
+        order = []
+        while ready:
+            key = ready.popleft()
+            order.append(steps[key])
+            for child_key in children[key]:
+                parent_counts[child_key] -= 1
+                if parent_counts[child_key] == 0:
+                    ready.append(child_key)
+
+        if len(order) != len(self.steps):
+            raise ValueError(f"Workflow {self.name} contains a dependency cycle.")
+        return order
+
+
+def create_workflow_jobs(db: Session, workflow: Workflow) -> list[models.Job]:
+    """
+    Create the queued jobs of a workflow in a single transaction.
+
+    Returns:
+        The created jobs, parents before children.
+
+    Raises:
+        ValueError: If the steps are invalid (see `Workflow.get_order`), or a job depends on
+            a job id that doesn't exist.
+    """
+    order = workflow.get_order()
+    unknown_ids = get_unknown_job_ids(db, [id for step in order for id in step.job.depends_on])
+    if unknown_ids:
+        raise ValueError(
+            f"Workflow {workflow.name} depends on unknown jobs: {', '.join(sorted(unknown_ids))}."
+        )
+
+    workflow_id = uuid4()
+    job_ids: dict[str, str] = {}
+    jobs_in = []
+    for step in order:
+        job_ids[step.key] = str(step.job.id)
+        jobs_in.append(
+            step.job.model_copy(
+                update={
+                    "workflow_id": workflow_id,
+                    "depends_on": [
+                        *step.job.depends_on,
+                        *(job_ids[parent_key] for parent_key in step.depends_on),
+                    ],
+                    "status": models.JobStatus.queued,
+                }
+            )
+        )
+    return crud.job.sync.create_many(db, objs_in=jobs_in)
+
+
+def get_unknown_job_ids(db: Session, ids: list[str]) -> set[str]:
+    """Get the ids that aren't the id of a job (including the malformed ones)."""
+    uuids: dict[UUID, str] = {}
+    unknown_ids = set()
+    for id in ids:
+        try:
+            uuids[UUID(id)] = id
+        except ValueError:
+            unknown_ids.add(id)
+    if uuids:
+        statement = select(col(models.Job.id)).where(col(models.Job.id).in_(uuids))
+        known = set(db.exec(statement))
+        unknown_ids.update(id for uuid, id in uuids.items() if uuid not in known)
+    return unknown_ids
+
+
+def get_dependency_statuses(db: Session, jobs: list[models.Job]) -> dict[str, models.JobStatus]:
+    """Get the status of every job the given jobs depend on, in a single query."""
+    ids = {UUID(id) for job in jobs for id in job.depends_on}
+    if not ids:
+        return {}
+    statement = select(col(models.Job.id), col(models.Job.status)).where(
+        col(models.Job.id).in_(ids)
+    )
+    return {str(id): status for id, status in db.exec(statement)}
+
+
+def filter_ready_jobs(db: Session, jobs: list[models.Job]) -> list[models.Job]:
+    """
+    Keep the jobs whose dependencies are all done, in their original order.
+
+    A dependency that no longer exists (the job was deleted) doesn't block.
+    """
+    statuses = get_dependency_statuses(db, jobs)
+    done = models.JobStatus.done
+    return [job for job in jobs if all(statuses.get(id, done) == done for id in job.depends_on)]
+
+
+def cancel_dependents(db: Session, job_id: UUID | str) -> list[models.Job]:
+    """
+    Cancel the waiting jobs that depend on a job, directly or through other jobs.
+
+    Returns:
+        The cancelled jobs.
+    """
+    waiting_jobs = crud.job.sync.get_multi(db, col(models.Job.status).in_(WAITING_STATUSES))
+    cancelled: list[models.Job] = []
+    failed_ids = deque([str(job_id)])
+    while failed_ids:
+        failed_id = failed_ids.popleft()
+        for job in waiting_jobs:
+            if failed_id in job.depends_on and job not in cancelled:
+                cancelled.append(job)
+                failed_ids.append(str(job.id))
+
+    if cancelled:
+        crud.job.sync.update_many_status(
+            db, ids=[job.id for job in cancelled], status=models.JobStatus.cancelled
+        )
+    return cancelled
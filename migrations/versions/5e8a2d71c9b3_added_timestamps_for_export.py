@@ -0,0 +1,47 @@
+"""added created_at/updated_at for export
+
+Revision ID: 5e8a2d71c9b3
+Revises: 3c9e1f7a2b40
+Create Date: 2026-10-19 14:03:52.118904
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a2d71c9b3'
+down_revision = '3c9e1f7a2b40'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ['sdbasemodel', 'sdcheckpoint', 'sdextranetwork', 'character']
+
+
+def _get_timestamp_columns() -> list[sa.Column]:
+    return [
+        sa.Column(name, sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False)
+        for name in ('created_at', 'updated_at')
+    ]
+
+
+def upgrade() -> None:
+    is_sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table in TABLES:
+        if is_sqlite:
+            # SQLite can't ALTER TABLE ADD COLUMN with a CURRENT_TIMESTAMP default, so the
+            # table is recreated
+            with op.batch_alter_table(table, schema=None, recreate='always') as batch_op:
+                for column in _get_timestamp_columns():
+                    batch_op.add_column(column)
+        else:
+            for column in _get_timestamp_columns():
+                op.add_column(table, column)
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
+            batch_op.drop_column('created_at')
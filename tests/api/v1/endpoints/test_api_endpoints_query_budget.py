@@ -0,0 +1,92 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import models, settings
+from framework import crud
+from tests.plugins.query_budget import QueryBudget
+
+
+def _add_library(db: Session, count: int) -> None:
+    """Add base models with checkpoints, characters and their extra networks."""
+    for i in range(count):
+        db.add(models.SDBaseModel(id=f"base_{i}", name=f"Base {i}"))
+        db.add(
+            models.SDCheckpoint(
+                id=f"checkpoint_{i}", name=f"Checkpoint {i}", sd_base_model_id=f"base_{i}"
+            )
+        )
+        db.add(models.Character(id=f"character_{i}", person_name=f"Person {i}"))
+        db.add(
+            models.SDExtraNetwork(
+                id=f"lora_{i}",
+                sd_base_model_id=f"base_{i}",
+                character_id=f"character_{i}",
+                network="lora",
+            )
+        )
+    db.commit()
+
+
+def test_export_query_budget(
+    budget_db: Session, budget_client: TestClient, query_budget: QueryBudget
+) -> None:
+    """Test that the export runs the same few queries however much data there is."""
+    _add_library(budget_db, count=10)
+
+    # One query per table and one per eager loaded relationship
+    with query_budget(9, max_repeats=2):
+        r = budget_client.get(f"{settings.API_V1_PREFIX}/export")
+
+    assert r.status_code == 200
+    assert len(r.json()["sd_extra_networks"]) == 10
+
+
+def test_network_state_query_budget(
+    budget_db: Session,
+    budget_client: TestClient,
+    query_budget: QueryBudget,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that the network state reads all instance states at once."""
+    monkeypatch.setattr(settings, "ENV_NAME", "host")
+    for env_name in ["dev", "local", "playground", "host"]:
+        budget_db.add(
+            models.InstanceState(id=env_name, project_name="risa", base_url=f"http://{env_name}")
+        )
+    budget_db.commit()
+
+    with query_budget(1):
+        r = budget_client.get(f"{settings.API_V1_PREFIX}/state/network")
+
+    assert r.status_code == 200
+
+
+def test_list_sd_extra_networks_query_budget(
+    budget_db: Session, budget_client: TestClient, query_budget: QueryBudget
+) -> None:
+    """Test that listing extra networks doesn't query per network."""
+    _add_library(budget_db, count=10)
+
+    with query_budget(3, max_repeats=1):
+        r = budget_client.get(f"{settings.API_V1_PREFIX}/api/v1/sd-extra-networks/")
+
+    assert r.status_code == 200
+    assert len(r.json()) == 10
+
+
+def test_job_writes_query_budget(
+    budget_db: Session, budget_client: TestClient, query_budget: QueryBudget
+) -> None:
+    """Test that creating a job and broadcasting all jobs doesn't query per job."""
+    crud.job.sync.create_many(
+        budget_db,
+        objs_in=[models.JobCreate(name=f"job {i}", command="echo") for i in range(20)],
+    )
+
+    # The insert, its refresh and the list of jobs broadcast to the websocket clients
+    with query_budget(3, max_repeats=1):
+        r = budget_client.post(
+            f"{settings.API_V1_PREFIX}/jobs/", json={"name": "new job", "command": "echo"}
+        )
+    assert r.status_code == 201
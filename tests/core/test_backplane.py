@@ -0,0 +1,71 @@
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from framework.core.backplane import Backplane, FakeRedis, RedisBackplane, SQLiteBackplane
+
+
+def _collect(backplane: Backplane, channel: str) -> list[dict[str, Any]]:
+    received: list[dict[str, Any]] = []
+
+    async def handler(message: dict[str, Any]) -> None:
+        received.append(message)
+
+    backplane.subscribe(channel, handler)
+    return received
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backplane(tmp_path: Path) -> None:
+    """Test that every worker receives the broadcasts of the others, and not old ones."""
+    path = tmp_path / "backplane.db"
+    publisher = SQLiteBackplane(path=path)
+    publisher.share()
+    await publisher.publish("jobs", {"jobs": ["before start"]})
+
+    workers = [SQLiteBackplane(path=path) for _ in range(2)]
+    received = [_collect(worker, "jobs") for worker in workers]
+    for worker in workers:
+        await worker.start()
+
+    await publisher.publish("jobs", {"jobs": [1]})
+    await publisher.publish("other", {"jobs": [2]})
+    for worker in workers:
+        await worker.poll()
+
+    assert received == [[{"jobs": [1]}], [{"jobs": [1]}]]
+    for backplane in [publisher, *workers]:
+        await backplane.stop()
+
+
+@pytest.mark.asyncio
+async def test_backplane_delivers_locally_until_started(tmp_path: Path) -> None:
+    """Test that a backplane that isn't started or shared doesn't publish to other processes."""
+    path = tmp_path / "backplane.db"
+    backplane = SQLiteBackplane(path=path)
+    received = _collect(backplane, "jobs")
+
+    await backplane.publish("jobs", {"jobs": [1]})
+
+    assert received == [{"jobs": [1]}]
+    assert not path.exists()
+
+
+@pytest.mark.asyncio
+async def test_redis_backplane_with_fake_redis() -> None:
+    """Test that the Redis backplane delivers through pub/sub to all started workers."""
+    redis = FakeRedis()
+    workers = [RedisBackplane(client=redis) for _ in range(2)]
+    received = [_collect(worker, "app_status") for worker in workers]
+    for worker in workers:
+        await worker.start()
+
+    await workers[0].publish("app_status", {"app_status": {"a1111": True}})
+    await asyncio.sleep(0.05)
+
+    assert received == [[{"app_status": {"a1111": True}}]] * 2
+    for worker in workers:
+        await worker.stop()
+    assert redis.pubsubs == []
@@ -0,0 +1,19 @@
+from pathlib import Path
+
+from framework.core.leader import LeaderLock
+
+
+def test_leader_lock(tmp_path: Path) -> None:
+    """Test that only one worker leads, and another takes over once it's released."""
+    leader = LeaderLock(lock_path=tmp_path / "leader.lock")
+    follower = LeaderLock(lock_path=tmp_path / "leader.lock")
+
+    assert leader.try_acquire()
+    assert leader.try_acquire()
+    assert not follower.try_acquire()
+    assert not follower.is_leader
+
+    leader.release()
+    assert follower.try_acquire()
+    assert follower.is_leader
+    assert not leader.try_acquire()
@@ -0,0 +1,128 @@
+import json
+import os
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import create_engine
+
+from framework.core.prometheus import Counter, Histogram, Registry
+from framework.middleware.timing import (
+    RequestMetricsMiddleware,
+    http_request_db_queries,
+    http_request_duration_seconds,
+    http_requests_in_progress,
+    http_requests_total,
+    instrument_engine,
+)
+
+
+def test_registry_render() -> None:
+    """Test the text exposition format of counters, gauges and histograms."""
+    registry = Registry()
+    counter = registry.counter("requests_total", "Requests.", ["status"])
+    gauge = registry.gauge("queue_depth", "Queue depth.")
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    registry.add_collector(lambda: gauge.set(3))
+
+    counter.inc(status="200")
+    counter.inc(2, status="200")
+    histogram.observe(0.1)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{status="200"} 3',
+        "# HELP queue_depth Queue depth.",
+        "# TYPE queue_depth gauge",
+        "queue_depth 3",
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.6",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_registry_adds_up_workers(tmp_path: Path) -> None:
+    """Test that a render adds up the metrics of the live workers, except shared ones."""
+
+    def write_worker_snapshot(pid: int, requests: int, latency: float) -> Path:
+        counter = Counter("requests_total", "Requests.", ["status"])
+        counter.inc(requests, status="200")
+        histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        histogram.observe(latency)
+        snapshot = {
+            "requests_total": counter.dump(),
+            "latency_seconds": histogram.dump(),
+            "queue_depth": [[[], 100]],
+        }
+        path = tmp_path / f"{pid}.json"
+        path.write_text(json.dumps(snapshot))
+        return path
+
+    write_worker_snapshot(1, requests=2, latency=0.5)
+    exited = write_worker_snapshot(2, requests=10, latency=5)
+    os.utime(exited, (0, 0))
+
+    registry = Registry()
+    counter = registry.counter("requests_total", "Requests.", ["status"])
+    gauge = registry.gauge("queue_depth", "Queue depth.", shared=True)
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    counter.inc(status="200")
+    gauge.set(3)
+    histogram.observe(0.05)
+
+    registry.enable_multiprocess(tmp_path, interval=60)
+    try:
+        assert json.loads((tmp_path / f"{os.getpid()}.json").read_text()) == {
+            "requests_total": [[["200"], 1]],
+            "latency_seconds": [[[], [1, 0, 0], 0.05]],
+        }
+        lines = registry.render().splitlines()
+    finally:
+        registry.stop()
+
+    assert 'requests_total{status="200"} 3' in lines
+    assert "queue_depth 3" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert "latency_seconds_count 2" in lines
+    assert not (tmp_path / f"{os.getpid()}.json").exists()
+
+
+def test_request_metrics_middleware() -> None:
+    """Test that requests are recorded per route template, with their queries."""
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    instrument_engine(engine)
+
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int) -> dict[str, int]:
+        with engine.connect() as conn:
+            for _ in range(item_id):
+                conn.execute(text("SELECT 1"))
+        return {"item_id": item_id}
+
+    route = "/items/{item_id}"
+    before = http_request_duration_seconds.get_count(method="GET", route=route)
+    queries_before = http_request_db_queries.get_sum(method="GET", route=route)
+
+    client = TestClient(app)
+    assert client.get("/items/2").status_code == 200
+    assert client.get("/items/3").status_code == 200
+    assert client.get("/missing").status_code == 404
+
+    assert http_request_duration_seconds.get_count(method="GET", route=route) == before + 2
+    # Queries are counted once per request, even with the hooks added twice
+    assert http_request_db_queries.get_sum(method="GET", route=route) == queries_before + 5
+    assert http_requests_total.get(method="GET", route="<unmatched>", status="404") >= 1
+    assert http_requests_in_progress.get(method="GET", route=route) == 0
@@ -0,0 +1,44 @@
+from sqlalchemy import text
+from sqlmodel import create_engine
+
+from framework.core.query_counter import QueryCounter, get_statement_shape
+
+
+def test_statement_shape() -> None:
+    """Test that literals and parameter lists are collapsed into a single shape."""
+    assert get_statement_shape("SELECT * FROM job WHERE id = ?") == get_statement_shape(
+        "SELECT *\n  FROM job WHERE id = 'abc'"
+    )
+    assert (
+        get_statement_shape("SELECT * FROM job WHERE id IN (?, ?, ?) LIMIT 10")
+        == "SELECT * FROM job WHERE id IN (?) LIMIT ?"
+    )
+    # Numbers inside identifiers are kept
+    assert get_statement_shape("SELECT anon_1.id FROM job_2") == "SELECT anon_1.id FROM job_2"
+
+
+def test_query_counter_flags_repeated_shapes() -> None:
+    """Test that a query in a loop is reported as a repeated shape."""
+    engine = create_engine("sqlite://")
+
+    with QueryCounter(engine=engine) as counter, engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        for i in range(5):
+            conn.execute(text("SELECT :i"), {"i": i})
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 2"))
+
+    assert counter.count == 6
+    assert counter.get_repeated_shapes(threshold=3) == {"SELECT ?": 6}
+
+
+def test_query_counter_nested() -> None:
+    """Test that nested counters both see the statements of the inner block."""
+    engine = create_engine("sqlite://")
+
+    with QueryCounter(engine=engine) as outer, engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with QueryCounter(engine=engine) as inner:
+            conn.execute(text("SELECT 2"))
+
+    assert (outer.count, inner.count) == (2, 1)
@@ -0,0 +1,65 @@
+import asyncio
+import json
+from typing import Any
+
+import pytest
+
+from framework.core.backplane import LocalBackplane
+from framework.core.websocket import WebSocketConnection, WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0, fail: bool = False) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.sent: list[dict[str, Any]] = []
+        self.closed = False
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("Connection lost")
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = True
+
+
+def test_connection_queue_coalesces_and_drops() -> None:
+    """Test that snapshots replace pending ones and the oldest message is dropped when full."""
+    connection = WebSocketConnection(FakeWebSocket(), max_queue_size=2)  # type: ignore
+
+    assert connection.put("jobs 1", coalesce_key="jobs")
+    assert connection.put("delta 1")
+    assert connection.put("jobs 2", coalesce_key="jobs")
+    assert [text for _, text in connection.queue] == ["jobs 2", "delta 1"]
+
+    assert not connection.put("delta 2")
+    assert [text for _, text in connection.queue] == ["delta 1", "delta 2"]
+
+
+@pytest.mark.asyncio
+async def test_broadcast_fan_out() -> None:
+    """Test that a slow client doesn't delay the others and a dead one is evicted."""
+    manager = WebSocketManager(backplane=LocalBackplane(), send_timeout=0.5)
+    fast, slow, dead = FakeWebSocket(), FakeWebSocket(delay=0.3), FakeWebSocket(fail=True)
+    for websocket in [fast, slow, dead]:
+        await manager.connect(websocket)  # type: ignore
+
+    for i in range(3):
+        await manager.broadcast({"jobs": [i]})
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+
+    assert fast.sent == [{"jobs": [0]}, {"jobs": [1]}, {"jobs": [2]}]
+    assert dead.closed and manager.active_connections == [fast, slow]
+
+    # The slow client skips the snapshots that were replaced while it was sending
+    await asyncio.sleep(0.7)
+    assert slow.sent == [{"jobs": [0]}, {"jobs": [2]}]
+
+    manager.disconnect(fast)  # type: ignore
+    manager.disconnect(slow)  # type: ignore
@@ -0,0 +1,19 @@
+import pytest
+from sqlmodel import Session
+
+from framework import crud, models
+from tests.plugins.query_budget import QueryBudget
+
+
+@pytest.mark.asyncio
+async def test_get_all_jobs_query_budget(budget_db: Session, query_budget: QueryBudget) -> None:
+    """Test that listing jobs runs the same few queries however many jobs there are."""
+    budget_db.add_all([models.Job(name=f"job {i}", command="echo") for i in range(20)])
+    budget_db.commit()
+    budget_db.expire_all()
+
+    with query_budget(3, max_repeats=1):
+        jobs = await crud.job.get_all(budget_db)
+        response = [job.model_dump(mode="json") for job in jobs]
+
+    assert len(response) == 20
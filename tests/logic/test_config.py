@@ -0,0 +1,51 @@
+import os
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from app.logic.config import ConfigService
+
+
+CONFIG_YAML = """
+accent: "{accent}"
+idle_watcher: {{}}
+jobs: {{}}
+app_manager:
+  apps: []
+"""
+
+
+def test_config_is_cached_until_file_changes(tmp_path: Path, mocker: MockerFixture) -> None:
+    """Test that the config is parsed once and reloaded when the file's mtime changes."""
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(CONFIG_YAML.format(accent="#000000"))
+    service = ConfigService(config_path=config_path)
+    subscriber = mocker.Mock()
+    service.subscribe(subscriber)
+
+    config = service.get()
+    assert service.get() is config
+    subscriber.assert_called_once_with(config)
+
+    config_path.write_text(CONFIG_YAML.format(accent="#ffffff"))
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    reloaded = service.get()
+    assert reloaded is not config
+    assert reloaded.accent == "#ffffff"
+    assert subscriber.call_count == 2
+
+
+def test_invalid_config_keeps_previous(tmp_path: Path) -> None:
+    """Test that a broken config file does not replace the cached config."""
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(CONFIG_YAML.format(accent="#000000"))
+    service = ConfigService(config_path=config_path)
+    config = service.get()
+
+    config_path.write_text("accent: [")
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert service.get() is config
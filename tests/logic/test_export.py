@@ -0,0 +1,87 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session
+
+from app import models
+from app.logic.export import iter_export_ndjson
+
+
+def _add_records(db: Session) -> None:
+    db.add(models.SDBaseModel(id="sdxl", name="SDXL"))
+    db.add(models.SDBaseModel(id="sd15", name="SD 1.5"))
+    db.add(models.SDCheckpoint(id="ponyRealism", name="Pony Realism", sd_base_model_id="sdxl"))
+    for character_id in ["alice", "bob"]:
+        db.add(models.Character(id=character_id, person_name=character_id.title()))
+        db.add(
+            models.SDExtraNetwork(
+                id=f"{character_id}_lora_sdxl",
+                sd_base_model_id="sdxl",
+                character_id=character_id,
+                hub_file_path=f"/hub/loras/{character_id}.safetensors",
+            )
+        )
+    db.commit()
+
+
+def _parse(chunks: list[str]) -> list[dict]:  # type: ignore
+    return [json.loads(line) for line in "".join(chunks).splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson(db: Session) -> None:
+    """Test that the stream contains every record across batches and the character ids."""
+    _add_records(db)
+
+    lines = _parse(list(iter_export_ndjson(db, batch_size=1)))
+
+    assert lines[0]["type"] == "meta"
+    assert lines[-1] == {
+        "type": "end",
+        "counts": {
+            "sd_base_models": 2,
+            "sd_checkpoints": 1,
+            "sd_extra_networks": 2,
+            "characters": 2,
+        },
+    }
+    assert [line["data"]["id"] for line in lines if line["type"] == "sd_base_models"] == [
+        "sd15",
+        "sdxl",
+    ]
+    character_ids: dict[str, list[str]] = {}
+    for line in lines:
+        if line["type"] == "character_ids_for_sd_base_models":
+            character_ids.update(line["data"])
+    assert character_ids == {"sd15": [], "sdxl": ["alice", "bob"]}
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_updated_since(db: Session) -> None:
+    """Test that an incremental export only contains records updated since the given time."""
+    _add_records(db)
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    for model in [models.SDBaseModel, models.SDCheckpoint, models.SDExtraNetwork]:
+        for row in db.query(model).all():
+            row.updated_at = old
+    for row in db.query(models.Character).all():
+        row.updated_at = old if row.id == "alice" else datetime.now(tz=timezone.utc)
+    db.commit()
+
+    # The same time, naive (taken as UTC), in UTC and in another timezone
+    since = old + timedelta(days=1)
+    for updated_since in [
+        since.replace(tzinfo=None),
+        since,
+        since.astimezone(timezone(timedelta(hours=-5))),
+    ]:
+        lines = _parse(list(iter_export_ndjson(db, updated_since=updated_since)))
+
+        assert lines[-1]["counts"] == {
+            "sd_base_models": 0,
+            "sd_checkpoints": 0,
+            "sd_extra_networks": 0,
+            "characters": 1,
+        }
+        assert [line["data"]["id"] for line in lines if line["type"] == "characters"] == ["bob"]
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+from app.logic.hub_sync import (
+    HubManifest,
+    HubManifestEntry,
+    HubSyncAction,
+    apply_hub_sync_plan,
+    plan_hub_sync,
+)
+from app.logic.transfer import TransferFile
+
+
+def _manifest(hub_path: str, entries: dict[str, str]) -> HubManifest:
+    return HubManifest(
+        env_name="test",
+        hub_path=hub_path,
+        entries=[HubManifestEntry(path=p, size=4, sha256=s) for p, s in entries.items()],
+    )
+
+
+def test_plan_hub_sync(tmp_path: Path) -> None:
+    """Test that known content is skipped, moved or linked and only new content is sent."""
+    hub = tmp_path / "hub"
+    (hub / "loras").mkdir(parents=True)
+    for name, content in [("same", b"AAAA"), ("old_name", b"BBBB"), ("shared", b"CCCC")]:
+        (hub / "loras" / f"{name}.safetensors").write_bytes(content)
+
+    source_manifest = _manifest(
+        "/workspace/hub",
+        {
+            "loras/same.safetensors": "A",
+            "loras/new_name.safetensors": "B",
+            "loras/shared.safetensors": "C",
+            "loras/shared_copy.safetensors": "C",
+            "loras/unknown.safetensors": "D",
+        },
+    )
+    destination_manifest = _manifest(
+        str(hub),
+        {
+            "loras/same.safetensors": "A",
+            "loras/old_name.safetensors": "B",
+            "loras/shared.safetensors": "C",
+        },
+    )
+    files = [
+        TransferFile(path=p, size=4)
+        for p in [
+            "same.safetensors",
+            "new_name.safetensors",
+            "shared_copy.safetensors",
+            "unknown.safetensors",
+            "unknown.json",
+        ]
+    ]
+
+    plan = plan_hub_sync(
+        files=files,
+        source_base="/workspace/hub/loras/",
+        source_manifest=source_manifest,
+        destination_base=hub / "loras",
+        destination_manifest=destination_manifest,
+        previous_source_manifest=_manifest(
+            "/workspace/hub",
+            {"loras/same.safetensors": "A", "loras/old_name.safetensors": "B"},
+        ),
+    )
+
+    assert [step.action for step in plan.steps] == [
+        HubSyncAction.skip,
+        HubSyncAction.move,
+        HubSyncAction.link,
+        HubSyncAction.transfer,
+        HubSyncAction.transfer,
+    ]
+    assert [f.path for f in plan.transfer_files] == ["unknown.safetensors", "unknown.json"]
+
+    apply_hub_sync_plan(plan, destination_base=hub / "loras")
+    assert not (hub / "loras" / "old_name.safetensors").exists()
+    assert (hub / "loras" / "new_name.safetensors").read_bytes() == b"BBBB"
+    assert (hub / "loras" / "shared_copy.safetensors").read_bytes() == b"CCCC"
+
+
+def test_plan_hub_sync_keeps_destination_only_files(tmp_path: Path) -> None:
+    """Test that a file the source never had under its name is linked, not moved."""
+    hub = tmp_path / "hub"
+    (hub / "loras").mkdir(parents=True)
+    (hub / "loras" / "local.safetensors").write_bytes(b"BBBB")
+
+    plan = plan_hub_sync(
+        files=[TransferFile(path="new_name.safetensors", size=4)],
+        source_base="/workspace/hub/loras/",
+        source_manifest=_manifest("/workspace/hub", {"loras/new_name.safetensors": "B"}),
+        destination_base=hub / "loras",
+        destination_manifest=_manifest(str(hub), {"loras/local.safetensors": "B"}),
+        previous_source_manifest=_manifest("/workspace/hub", {"loras/other.safetensors": "B"}),
+    )
+
+    assert [step.action for step in plan.steps] == [HubSyncAction.link]
+    apply_hub_sync_plan(plan, destination_base=hub / "loras")
+    assert (hub / "loras" / "local.safetensors").read_bytes() == b"BBBB"
+    assert (hub / "loras" / "new_name.safetensors").read_bytes() == b"BBBB"
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from framework import crud, models
+from framework.logic.job_stats import compute_job_stats, percentile
+
+
+def test_percentile() -> None:
+    """Test the interpolated percentiles."""
+    assert percentile([], 50) is None
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.5
+    assert percentile([float(i) for i in range(101)], 95) == 95.0
+
+
+def test_compute_job_stats() -> None:
+    """Test that jobs are grouped by type, script and queue with wait and run times."""
+    queued_at = datetime(2026, 1, 1)
+    jobs = [
+        models.Job(
+            type=models.JobType.script,
+            command="ScriptRsyncFiles",
+            status=models.JobStatus.done if i else models.JobStatus.failed,
+            queued_at=queued_at,
+            started_at=queued_at + timedelta(seconds=10 * i),
+            finished_at=queued_at + timedelta(seconds=10 * i + 60),
+            peak_rss_bytes=1000 * i,
+        )
+        for i in range(3)
+    ]
+    jobs.append(models.Job(type=models.JobType.command, command="ls", queue_name="reserved"))
+
+    stats = {s.name: s for s in compute_job_stats(jobs)}
+
+    rsync = stats["ScriptRsyncFiles"]
+    assert (rsync.count, rsync.failed) == (3, 1)
+    assert rsync.wait_seconds_p50 == 10
+    assert rsync.run_seconds_p95 == 60
+    assert rsync.peak_rss_bytes_max == 2000
+    assert stats["command"].queue_name == "reserved"
+    assert stats["command"].run_seconds_p50 is None
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_timestamps(db: Session) -> None:
+    """Test that status changes set the lifecycle timestamps."""
+    job = crud.job.sync.create(
+        db, obj_in=models.JobCreate(name="timing", status=models.JobStatus.queued)
+    )
+    assert job.queued_at is not None and job.started_at is None
+
+    claim_token = crud.job.sync.claim_queued_job(db, id=job.id)
+    assert claim_token is not None
+    db.refresh(job)
+    assert job.started_at is None
+
+    assert crud.job.sync.start_claimed_job(db, id=job.id, claim_token=claim_token)
+    db.refresh(job)
+    assert job.started_at is not None and job.finished_at is None
+
+    job = crud.job.sync.update(
+        db, id=job.id, obj_in=models.JobUpdate(status=models.JobStatus.done)
+    )
+    assert job.finished_at is not None and job.finished_at >= job.started_at
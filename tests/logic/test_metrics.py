@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+from app.logic.metrics import MetricBucket, MetricsRollup
+from framework.services.system_metrics import SystemMetricsSample
+
+
+def _sample(second: int, gpu_usage: float | None, cpu_usage: float) -> SystemMetricsSample:
+    return SystemMetricsSample(
+        sampled_at=datetime(2025, 7, 1, 12, 0, second, tzinfo=timezone.utc),
+        gpu_usage=gpu_usage,
+        cpu_usage=cpu_usage,
+    )
+
+
+def test_metric_bucket_aggregates() -> None:
+    """Test that a bucket keeps averages and maximums per metric, ignoring missing values."""
+    bucket = MetricBucket(bucket_start=0)
+    bucket.add(_sample(0, gpu_usage=10, cpu_usage=20))
+    bucket.add(_sample(15, gpu_usage=None, cpu_usage=40))
+    bucket.add(_sample(30, gpu_usage=30, cpu_usage=60))
+
+    assert bucket.sample_count == 3
+    assert bucket.average("gpu_usage") == 20
+    assert bucket.maxes["gpu_usage"] == 30
+    assert bucket.average("cpu_usage") == 40
+    assert bucket.maxes["cpu_usage"] == 60
+    assert bucket.average("disk_usage") is None
+
+
+def test_rollup_flushes_when_minute_changes(mocker) -> None:  # type: ignore
+    """Test that a completed minute is flushed once the next minute's first sample arrives."""
+    rollup = MetricsRollup(env_name="dev")
+    mock_flush = mocker.patch.object(rollup, "_flush_locked", wraps=rollup._flush_locked)
+    mocker.patch("app.logic.metrics.get_db_context")
+
+    rollup.add_sample(_sample(0, gpu_usage=0, cpu_usage=1))
+    rollup.add_sample(_sample(59, gpu_usage=0, cpu_usage=1))
+    assert mock_flush.call_count == 0
+
+    rollup.add_sample(
+        SystemMetricsSample(sampled_at=datetime(2025, 7, 1, 12, 1, 0, tzinfo=timezone.utc))
+    )
+    assert mock_flush.call_count == 1
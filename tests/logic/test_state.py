@@ -0,0 +1,46 @@
+import pytest
+from sqlmodel import Session
+
+from app import crud, models
+from app.logic.state import apply_instance_state_delta, save_instance_state_to_db
+from app.services.network_state import NetworkStateWatcher
+
+
+def _instance_state(**kwargs) -> models.InstanceState:  # type: ignore
+    return models.InstanceState(
+        id="test_env", project_name="Risa", base_url="http://localhost:8000", **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_save_instance_state_only_writes_changes(db: Session) -> None:
+    """Test that saving an instance state increments its version with the changed fields."""
+    created = await save_instance_state_to_db(db, _instance_state(cpu_usage=10))
+    assert created is not None and created.version == 1
+
+    assert await save_instance_state_to_db(db, _instance_state(cpu_usage=10)) is None
+
+    delta = await save_instance_state_to_db(db, _instance_state(cpu_usage=20))
+    assert delta is not None
+    assert delta.base_version == 1
+    assert delta.version == 2
+    assert delta.changes == {"cpu_usage": 20}
+
+    # A delta for an outdated version is rejected
+    stale = models.InstanceStateDelta(id="test_env", base_version=1, changes={"cpu_usage": 30})
+    assert await apply_instance_state_delta(db, stale) is None
+    assert crud.instance_state.sync.get(db, id="test_env").cpu_usage == 20
+
+
+@pytest.mark.asyncio
+async def test_network_state_watcher_refresh(db: Session) -> None:
+    """Test that the watcher only reports environments whose version changed."""
+    watcher = NetworkStateWatcher()
+    await save_instance_state_to_db(db, _instance_state(gpu_usage=0))
+    assert "test_env" in {delta.id for delta in watcher.refresh(db)}
+
+    assert watcher.refresh(db) == []
+
+    await save_instance_state_to_db(db, _instance_state(gpu_usage=50))
+    deltas = watcher.refresh(db)
+    assert [(delta.id, delta.changes) for delta in deltas] == [("test_env", {"gpu_usage": 50})]
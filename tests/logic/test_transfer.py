@@ -0,0 +1,50 @@
+from app.logic.transfer import (
+    TransferFile,
+    parse_list_only_output,
+    parse_progress2_line,
+    split_files,
+    split_source_spec,
+)
+
+
+def test_parse_list_only_output() -> None:
+    """Test that only regular files are parsed from `rsync --list-only` output."""
+    output = "\n".join(
+        [
+            "drwxr-xr-x          4,096 2024/05/06 10:11:12 loras",
+            "-rw-r--r--  2,147,483,648 2024/05/06 10:11:12 loras/a lora.safetensors",
+            "lrwxrwxrwx             12 2024/05/06 10:11:12 loras/link",
+            "-rw-r--r--            512 2024/05/06 10:11:12 loras/a.json",
+        ]
+    )
+
+    assert parse_list_only_output(output) == [
+        TransferFile(path="loras/a lora.safetensors", size=2_147_483_648),
+        TransferFile(path="loras/a.json", size=512),
+    ]
+
+
+def test_parse_progress2_line() -> None:
+    """Test that the transferred bytes are parsed from `--info=progress2` lines."""
+    assert parse_progress2_line("    1,234,567  12%   10.50MB/s    0:01:23 (xfr#1)") == 1234567
+    assert parse_progress2_line("sending incremental file list") is None
+
+
+def test_split_files_balances_size() -> None:
+    """Test that files are split into streams of similar total size."""
+    files = [TransferFile(path=str(size), size=size) for size in [10, 7, 5, 3, 1]]
+
+    buckets = split_files(files, streams=2)
+
+    assert len(buckets) == 2
+    assert sorted(sum(f.size for f in bucket) for bucket in buckets) == [13, 13]
+    assert split_files(files[:1], streams=4) == [files[:1]]
+
+
+def test_split_source_spec() -> None:
+    """Test that source specs are split like rsync resolves them."""
+    assert split_source_spec("/workspace/loras/") == ("/workspace/loras/", "")
+    assert split_source_spec("root@1.2.3.4:/workspace/loras") == (
+        "root@1.2.3.4:/workspace/",
+        "loras",
+    )
@@ -0,0 +1,100 @@
+"""
+Pytest plugin asserting the SQL query budget of endpoints, to catch N+1 regressions.
+
+Registered in the pytest options of pyproject.toml, so it loads without the root
+conftest. Its test client serves the API routers on an in-memory database, with the
+API key and user dependencies overridden.
+
+Example:
+    def test_list_budget(budget_client: TestClient, query_budget: QueryBudget) -> None:
+        with query_budget(3, max_repeats=1):
+            budget_client.get("/api/v1/jobs/")
+"""
+
+from collections.abc import Callable, Generator
+from contextlib import AbstractContextManager, contextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import models, settings
+from framework.api.deps import get_current_active_user
+from framework.core.api_key import get_api_key
+from framework.core.db import get_db
+from framework.core.query_counter import QueryCounter
+
+
+QueryBudget = Callable[..., AbstractContextManager[QueryCounter]]
+
+
+@pytest.fixture(name="budget_engine")
+def fixture_budget_engine() -> Generator[Engine, None, None]:
+    """In-memory database shared by the test and the client's thread."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="budget_db")
+def fixture_budget_db(budget_engine: Engine) -> Generator[Session, None, None]:
+    with Session(budget_engine) as db:
+        yield db
+
+
+@pytest.fixture(name="budget_client")
+def fixture_budget_client(budget_db: Session) -> Generator[TestClient, None, None]:
+    """Test client of the API routers, using `budget_db` and authenticated as a superuser."""
+    # Imported here so the plugin loads before the app's settings are needed
+    from app.routes.api import api_router
+
+    def override_get_db() -> Generator[Session, None, None]:
+        yield budget_db
+
+    app = FastAPI()
+    app.include_router(api_router, prefix=settings.API_V1_PREFIX)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_api_key] = lambda: "test"
+    app.dependency_overrides[get_current_active_user] = lambda: models.User(
+        id="test", username="test", email="test@example.com", is_superuser=True, hashed_password=""
+    )
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(name="query_budget")
+def fixture_query_budget(budget_engine: Engine) -> QueryBudget:
+    """
+    Fixture that asserts the SQL query budget of a block on `budget_engine`.
+
+    Args (of the returned context manager):
+        max_queries (int): maximum number of statements the block may run.
+        max_repeats (int | None): maximum number of times a statement shape may run.
+
+    Returns:
+        QueryBudget: the budget context manager.
+    """
+
+    @contextmanager
+    def query_budget(
+        max_queries: int, max_repeats: int | None = None
+    ) -> Generator[QueryCounter, None, None]:
+        # Not local: the test client runs the app in another thread
+        with QueryCounter(engine=budget_engine, local=False) as counter:
+            yield counter
+        assert counter.count <= max_queries, (
+            f"Query budget of {max_queries} exceeded: {counter.summary()}"
+        )
+        if max_repeats is not None:
+            assert not counter.get_repeated_shapes(max_repeats + 1), (
+                f"Statements repeated more than {max_repeats} times: "
+                f"{counter.summary(max_repeats + 1)}"
+            )
+
+    return query_budget
@@ -0,0 +1,126 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from app.logic.app_manager import AppManagerApp
+from app.services.app_supervisor import AppSupervisor
+from framework.core.backplane import LocalBackplane
+from framework.core.leader import LeaderLock
+
+
+@pytest.mark.asyncio
+async def test_status_is_cached_and_changes_are_broadcast(mocker: MockerFixture) -> None:
+    """Test that checks run once per TTL and only status changes are broadcast."""
+    apps = [
+        AppManagerApp(id="up", name="Up", command_check_running="true"),
+        AppManagerApp(id="down", name="Down", command_check_running="false"),
+    ]
+    mock_broadcast = mocker.patch(
+        "app.services.app_supervisor.app_manager_ws_manager.broadcast",
+        new_callable=mocker.AsyncMock,
+    )
+    supervisor = AppSupervisor(ttl_seconds=60)
+    mock_check = mocker.spy(supervisor, "check_app")
+
+    assert await supervisor.get_status_map(apps) == {"up": True, "down": False}
+    assert await supervisor.get_status_map(apps) == {"up": True, "down": False}
+    assert mock_check.call_count == 2
+    mock_broadcast.assert_awaited_once_with({"app_status": {"up": True, "down": False}})
+
+    supervisor.invalidate("down")
+    await supervisor.get_status_map(apps)
+    assert mock_check.call_count == 3
+    mock_broadcast.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_port_probe_for_closed_port() -> None:
+    """Test that an app without a check command is probed on its internal port."""
+    app = AppManagerApp(id="app", name="App", port_internal=1)
+
+    assert await AppSupervisor(check_timeout=1).check_app(app) is False
+
+
+@pytest.mark.asyncio
+async def test_supervised_app_start_and_stop(tmp_path: Path, mocker: MockerFixture) -> None:
+    """Test that a supervised app runs as a child process and is stopped with SIGTERM."""
+    mocker.patch(
+        "app.services.app_supervisor.app_manager_ws_manager.broadcast",
+        new_callable=mocker.AsyncMock,
+    )
+    app = AppManagerApp(
+        id="sleeper",
+        name="Sleeper",
+        command_run="sleep 30",
+        log_file=str(tmp_path / "sleeper.log"),
+        stop_timeout_seconds=5,
+    )
+    supervisor = AppSupervisor()
+
+    result = await supervisor.start_app(app)
+    assert result["success"] is True
+    managed = supervisor.get_managed_process("sleeper")
+    assert managed is not None and managed.is_running
+    assert await supervisor.get_status_map([app], force=True) == {"sleeper": True}
+    assert supervisor.get_resource_usage()["sleeper"].num_processes >= 1
+
+    await supervisor.stop_app(app)
+    assert not managed.is_running
+    assert await supervisor.get_status_map([app]) == {"sleeper": False}
+    assert "Starting Sleeper" in (tmp_path / "sleeper.log").read_text()
+
+
+@pytest.mark.asyncio
+async def test_commands_run_in_the_leader(tmp_path: Path, mocker: MockerFixture) -> None:
+    """Test that a command sent from any worker only runs in the leader."""
+    app = AppManagerApp(id="sleeper", name="Sleeper", command_run="sleep 30")
+    mocker.patch("app.services.app_supervisor.get_config").return_value.app_manager.apps = [app]
+    backplane = LocalBackplane()
+    leader_lock = LeaderLock(lock_path=tmp_path / "leader.lock")
+    follower_lock = LeaderLock(lock_path=tmp_path / "leader.lock")
+    assert leader_lock.try_acquire()
+    leader = AppSupervisor(backplane=backplane, leader=leader_lock)
+    follower = AppSupervisor(backplane=backplane, leader=follower_lock)
+    leader_start = mocker.patch.object(leader, "start_app", new_callable=mocker.AsyncMock)
+    follower_start = mocker.patch.object(follower, "start_app", new_callable=mocker.AsyncMock)
+
+    await follower.send_command("start", app)
+    await asyncio.gather(*leader._background_tasks)
+
+    leader_start.assert_awaited_once_with(app)
+    follower_start.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_config_change_stops_removed_apps(tmp_path: Path, mocker: MockerFixture) -> None:
+    """Test that a config reload updates edited apps and stops removed supervised apps."""
+    mocker.patch(
+        "app.services.app_supervisor.app_manager_ws_manager.broadcast",
+        new_callable=mocker.AsyncMock,
+    )
+    app = AppManagerApp(
+        id="sleeper",
+        name="Sleeper",
+        command_run="sleep 30",
+        log_file=str(tmp_path / "sleeper.log"),
+    )
+    other = AppManagerApp(id="other", name="Other", command_check_running="true")
+    supervisor = AppSupervisor(ttl_seconds=60)
+    await supervisor.start_app(app)
+    await supervisor.get_status_map([other])
+    managed = supervisor.get_managed_process("sleeper")
+    assert managed is not None and managed.is_running
+
+    config = mocker.Mock()
+    config.app_manager.apps = [app.model_copy(update={"auto_restart": True})]
+    supervisor.apply_config(config)
+    assert managed.app.auto_restart is True
+    assert "sleeper" in supervisor._stale
+
+    config.app_manager.apps = []
+    supervisor.apply_config(config)
+    await asyncio.gather(*supervisor._background_tasks)
+    assert not managed.is_running
+    assert "other" not in supervisor._statuses
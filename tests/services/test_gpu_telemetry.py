@@ -0,0 +1,88 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from framework.services.gpu_telemetry import FakeTelemetryProvider, GPUTelemetry
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(mocker: MockerFixture) -> FakeClock:
+    clock = FakeClock()
+    mocker.patch("framework.services.gpu_telemetry.time", clock)
+    return clock
+
+
+def test_window_average_per_gpu() -> None:
+    """Test that samples are kept per GPU and averaged over the window."""
+    provider = FakeTelemetryProvider(utilizations=[0.0, 50.0])
+    telemetry = GPUTelemetry(provider=provider)
+
+    telemetry.sample()
+    provider.set_utilization(0, 10.0)
+    telemetry.sample()
+
+    assert telemetry.get_gpu_indices() == [0, 1]
+    assert telemetry.get_window_average(0, window_seconds=60) == 5.0
+    assert telemetry.get_window_average(1, window_seconds=60) == 50.0
+    assert telemetry.get_window_average(2, window_seconds=60) is None
+
+
+def test_is_idle_uses_sustained_utilization(clock: FakeClock) -> None:
+    """Test that a single spike does not count as idle and missing data is not idle."""
+    provider = FakeTelemetryProvider(utilizations=[0.0])
+    telemetry = GPUTelemetry(provider=provider)
+    assert telemetry.is_idle(window_seconds=60, threshold=5) is False
+
+    for utilization in [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 60.0]:
+        provider.set_utilization(0, utilization)
+        telemetry.sample()
+        clock.now += 10
+    assert telemetry.is_idle(window_seconds=60, threshold=5) is False
+
+    for _ in range(6):
+        provider.set_utilization(0, 0.0)
+        telemetry.sample()
+        clock.now += 10
+    assert telemetry.is_idle(window_seconds=60, threshold=5) is True
+
+
+def test_is_idle_requires_full_window_coverage(clock: FakeClock) -> None:
+    """Test that idle samples covering only part of the window are not idle."""
+    provider = FakeTelemetryProvider(utilizations=[90.0])
+    telemetry = GPUTelemetry(provider=provider)
+
+    # Right after startup: a single low sample
+    provider.set_utilization(0, 0.0)
+    telemetry.sample()
+    clock.now += 30
+    assert telemetry.is_idle(window_seconds=60, threshold=5) is False
+
+    # After a gap in the samples: the GPU was busy before it
+    clock.now += 300
+    provider.set_utilization(0, 90.0)
+    telemetry.sample()
+    clock.now += 120
+    provider.set_utilization(0, 0.0)
+    telemetry.sample()
+    clock.now += 10
+    assert telemetry.is_idle(window_seconds=60, threshold=5) is False
+
+    clock.now += 60
+    telemetry.sample()
+    assert telemetry.is_idle(window_seconds=60, threshold=5) is True
+
+
+def test_no_provider_returns_no_samples() -> None:
+    """Test that a machine without GPU telemetry yields no samples."""
+    telemetry = GPUTelemetry()
+    telemetry._provider_initialized = True
+
+    assert telemetry.sample() == []
+    assert telemetry.is_idle(window_seconds=60, threshold=5) is False
@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+from pytest_mock import MockerFixture
+
+from app.services.idle_watcher import IdleWatcher, IdleWatcherQueueStatus, IdleWatcherState
+
+
+def test_idle_queue_dispatches_after_timeout(mocker: MockerFixture) -> None:
+    """Test that an idle queue waits for the timeout and then dispatches the next job."""
+    mocker.patch("app.services.idle_watcher.get_db_context")
+    mocker.patch("app.services.idle_watcher.crud.job.sync.get_multi", return_value=[])
+    mocker.patch("app.services.idle_watcher.gpu_telemetry.is_idle", return_value=True)
+    mock_trigger = mocker.patch(
+        "app.services.idle_watcher.job_queue.trigger_next_job",
+        return_value=MagicMock(id="job-1"),
+    )
+
+    watcher = IdleWatcher()
+    watcher.idle_timeout_minutes = 1
+    watcher.queues = {"default": IdleWatcherQueueStatus(queue_name="default")}
+
+    remaining = watcher.evaluate()
+    queue = watcher.queues["default"]
+    assert queue.state == IdleWatcherState.idle_pending
+    assert remaining is not None and 0 < remaining <= 60
+    mock_trigger.assert_not_called()
+
+    queue.dispatch_at = queue.idle_since  # Timeout has passed
+    assert watcher.evaluate() is None
+    assert queue.state == IdleWatcherState.dispatched
+    assert queue.dispatched_job_id == "job-1"
+    mock_trigger.assert_called_once()
+
+
+def test_paused_watcher_does_not_dispatch(mocker: MockerFixture) -> None:
+    """Test that a woken watcher pauses every queue until resumed."""
+    mocker.patch("app.services.idle_watcher.get_db_context")
+    mocker.patch("app.services.idle_watcher.crud.job.sync.get_multi", return_value=[])
+    mocker.patch("app.services.idle_watcher.gpu_telemetry.is_idle", return_value=True)
+    mock_trigger = mocker.patch("app.services.idle_watcher.job_queue.trigger_next_job")
+
+    watcher = IdleWatcher()
+    watcher.idle_timeout_minutes = 0
+    watcher.queues = {"default": IdleWatcherQueueStatus(queue_name="default")}
+
+    watcher.wake()
+    watcher.evaluate()
+    assert watcher.get_status().queues[0].state == IdleWatcherState.paused
+    mock_trigger.assert_not_called()
+
+    watcher.resume()
+    watcher.evaluate()
+    mock_trigger.assert_called_once()
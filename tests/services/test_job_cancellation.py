@@ -0,0 +1,40 @@
+import subprocess
+
+import pytest
+
+from framework.services.job_cancellation import (
+    CancellationToken,
+    JobCancelledError,
+    kill_process_group,
+)
+
+
+def test_cancellation_token() -> None:
+    """Test that callbacks run once on cancel, and right away when added after it."""
+    token = CancellationToken()
+    calls = []
+    token.add_callback(lambda: calls.append("before"))
+    token.add_callback(lambda: 1 / 0)  # A failing callback doesn't stop the others
+    token.add_callback(lambda: calls.append("after failing"))
+    token.raise_if_cancelled()
+
+    token.cancel()
+    token.cancel()
+    token.add_callback(lambda: calls.append("late"))
+
+    assert token.is_cancelled and token.wait(0)
+    assert calls == ["before", "after failing", "late"]
+    with pytest.raises(JobCancelledError):
+        token.raise_if_cancelled()
+
+
+def test_kill_process_group() -> None:
+    """Test that the whole tree is killed, with SIGKILL when SIGTERM is ignored."""
+    process = subprocess.Popen(
+        "trap '' TERM; sleep 60 & sleep 60; wait",
+        shell=True,
+        start_new_session=True,
+    )
+
+    assert kill_process_group(process.pid, timeout=0.5)
+    assert process.wait(timeout=5) != 0
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+import pytest
+from sqlmodel import Session
+
+from framework import crud, models
+from framework.services.job_reaper import reap_stale_jobs
+from framework.utils.datetime import utc_now
+
+
+def _running_job(db: Session, name: str, heartbeat_age: float, retry_count: int = 0) -> models.Job:
+    job = crud.job.sync.create(
+        db,
+        obj_in=models.JobCreate(
+            name=name,
+            env_name="test",
+            type=models.JobType.script,
+            status=models.JobStatus.running,
+            retry_count=retry_count,
+        ),
+    )
+    heartbeat_at = utc_now() - timedelta(seconds=heartbeat_age)
+    return crud.job.sync.update(db, db_obj=job, obj_in=models.JobUpdate(heartbeat_at=heartbeat_at))
+
+
+@pytest.mark.asyncio
+async def test_reap_stale_jobs(db: Session) -> None:
+    """Test that only jobs with a stale heartbeat are requeued, then failed."""
+    healthy = _running_job(db, "healthy", heartbeat_age=2)
+    crashed = _running_job(db, "crashed", heartbeat_age=60)
+    crashed_again = _running_job(db, "crashed_again", heartbeat_age=60, retry_count=1)
+    # Dispatched jobs wait for a worker without a heartbeat
+    dispatched = crud.job.sync.create(
+        db,
+        obj_in=models.JobCreate(name="dispatched", env_name="test", status=models.JobStatus.queued),
+    )
+    assert crud.job.sync.claim_queued_job(db, id=dispatched.id) is not None
+
+    released = reap_stale_jobs(db, env_name="test", timeout_seconds=30, max_requeues=1)
+
+    assert sorted(job.name for job in released) == ["crashed", "crashed_again"]
+    for job in [healthy, crashed, crashed_again, dispatched]:
+        db.refresh(job)
+    assert healthy.status == models.JobStatus.running
+    assert dispatched.status == models.JobStatus.dispatched
+    assert (crashed.status, crashed.retry_count) == (models.JobStatus.queued, 1)
+    assert crashed_again.status == models.JobStatus.failed
+    assert crashed_again.finished_at is not None
+
+    # A job whose heartbeat is fresh again is left alone
+    assert crud.job.sync.touch_heartbeat(db, id=healthy.id)
+    assert reap_stale_jobs(db, env_name="test", timeout_seconds=30, max_requeues=1) == []
@@ -0,0 +1,58 @@
+import subprocess
+
+import pytest
+import requests
+from sqlmodel import Session
+
+from framework import crud, models
+from framework.services.job_retry import mark_for_retry
+
+
+def test_retry_policy() -> None:
+    """Test the backoff delays and which failures are retried."""
+    policy = models.RetryPolicy(
+        max_attempts=3,
+        backoff_seconds=10,
+        backoff_factor=3,
+        max_backoff_seconds=60,
+        retry_exceptions=["requests.exceptions.ConnectionError"],
+        retry_exit_codes=[255],
+    )
+    assert [policy.get_delay(n) for n in range(3)] == [10, 30, 60]
+
+    # Subclasses match, by their base class
+    assert policy.should_retry(0, requests.exceptions.ConnectTimeout())
+    assert policy.should_retry(1, subprocess.CalledProcessError(255, "rsync"))
+    assert not policy.should_retry(0, subprocess.CalledProcessError(1, "rsync"))
+    assert not policy.should_retry(0, ValueError())
+    # Out of attempts
+    assert not policy.should_retry(2, requests.exceptions.ConnectionError())
+
+    assert models.RetryPolicy(max_attempts=2).should_retry(0, ValueError())
+    assert not models.RetryPolicy().should_retry(0, ValueError())
+
+
+@pytest.mark.asyncio
+async def test_mark_for_retry(db: Session) -> None:
+    """Test that a retried job waits in retrying with its next attempt, then is queued."""
+    job = crud.job.sync.create(
+        db,
+        obj_in=models.JobCreate(
+            name="flaky",
+            status=models.JobStatus.running,
+            retry_policy=models.RetryPolicy(max_attempts=2, backoff_seconds=5).model_dump(),
+        ),
+    )
+
+    assert mark_for_retry(db, job=job, exc=requests.exceptions.Timeout()) == 5
+    db.refresh(job)
+    assert (job.status, job.retry_count) == (models.JobStatus.retrying, 1)
+    assert job.finished_at is not None
+
+    assert crud.job.sync.requeue_retrying_job(db, id=job.id)
+    assert not crud.job.sync.requeue_retrying_job(db, id=job.id)
+    db.refresh(job)
+    assert job.status == models.JobStatus.queued
+
+    # The last attempt is not retried
+    assert mark_for_retry(db, job=job, exc=requests.exceptions.Timeout()) is None
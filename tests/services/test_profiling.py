@@ -0,0 +1,38 @@
+from pathlib import Path
+
+import pytest
+
+from framework.services.profiling import ProfilerBusyError, create_profiler, profile
+
+
+def _busy_work() -> int:
+    return sum(i * i for i in range(10_000))
+
+
+def test_profile_saves_report(tmp_path: Path) -> None:
+    """Test that a profiled block saves its report, with the suffix of the profiler."""
+    with profile(tmp_path / "job_1_retry_0_profile", backend="cprofile") as report:
+        _busy_work()
+
+    assert report.path == tmp_path / "job_1_retry_0_profile.txt"
+    assert "_busy_work" in report.path.read_text()
+
+
+def test_profile_one_at_a_time(tmp_path: Path) -> None:
+    """Test that a second profiler is refused while one runs, and allowed after."""
+    with (
+        profile(tmp_path / "first", backend="cprofile"),
+        pytest.raises(ProfilerBusyError),
+        profile(tmp_path / "second", backend="cprofile"),
+    ):
+        pass
+
+    with profile(tmp_path / "third", backend="cprofile") as report:
+        pass
+    assert report.path.exists()
+
+
+def test_create_profiler_unknown_backend() -> None:
+    """Test that an unknown backend is an error rather than a silent fallback."""
+    with pytest.raises(ValueError):
+        create_profiler("perf")
@@ -0,0 +1,108 @@
+from uuid import uuid4
+
+import pytest
+from sqlmodel import Session
+
+import app.scripts  # noqa: F401 Registers the app's scripts
+from framework import crud, models
+from framework.models.job import ResourceClass
+from framework.services.resource_scheduler import ResourceScheduler, get_job_slots
+
+
+def _job(name: str, priority: models.Priority = models.Priority.normal, **slots: int) -> models.Job:
+    return models.Job(name=name, priority=priority, status=models.JobStatus.queued, **slots)
+
+
+def _scheduler() -> ResourceScheduler:
+    return ResourceScheduler(
+        capacity={ResourceClass.gpu: 1, ResourceClass.cpu: 2, ResourceClass.io: 2}
+    )
+
+
+def test_get_job_slots_defaults() -> None:
+    """Test that jobs without slots use their script's resource class, or one CPU slot."""
+    assert get_job_slots(models.Job(type=models.JobType.command)) == {
+        ResourceClass.gpu: 0,
+        ResourceClass.cpu: 1,
+        ResourceClass.io: 0,
+    }
+    assert get_job_slots(models.Job(type=models.JobType.script, command="ScriptRsyncFiles")) == {
+        ResourceClass.gpu: 0,
+        ResourceClass.cpu: 0,
+        ResourceClass.io: 1,
+    }
+    assert get_job_slots(models.Job(gpu_slots=1)) == {
+        ResourceClass.gpu: 1,
+        ResourceClass.cpu: 0,
+        ResourceClass.io: 0,
+    }
+
+
+def test_select_runs_jobs_with_different_resources_concurrently() -> None:
+    """Test that jobs run together unless they need the same full resource."""
+    rsync = _job("rsync", io_slots=1)
+    thumbnails = _job("thumbnails", cpu_slots=1)
+    xy_plot = _job("xy_plot", gpu_slots=1)
+    second_xy_plot = _job("second_xy_plot", gpu_slots=1)
+
+    selected = _scheduler().select([rsync, xy_plot, second_xy_plot, thumbnails], running_jobs=[])
+
+    assert [job.name for job in selected] == ["rsync", "xy_plot", "thumbnails"]
+
+
+def test_select_respects_running_jobs_and_priority() -> None:
+    """Test that a job waiting for a busy resource blocks lower priority jobs needing it."""
+    running = [_job("training", gpu_slots=1, cpu_slots=1)]
+    big = _job("big", priority=models.Priority.high, cpu_slots=2)
+    small = _job("small", priority=models.Priority.low, cpu_slots=1)
+    io = _job("io", priority=models.Priority.lowest, io_slots=1)
+
+    selected = _scheduler().select([big, small, io], running_jobs=running)
+
+    assert [job.name for job in selected] == ["io"]
+
+
+def test_select_caps_slots_at_capacity() -> None:
+    """Test that a job asking for more slots than exist still runs, alone."""
+    selected = _scheduler().select([_job("huge", gpu_slots=4), _job("next", gpu_slots=1)], [])
+
+    assert [job.name for job in selected] == ["huge"]
+
+
+def test_select_caps_jobs_per_queue_at_workers() -> None:
+    """Test that a queue doesn't get more jobs than its consumer has workers."""
+    scheduler = ResourceScheduler(
+        capacity={ResourceClass.gpu: 1, ResourceClass.cpu: 4, ResourceClass.io: 2},
+        workers_per_queue=2,
+    )
+    running = [_job("running", cpu_slots=1)]
+    reserved = _job("reserved", cpu_slots=1)
+    reserved.queue_name = "reserved"
+
+    selected = scheduler.select(
+        [_job("first", cpu_slots=1), _job("second", cpu_slots=1), reserved], running
+    )
+
+    assert [job.name for job in selected] == ["first", "reserved"]
+
+
+@pytest.mark.asyncio
+async def test_claim_queued_job(db: Session) -> None:
+    """Test that a queued job can only be claimed once, and started with its claim token."""
+    job = crud.job.sync.create(
+        db, obj_in=models.JobCreate(name="claim", status=models.JobStatus.queued)
+    )
+
+    claim_token = crud.job.sync.claim_queued_job(db, id=job.id)
+    assert claim_token is not None
+    assert crud.job.sync.claim_queued_job(db, id=job.id) is None
+    db.refresh(job)
+    assert job.status == models.JobStatus.dispatched
+    assert job.heartbeat_at is None
+
+    assert not crud.job.sync.start_claimed_job(db, id=job.id, claim_token=uuid4())
+    assert crud.job.sync.start_claimed_job(db, id=job.id, claim_token=claim_token)
+    assert not crud.job.sync.start_claimed_job(db, id=job.id, claim_token=claim_token)
+    db.refresh(job)
+    assert job.status == models.JobStatus.running
+    assert job.heartbeat_at is not None
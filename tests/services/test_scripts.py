@@ -0,0 +1,57 @@
+from typing import Any
+
+import pytest
+from pydantic import BaseModel
+
+from framework.services.scripts import ResourceClass, Script, ScriptOutput, ScriptRegistry
+
+
+class ExampleMeta(BaseModel):
+    input_text: str
+
+
+def test_register_lazy_imports_on_first_use() -> None:
+    """Test that a lazily registered script exposes its metadata before it is imported."""
+    registry = ScriptRegistry()
+    registry.register_lazy(
+        "app.scripts.example:ScriptExample",
+        resource_class=ResourceClass.io,
+        meta_schema=ExampleMeta,
+    )
+
+    info = registry.get_info("ScriptExample")
+    assert info.resource_class == ResourceClass.io
+    assert not registry.is_loaded("ScriptExample")
+
+    script_class = registry.get_class("ScriptExample")
+    assert script_class.__name__ == "ScriptExample"
+    assert registry.is_loaded("ScriptExample")
+
+    registry.validate_meta("ScriptExample", {"input_text": "hello", "job_id": "1"})
+    with pytest.raises(ValueError):
+        registry.validate_meta("ScriptExample", {})
+    with pytest.raises(ValueError):
+        registry.get_class("ScriptUnknown")
+
+
+def test_register_decorator() -> None:
+    """Test that the decorator registers a class and rejects a name used by another path."""
+    registry = ScriptRegistry()
+
+    @registry.register(resource_class=ResourceClass.gpu, estimated_runtime_seconds=60)
+    class ScriptDecorated(Script):
+        """Decorated test script."""
+
+        def _validate_input(self, *args: Any, **kwargs: Any) -> bool:
+            return True
+
+        def _run(self, *args: Any, **kwargs: Any) -> ScriptOutput:
+            return ScriptOutput(success=True)
+
+    info = registry.get_info("ScriptDecorated")
+    assert info.resource_class == ResourceClass.gpu
+    assert info.description == "Decorated test script."
+    assert registry.get_class("ScriptDecorated") is ScriptDecorated
+
+    with pytest.raises(ValueError):
+        registry.register_lazy("app.scripts.other:ScriptDecorated")
@@ -0,0 +1,44 @@
+from pytest_mock import MockerFixture
+
+from framework.services.system_metrics import SystemMetricsSampler
+
+
+def test_sample_is_stored_in_ring_buffer(mocker: MockerFixture) -> None:
+    """Test that samples are appended and the oldest are dropped when the buffer is full."""
+    mocker.patch(
+        "framework.services.system_metrics.get_gpu_stats",
+        return_value={"gpu_usage": 10.0, "gpu_memory_used": 512.0},
+    )
+    mocker.patch(
+        "framework.services.system_metrics.get_cpu_stats", return_value={"cpu_usage": 5.0}
+    )
+    mocker.patch("framework.services.system_metrics.get_disk_stats", return_value={})
+
+    sampler = SystemMetricsSampler(interval_seconds=1, buffer_size=2)
+    assert sampler.get_latest() is None
+
+    for _ in range(3):
+        sampler.sample()
+
+    samples = sampler.get_samples()
+    assert len(samples) == 2
+    assert sampler.get_latest() == samples[-1]
+    assert samples[-1].gpu_usage == 10.0
+    assert samples[-1].cpu_usage == 5.0
+    assert samples[-1].disk_usage is None
+
+
+def test_sample_does_not_block_on_cpu(mocker: MockerFixture) -> None:
+    """Test that the sampler reads CPU usage without a blocking interval."""
+    mocker.patch(
+        "framework.services.system_metrics.get_gpu_stats",
+        return_value={"gpu_usage": None, "gpu_memory_used": None},
+    )
+    mock_cpu = mocker.patch(
+        "framework.services.system_metrics.get_cpu_stats", return_value={"cpu_usage": 1.0}
+    )
+    mocker.patch("framework.services.system_metrics.get_disk_stats", return_value={})
+
+    SystemMetricsSampler().sample()
+
+    mock_cpu.assert_called_once_with(interval=None)
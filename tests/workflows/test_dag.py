@@ -0,0 +1,93 @@
+from uuid import uuid4
+
+import pytest
+from sqlmodel import Session
+
+from framework import crud, models
+from framework.workflows import (
+    Workflow,
+    WorkflowStep,
+    cancel_dependents,
+    create_workflow_jobs,
+    filter_ready_jobs,
+)
+
+
+def _lora_workflow() -> Workflow:
+    """Two characters, each trained, plotted and downloaded."""
+    steps = []
+    for character in ["alice", "bob"]:
+        steps += [
+            WorkflowStep(
+                key=f"{character}_train", job=models.JobCreate(name=f"train {character}")
+            ),
+            WorkflowStep(
+                key=f"{character}_xy",
+                job=models.JobCreate(name=f"xy {character}"),
+                depends_on=[f"{character}_train"],
+            ),
+            WorkflowStep(
+                key=f"{character}_rsync",
+                job=models.JobCreate(name=f"rsync {character}"),
+                depends_on=[f"{character}_xy"],
+            ),
+        ]
+    return Workflow(name="lora", steps=steps)
+
+
+def test_get_order() -> None:
+    """Test that parents come before children and cycles are rejected."""
+    order = [step.key for step in _lora_workflow().get_order()]
+    assert order.index("alice_train") < order.index("alice_xy") < order.index("alice_rsync")
+    assert order.index("bob_train") < order.index("bob_xy") < order.index("bob_rsync")
+
+    cycle = Workflow(
+        steps=[
+            WorkflowStep(key="a", job=models.JobCreate(), depends_on=["b"]),
+            WorkflowStep(key="b", job=models.JobCreate(), depends_on=["a"]),
+        ]
+    )
+    with pytest.raises(ValueError):
+        cycle.get_order()
+    unknown = Workflow(steps=[WorkflowStep(key="a", job=models.JobCreate(), depends_on=["x"])])
+    with pytest.raises(ValueError):
+        unknown.get_order()
+
+
+@pytest.mark.asyncio
+async def test_workflow_branches_run_independently(db: Session) -> None:
+    """Test that a finished parent releases its children and a failed one cancels them."""
+    jobs = {job.name: job for job in create_workflow_jobs(db, _lora_workflow())}
+    assert len({job.workflow_id for job in jobs.values()}) == 1
+
+    ready = filter_ready_jobs(db, list(jobs.values()))
+    assert sorted(job.name for job in ready) == ["train alice", "train bob"]
+
+    crud.job.sync.update(
+        db, id=jobs["train alice"].id, obj_in=models.JobUpdate(status=models.JobStatus.done)
+    )
+    crud.job.sync.update(
+        db, id=jobs["train bob"].id, obj_in=models.JobUpdate(status=models.JobStatus.failed)
+    )
+    waiting = [job for job in jobs.values() if not job.name.startswith("train")]
+    assert [job.name for job in filter_ready_jobs(db, waiting)] == ["xy alice"]
+
+    cancelled = cancel_dependents(db, job_id=jobs["train bob"].id)
+    assert sorted(job.name for job in cancelled) == ["rsync bob", "xy bob"]
+    db.refresh(jobs["rsync bob"])
+    db.refresh(jobs["rsync alice"])
+    assert jobs["rsync bob"].status == models.JobStatus.cancelled
+    assert jobs["rsync alice"].status == models.JobStatus.queued
+
+
+def test_create_workflow_jobs_rejects_unknown_dependencies(db: Session) -> None:
+    """Test that a job can't depend on a job id that doesn't exist."""
+    parent = crud.job.sync.create(db, obj_in=models.JobCreate(name="parent"))
+    known = models.JobCreate(name="known", depends_on=[str(parent.id)])
+    assert create_workflow_jobs(db, Workflow(steps=[WorkflowStep(key="a", job=known)]))
+
+    for depends_on in [str(uuid4()), "not a uuid"]:
+        unknown = models.JobCreate(name="unknown", depends_on=[depends_on])
+        with pytest.raises(ValueError, match="unknown jobs"):
+            create_workflow_jobs(db, Workflow(steps=[WorkflowStep(key="a", job=unknown)]))
+    assert not crud.job.sync.get_multi(db, name="unknown")